@@ -13,4 +13,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'internal_menu_selection.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from vote.streams import vote_stream  # noqa: E402
+
+# Long-lived streams are served by plain ASGI apps, everything else by Django
+streaming_routes = {
+    f"/{settings.PREFIX}vote/stream/": vote_stream,
+}
+
+
+async def application(scope, receive, send):
+    app = streaming_routes.get(scope.get('path'), django_application) if scope['type'] == 'http' \
+        else django_application
+    await app(scope, receive, send)
@@ -0,0 +1,113 @@
+"""
+Per-request batch loading of the related values serializers show, e.g. the username of the owner of every
+restaurant of a page:
+
+    class RestaurantSerializer(serializers.ModelSerializer):
+        owner = BatchedRelatedField('owner', 'username')
+
+        class Meta:
+            model = Restaurant
+            fields = ['id', 'name', 'owner']
+            list_serializer_class = BatchListSerializer
+
+A list serialization first collects the keys of all its rows, then resolves them with one query per model and
+field. The values are memoized on the request, so other serializers of the same request reuse them.
+"""
+from django.db import models
+from rest_framework import serializers
+
+
+class BatchLoader:
+    """
+    Values of one field of a model by primary key, loaded with one query for all the keys asked so far
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.values = {}
+        self.pending = set()
+
+    def prime(self, keys):
+        self.pending.update(key for key in keys if key is not None and key not in self.values)
+
+    def load(self, key):
+        if key is None:
+            return None
+        if key not in self.values:
+            self.pending.add(key)
+            self.dispatch()
+        return self.values.get(key)
+
+    def dispatch(self):
+        if not self.pending:
+            return
+        keys, self.pending = self.pending, set()
+        # Missing keys are remembered too, so they are not asked for again
+        self.values.update(dict.fromkeys(keys))
+        self.values.update(self.model._default_manager.filter(pk__in=keys).values_list('pk', self.field))
+
+
+def get_loader(context, model, field):
+    """
+    Loader of `field` of `model` for the request of a serializer context, or for the context itself when the
+    serializer has no request
+    """
+    request = context.get('request')
+    if request is None:
+        loaders = context.setdefault('batch_loaders', {})
+    else:
+        if not hasattr(request, 'batch_loaders'):
+            request.batch_loaders = {}
+        loaders = request.batch_loaders
+    key = (model._meta.label_lower, field)
+    if key not in loaders:
+        loaders[key] = BatchLoader(model, field)
+    return loaders[key]
+
+
+class BatchedRelatedField(serializers.Field):
+    """
+    Read-only `field` of the object a foreign key `relation` points to, read from the related object when it is
+    already loaded and from a batch loader otherwise
+    """
+
+    def __init__(self, relation, field, **kwargs):
+        self.relation = relation
+        self.field = field
+        kwargs['read_only'] = True
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def model_field(self, obj):
+        return obj._meta.get_field(self.relation)
+
+    def loader(self, obj):
+        return get_loader(self.context, self.model_field(obj).related_model, self.field)
+
+    def prime(self, objs):
+        if objs:
+            model_field = self.model_field(objs[0])
+            self.loader(objs[0]).prime(getattr(obj, model_field.attname) for obj in objs
+                                       if not model_field.is_cached(obj))
+
+    def to_representation(self, obj):
+        model_field = self.model_field(obj)
+        if model_field.is_cached(obj):
+            related_obj = model_field.get_cached_value(obj)
+            return getattr(related_obj, self.field) if related_obj is not None else None
+        return self.loader(obj).load(getattr(obj, model_field.attname))
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """
+    List serializer priming the batch loaders of the child's fields with the keys of every row before
+    serializing them
+    """
+
+    def to_representation(self, data):
+        objs = list(data.all() if isinstance(data, models.Manager) else data)
+        for field in self.child._readable_fields:
+            if isinstance(field, BatchedRelatedField):
+                field.prime(objs)
+        return super().to_representation(objs)
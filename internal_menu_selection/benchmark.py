@@ -0,0 +1,317 @@
+"""
+Synthetic lunch-rush dataset and latency measurements of the API endpoints, used by `python manage.py bench`, and
+of the serializers and renderers, used by `python manage.py bench_serializers` and `python manage.py bench_renderers`.
+"""
+import datetime
+import math
+import random
+import time
+from collections import Counter, namedtuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from internal_menu_selection.fast_serializers import get_fast_serializer
+from internal_menu_selection.metrics import QueryCollector
+from restaurant.models import Restaurant, FoodItem, Menu, MenuFoodItem
+from roles.models import Role
+from users.authentication import ClaimsTokenObtainPairSerializer
+from users.models import User
+from users.permission_manifest import ROLE_PERMISSIONS
+from users.services import sync_role_permissions
+from vote.models import UserVote, VoteTally
+from vote.results import finalize_day
+
+DEFAULT_DATASET = {
+    'restaurants': 20,
+    'food_items': 15,
+    'days': 365,
+    'employees': 500,
+    'seed': 0,
+}
+
+PASSWORD = "bench@123"
+MENU_FOOD_ITEMS = 5
+BATCH_SIZE = 5000
+BULK_REGISTRATION_SIZE = 10
+
+
+def seed_dataset(restaurants, food_items, days, employees, seed=0):
+    """
+    Insert in bulk `restaurants` restaurants with their owners and `food_items` food items each, a menu of every
+    restaurant for every day of the last `days` days and today, `employees` employees voting every past day, the
+    tallies and the frozen result of every past day. Returns the created objects the scenarios need.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    sync_role_permissions(ROLE_PERMISSIONS)
+    roles = dict(Role.objects.values_list('name', 'id'))
+    password = make_password(PASSWORD)
+
+    admin = User.objects.create(username="admin", email="admin@example.com", password=password,
+                                role_id=roles['admin'], is_staff=True)
+    owners = User.objects.bulk_create(
+        User(username=f"owner{number}", email=f"owner{number}@example.com", password=password,
+             role_id=roles['restaurant_owner'], first_name="Owner", last_name=str(number))
+        for number in range(restaurants))
+    staff = User.objects.bulk_create(
+        (User(username=f"employee{number}", email=f"employee{number}@example.com", password=password,
+              role_id=roles['employee'], first_name="Employee", last_name=str(number))
+         for number in range(employees)), batch_size=BATCH_SIZE)
+
+    restaurant_objs = Restaurant.objects.bulk_create(
+        Restaurant(name=f"Restaurant {number}", owner=owner) for number, owner in enumerate(owners))
+    food_item_objs = FoodItem.objects.bulk_create(
+        (FoodItem(name=f"Dish {number}", description=f"Dish {number} of {restaurant_obj.name}",
+                  price=rng.randint(100, 900), food_type=rng.choice(['appetizer', 'entree', 'dessert']),
+                  restaurant=restaurant_obj)
+         for restaurant_obj in restaurant_objs for number in range(food_items)), batch_size=BATCH_SIZE)
+    restaurant_food_items = {}
+    for food_item_obj in food_item_objs:
+        restaurant_food_items.setdefault(food_item_obj.restaurant_id, []).append(food_item_obj.id)
+
+    service_dates = [today - datetime.timedelta(days=offset) for offset in range(days, -1, -1)]
+    menus = Menu.objects.bulk_create(
+        (Menu(restaurant=restaurant_obj, day=service_date.strftime('%A'), service_date=service_date)
+         for service_date in service_dates for restaurant_obj in restaurant_objs), batch_size=BATCH_SIZE)
+    MenuFoodItem.objects.bulk_create(
+        (MenuFoodItem(menu_id=menu_obj.id, food_item_id=food_item_id) for menu_obj in menus
+         for food_item_id in rng.sample(restaurant_food_items[menu_obj.restaurant_id],
+                                        min(MENU_FOOD_ITEMS, food_items))), batch_size=BATCH_SIZE)
+
+    menus_by_date = {}
+    for menu_obj in menus:
+        menus_by_date.setdefault(menu_obj.service_date, []).append(menu_obj.id)
+    tallies = Counter()
+    votes = []
+    for service_date in service_dates[:-1]:
+        for employee in staff:
+            menu_id = rng.choice(menus_by_date[service_date])
+            tallies[(service_date, menu_id)] += 1
+            votes.append(UserVote(user_id=employee.id, menu_id=menu_id, service_date=service_date))
+        if len(votes) >= BATCH_SIZE:
+            UserVote.objects.bulk_create(votes, batch_size=BATCH_SIZE)
+            votes = []
+    UserVote.objects.bulk_create(votes, batch_size=BATCH_SIZE)
+    VoteTally.objects.bulk_create(
+        (VoteTally(service_date=service_date, menu_id=menu_id, votes=count)
+         for (service_date, menu_id), count in tallies.items()), batch_size=BATCH_SIZE)
+    for service_date in service_dates[:-1]:
+        finalize_day(service_date)
+    cache.clear()
+
+    return {
+        'admin': admin,
+        'owners': owners,
+        'employees': staff,
+        'restaurants': restaurant_objs,
+        'food_items': restaurant_food_items,
+        'today_menus': menus[-len(restaurant_objs):] if restaurant_objs else [],
+    }
+
+
+Scenario = namedtuple('Scenario', ['method', 'url_name', 'user', 'url_kwargs', 'data'], defaults=[None, None])
+
+
+def future_date(days):
+    return (timezone.localdate() + datetime.timedelta(days=days)).isoformat()
+
+
+def new_employee(iteration, number=0):
+    return {"email": f"bench{iteration}-{number}@example.com", "username": f"bench{iteration}-{number}",
+            "password": PASSWORD, "first_name": "Bench", "last_name": str(iteration), "role": "employee"}
+
+
+# Every endpoint of restaurant/urls.py, users/urls.py and vote/urls.py with its main method. `user`, `url_kwargs`
+# and `data` are called with the dataset and the number of the request, so writes never conflict.
+SCENARIOS = [
+    Scenario('GET', 'list_register_restaurant', lambda dataset, i: dataset['owners'][0]),
+    Scenario('POST', 'list_register_restaurant', lambda dataset, i: dataset['owners'][0],
+             data=lambda dataset, i: {"name": f"Bench {i}"}),
+    Scenario('GET', 'retrieve_update_delete_restaurant', lambda dataset, i: dataset['owners'][0],
+             url_kwargs=lambda dataset, i: {'id': dataset['restaurants'][0].id}),
+    Scenario('GET', 'list_add_food_item', lambda dataset, i: dataset['owners'][0]),
+    Scenario('GET', 'retrieve_update_food_item', lambda dataset, i: dataset['owners'][0],
+             url_kwargs=lambda dataset, i: {'id': dataset['food_items'][dataset['restaurants'][0].id][0]}),
+    Scenario('GET', 'list_add_menu', lambda dataset, i: dataset['owners'][0]),
+    Scenario('POST', 'batch_add_menu', lambda dataset, i: dataset['owners'][0],
+             data=lambda dataset, i: [
+                 {"restaurant": dataset['restaurants'][0].id, "day": "Monday",
+                  "service_date": future_date(7 * i + day),
+                  "food_item": dataset['food_items'][dataset['restaurants'][0].id][:MENU_FOOD_ITEMS]}
+                 for day in range(1, 8)]),
+    Scenario('GET', 'retrieve_update_menu', lambda dataset, i: dataset['owners'][0],
+             url_kwargs=lambda dataset, i: {'id': dataset['today_menus'][0].id}),
+    Scenario('POST', 'clone_menu', lambda dataset, i: dataset['owners'][-1],
+             url_kwargs=lambda dataset, i: {'id': dataset['today_menus'][-1].id},
+             data=lambda dataset, i: {"service_date": future_date(i + 1)}),
+    Scenario('GET', 'list_today_menu', lambda dataset, i: dataset['employees'][0]),
+    Scenario('GET', 'today_board', lambda dataset, i: dataset['employees'][0]),
+    Scenario('POST', 'register_employee', lambda dataset, i: dataset['admin'],
+             data=lambda dataset, i: {**new_employee(i), "confirm_password": PASSWORD,
+                                      "role": dataset['employees'][0].role_id}),
+    Scenario('POST', 'bulk_register_employee', lambda dataset, i: dataset['admin'],
+             data=lambda dataset, i: [new_employee(i, number) for number in range(1, BULK_REGISTRATION_SIZE + 1)]),
+    Scenario('GET', 'list_employee', lambda dataset, i: dataset['admin']),
+    Scenario('GET', 'retrieve_update_delete_employee', lambda dataset, i: dataset['admin'],
+             url_kwargs=lambda dataset, i: {'id': dataset['employees'][0].id}),
+    Scenario('POST', 'Add_Vote', lambda dataset, i: dataset['employees'][i],
+             data=lambda dataset, i: {"menu": dataset['today_menus'][i % len(dataset['today_menus'])].id}),
+    Scenario('GET', 'List_Vote', lambda dataset, i: dataset['employees'][0]),
+    Scenario('GET', 'List_Result_Vote', lambda dataset, i: dataset['employees'][0]),
+    Scenario('GET', 'List_Daily_Result', lambda dataset, i: dataset['employees'][0]),
+]
+
+
+def scenario_name(scenario):
+    return f"{scenario.method} {scenario.url_name}"
+
+
+def percentile(sorted_values, percent):
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+class TokenCache:
+    """
+    Access tokens of the benchmark users, issued once per user outside of the measured requests
+    """
+
+    def __init__(self):
+        self.tokens = {}
+
+    def __call__(self, user):
+        if user.id not in self.tokens:
+            self.tokens[user.id] = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+        return self.tokens[user.id]
+
+
+def measure(scenario, dataset, requests, warmup=0, client=None, tokens=None):
+    """
+    Send `warmup` then `requests` requests of a scenario one after the other and return the latency percentiles,
+    the sequential throughput and the mean SQL queries of the measured ones
+    """
+    client = client or APIClient()
+    tokens = tokens or TokenCache()
+    latencies = []
+    query_counts = []
+    for iteration in range(warmup + requests):
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens(scenario.user(dataset, iteration))}")
+        url = reverse(scenario.url_name, kwargs=scenario.url_kwargs(dataset, iteration) if scenario.url_kwargs else None)
+        data = scenario.data(dataset, iteration) if scenario.data else None
+        queries = QueryCollector()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            send = getattr(client, scenario.method.lower())
+            response = send(url, data, format='json') if data is not None else send(url)
+            elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f"{scenario_name(scenario)} answered {response.status_code}: {response.content[:500]}")
+        if iteration >= warmup:
+            latencies.append(elapsed)
+            query_counts.append(queries.count)
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'throughput_rps': round(requests / sum(latencies), 1),
+        'queries': round(sum(query_counts) / requests, 2),
+    }
+
+
+def run_scenarios(dataset, requests, warmup=0, names=None):
+    """
+    Measure every scenario, or the ones whose url name is in `names`, and return their results by scenario name
+    """
+    client = APIClient()
+    tokens = TokenCache()
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.url_name not in names:
+            continue
+        results[scenario_name(scenario)] = measure(scenario, dataset, requests, warmup, client, tokens)
+    return results
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare the p50 and p95 latencies of every scenario with a baseline. Returns (name, metric, baseline, current,
+    change) rows and the names of the scenarios slower than the baseline by more than `threshold` (0.1 for 10%).
+    """
+    rows = []
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, None, None, None))
+            continue
+        regressed = False
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+            rows.append((name, metric, base[metric], result[metric], change))
+            regressed = regressed or (metric != 'p99_ms' and change > threshold)
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def measure_serializers(serializer_classes, rows, repeat=5):
+    """
+    Serialize the last `rows` rows of the model of every serializer with the serializer and with its fast
+    serializer, queries included, and return the best time of `repeat` runs of each and whether their JSON is the
+    same, by serializer name
+    """
+    renderer = JSONRenderer()
+    results = {}
+    for serializer_class in serializer_classes:
+        fast_serializer = get_fast_serializer(serializer_class)
+        queryset = fast_serializer.model._default_manager.order_by('-id')[:rows]
+        timings = {'serializer': [], 'fast': []}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = serializer_class(list(queryset), many=True).data
+            timings['serializer'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            fast_data = fast_serializer.to_representation(queryset.values(*fast_serializer.columns))
+            timings['fast'].append(time.perf_counter() - start)
+        serializer_ms, fast_ms = min(timings['serializer']) * 1000, min(timings['fast']) * 1000
+        results[serializer_class.__name__] = {
+            'rows': len(data),
+            'serializer_ms': round(serializer_ms, 3),
+            'fast_ms': round(fast_ms, 3),
+            'speedup': round(serializer_ms / fast_ms, 2) if fast_ms else None,
+            'identical': renderer.render(data) == renderer.render(fast_data),
+        }
+    return results
+
+
+def measure_renderers(data, renderer_classes, repeat=5):
+    """
+    Render `data` with every renderer and return the best time of `repeat` runs, the size of the output, the
+    speedup over DRF's JSONRenderer and, for JSON renderers, whether the output is the same as JSONRenderer's, by
+    renderer name
+    """
+    baseline = JSONRenderer().render(data)
+    results = {}
+    for renderer_class in [JSONRenderer, *renderer_classes]:
+        renderer = renderer_class()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rendered = renderer.render(data, renderer.media_type)
+            timings.append(time.perf_counter() - start)
+        results[renderer_class.__name__] = {
+            'ms': round(min(timings) * 1000, 3),
+            'bytes': len(rendered),
+            'identical': rendered == baseline if renderer.media_type == JSONRenderer.media_type else None,
+        }
+    for result in results.values():
+        result['speedup'] = round(results['JSONRenderer']['ms'] / result['ms'], 2) if result['ms'] else None
+    return results
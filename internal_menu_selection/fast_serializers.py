@@ -0,0 +1,117 @@
+"""
+Read-only fast path of list endpoints: rows are read with `values()` and turned into the data of a model
+serializer by accessors compiled once per serializer class, without building model instances or binding fields
+per row. `FastListMixin` serves the list GETs of a generic view this way:
+
+    class FoodItemListCreateView(FastListMixin, generics.ListCreateAPIView):
+        serializer_class = FoodItemSerializer
+
+The data, and so the rendered JSON, is the same as the serializer's. Serializers with fields the fast path cannot
+read from a column (method fields, nested or many-to-many fields) are refused when compiled.
+"""
+import threading
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from internal_menu_selection.batch_loader import BatchedRelatedField
+from internal_menu_selection.query_planning import ordering_field_names
+
+DEFAULT_FAST_SERIALIZERS = {
+    'ENABLED': True,
+}
+
+
+def fast_serializers_settings():
+    return {**DEFAULT_FAST_SERIALIZERS, **getattr(settings, 'FAST_SERIALIZERS', {})}
+
+
+# Fields whose to_representation only converts the value to a primitive type
+PRIMITIVE_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+    serializers.BooleanField.to_representation: bool,
+}
+
+
+class FastSerializer:
+    """
+    Accessors of the fields of a model serializer: (output name, values() key, converter or None)
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        if not isinstance(serializer, serializers.ModelSerializer):
+            raise ImproperlyConfigured(f"{serializer_class.__name__} is not a model serializer")
+        self.serializer_class = serializer_class
+        self.model = serializer.Meta.model
+        self.fields = tuple(self.compile(field) for field in serializer._readable_fields)
+        self.columns = tuple(key for _, key, _ in self.fields)
+
+    def compile(self, field):
+        if isinstance(field, BatchedRelatedField):
+            return field.field_name, f"{field.relation}__{field.field}", None
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                              serializers.SerializerMethodField)) or field.source == '*':
+            raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{field.field_name} cannot be read from a "
+                                       f"column")
+        key = '__'.join(field.source_attrs)
+        try:
+            model_field = self.model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{field.field_name} is not a model field")
+        if model_field.many_to_many or model_field.one_to_many:
+            raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{field.field_name} reads several rows")
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values() returns the primary key the field would read from the related object
+            return field.field_name, key, field.pk_field.to_representation if field.pk_field else None
+        converter = PRIMITIVE_CONVERTERS.get(type(field).to_representation, field.to_representation)
+        return field.field_name, key, converter
+
+    def to_representation(self, rows):
+        """
+        Data of `rows`, dicts of values() with at least `columns`. None stays None, as with the serializer.
+        """
+        fields = self.fields
+        data = []
+        for row in rows:
+            item = {}
+            for name, key, converter in fields:
+                value = row[key]
+                item[name] = converter(value) if converter is not None and value is not None else value
+            data.append(item)
+        return data
+
+
+_fast_serializers = {}
+_fast_serializers_lock = threading.Lock()
+
+
+def get_fast_serializer(serializer_class):
+    fast_serializer = _fast_serializers.get(serializer_class)
+    if fast_serializer is None:
+        fast_serializer = FastSerializer(serializer_class)
+        with _fast_serializers_lock:
+            _fast_serializers[serializer_class] = fast_serializer
+    return fast_serializer
+
+
+class FastListMixin:
+    """
+    List view mixin serving GET lists from values() rows through the fast serializer of the view's serializer
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not fast_serializers_settings()['ENABLED']:
+            return super().list(request, *args, **kwargs)
+        fast_serializer = get_fast_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = fast_serializer.columns + tuple(ordering_field_names(self, fast_serializer.model))
+        rows = queryset.prefetch_related(None).values(*dict.fromkeys(columns))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.to_representation(page))
+        return Response(fast_serializer.to_representation(rows))
@@ -0,0 +1,99 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, override_settings
+from django.utils import timezone
+
+from internal_menu_selection.benchmark import DEFAULT_DATASET, SCENARIOS, seed_dataset, run_scenarios, \
+    compare_results
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic dataset in a throwaway test database and measure the latency of every endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=DEFAULT_DATASET['restaurants'])
+        parser.add_argument('--food-items', type=int, default=DEFAULT_DATASET['food_items'],
+                            help="Food items of every restaurant")
+        parser.add_argument('--days', type=int, default=DEFAULT_DATASET['days'],
+                            help="Past days with menus, votes and results")
+        parser.add_argument('--employees', type=int, default=DEFAULT_DATASET['employees'],
+                            help="Employees voting every day")
+        parser.add_argument('--seed', type=int, default=DEFAULT_DATASET['seed'])
+        parser.add_argument('--requests', type=int, default=100, help="Measured requests of every endpoint")
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests sent first")
+        parser.add_argument('--endpoints', nargs='+', help="Only measure these url names")
+        parser.add_argument('--output', help="Write the results to this JSON file, to use as a baseline")
+        parser.add_argument('--compare', help="Compare the results with this baseline JSON file")
+        parser.add_argument('--threshold', type=float, default=10,
+                            help="Percentage of p50 or p95 slowdown reported as a regression")
+
+    def handle(self, *args, **options):
+        dataset_config = {name: options[name] for name in DEFAULT_DATASET}
+        if options['restaurants'] < 2 or options['food_items'] < 1:
+            raise CommandError("The benchmark needs at least 2 restaurants with 1 food item each")
+        if options['employees'] < options['warmup'] + options['requests']:
+            raise CommandError("Every vote request needs its own employee: --employees must be at least "
+                               "--warmup plus --requests")
+        known = {scenario.url_name for scenario in SCENARIOS}
+        unknown = set(options['endpoints'] or []) - known
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as err:
+                raise CommandError(f"Could not read the baseline: {err}")
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            start = time.perf_counter()
+            dataset = seed_dataset(**dataset_config)
+            self.stdout.write(f"Seeded {dataset_config} in {time.perf_counter() - start:.1f}s")
+            # The votes are cast on today's menus whatever the time
+            with override_settings(VOTING_CUTOFF='23:59:59.999999'):
+                results = run_scenarios(dataset, options['requests'], options['warmup'], options['endpoints'])
+        except RuntimeError as err:
+            raise CommandError(str(err))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'endpoint':<45} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8}")
+        for name, result in results.items():
+            self.stdout.write(f"{name:<45} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                              f"{result['p99_ms']:>9.2f} {result['throughput_rps']:>8.1f} {result['queries']:>8.2f}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({'dataset': dataset_config, 'requests': options['requests'],
+                           'created': timezone.now().isoformat(), 'python': platform.python_version(),
+                           'django': django.get_version(), 'results': results}, output_file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            self.report(baseline, results, dataset_config, options['threshold'])
+
+    def report(self, baseline, results, dataset_config, threshold):
+        if baseline.get('dataset') != dataset_config:
+            self.stdout.write(self.style.WARNING(f"The baseline was measured on another dataset: "
+                                                 f"{baseline.get('dataset')}"))
+        rows, regressions = compare_results(baseline.get('results', {}), results, threshold / 100)
+        for name, metric, base, current, change in rows:
+            if metric is None:
+                self.stdout.write(f"{name:<45} not in the baseline")
+                continue
+            line = f"{name:<45} {metric:<7} {base:>9.2f} -> {current:>9.2f} ms ({change:+.1%})"
+            regressed = metric != 'p99_ms' and change > threshold / 100
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} endpoints are more than {threshold:g}% slower than the baseline: "
+                               f"{', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS(f"No endpoint is more than {threshold:g}% slower than the baseline"))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment
+
+from internal_menu_selection import renderers
+from internal_menu_selection.benchmark import measure_renderers, seed_dataset
+from internal_menu_selection.management.commands.bench_serializers import SERIALIZERS
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database and compare the time to render large lists with DRF's JSONRenderer, "
+            "the orjson renderer and the MessagePack renderer")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows of every rendered list")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs of every renderer, the best one is kept")
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError("--rows and --repeat must be at least 1")
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed: ORJSONRenderer falls back to JSONRenderer"))
+        renderer_classes = [renderers.ORJSONRenderer]
+        if renderers.msgpack is not None:
+            renderer_classes.append(renderers.MessagePackRenderer)
+        else:
+            self.stdout.write(self.style.WARNING("msgpack is not installed: MessagePackRenderer is not measured"))
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed_dataset(restaurants=options['rows'], food_items=1, days=0, employees=options['rows'])
+            results = {}
+            for serializer_class in SERIALIZERS:
+                queryset = serializer_class.Meta.model._default_manager.order_by('-id')[:options['rows']]
+                data = {'next': None, 'previous': None, 'results': serializer_class(queryset, many=True).data}
+                results[serializer_class.__name__] = measure_renderers(data, renderer_classes, options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'list':<22} {'renderer':<21} {'ms':>9} {'bytes':>10} {'speedup':>8}  output")
+        different = []
+        for name, renderer_results in results.items():
+            for renderer_name, result in renderer_results.items():
+                if result['identical'] is None:
+                    output = ''
+                elif result['identical']:
+                    output = 'identical'
+                else:
+                    output = 'DIFFERENT'
+                    different.append(f"{renderer_name} of {name}")
+                self.stdout.write(f"{name:<22} {renderer_name:<21} {result['ms']:>9.2f} {result['bytes']:>10} "
+                                  f"{result['speedup']:>7.2f}x  {output}")
+        if different:
+            raise CommandError(f"The JSON differs from JSONRenderer's: {', '.join(different)}")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment
+
+from internal_menu_selection.benchmark import measure_serializers, seed_dataset
+from restaurant.serializers import FoodItemSerializer, RestaurantSerializer
+from users.serializers import EmployeeSerializer
+
+SERIALIZERS = [FoodItemSerializer, EmployeeSerializer, RestaurantSerializer]
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database and compare the time to serialize large lists with the model "
+            "serializers and with their values() fast path")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows serialized by every serializer")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs of every serializer, the best one is kept")
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError("--rows and --repeat must be at least 1")
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed_dataset(restaurants=options['rows'], food_items=1, days=0, employees=options['rows'])
+            results = measure_serializers(SERIALIZERS, options['rows'], options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'serializer':<22} {'rows':>7} {'serializer ms':>14} {'fast ms':>9} {'speedup':>8}  JSON")
+        for name, result in results.items():
+            self.stdout.write(f"{name:<22} {result['rows']:>7} {result['serializer_ms']:>14.2f} "
+                              f"{result['fast_ms']:>9.2f} {result['speedup']:>7.2f}x  "
+                              f"{'identical' if result['identical'] else 'DIFFERENT'}")
+        different = [name for name, result in results.items() if not result['identical']]
+        if different:
+            raise CommandError(f"The fast path changes the JSON of {', '.join(different)}")
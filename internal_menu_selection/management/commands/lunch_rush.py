@@ -0,0 +1,105 @@
+import asyncio
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, override_settings
+from django.utils import timezone
+
+from internal_menu_selection.benchmark import PASSWORD, seed_dataset
+from internal_menu_selection.simulation import DatabaseSampler, check_invariants, simulate, \
+    terminate_other_sessions
+
+FAST_PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class Command(BaseCommand):
+    help = ("Simulate the lunch rush in a throwaway test database: concurrent employees log in, fetch the today "
+            "board, vote and poll the results through in-process server workers, then check the votes")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1500, help="Concurrent employees")
+        parser.add_argument('--restaurants', type=int, default=20)
+        parser.add_argument('--days', type=int, default=30, help="Past days of menus and votes seeded first")
+        parser.add_argument('--ramp', type=float, default=2.0, help="Seconds over which the users arrive")
+        parser.add_argument('--polls', type=int, default=3, help="Result polls of every user after voting")
+        parser.add_argument('--think', type=float, default=1.0, help="Longest pause of a user between two steps")
+        parser.add_argument('--workers', type=int, default=50,
+                            help="Threads serving the sync views, each with its own database connection, like the "
+                                 "workers of a server; async views are served on the event loop")
+        parser.add_argument('--sample-interval', type=float, default=0.1,
+                            help="Seconds between two samples of the database activity")
+        parser.add_argument('--fast-passwords', action='store_true',
+                            help="Hash the passwords with MD5 to take the login hashing cost out of the run")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['restaurants'] < 1 or options['workers'] < 1:
+            raise CommandError("The simulation needs at least 1 user, 1 restaurant and 1 worker")
+        # The rush is before the voting cutoff, whatever the time of the run
+        overrides = {'VOTING_CUTOFF': '23:59:59.999999'}
+        if options['fast_passwords']:
+            overrides['PASSWORD_HASHERS'] = FAST_PASSWORD_HASHERS
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(**overrides):
+                self.run(options)
+        finally:
+            # The throwaway database can only be dropped once no session uses it
+            terminate_other_sessions()
+            connection.close()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        from internal_menu_selection.asgi import application
+
+        dataset = seed_dataset(restaurants=options['restaurants'], food_items=5, days=options['days'],
+                               employees=options['users'], seed=options['seed'])
+        menu_ids = [menu_obj.id for menu_obj in dataset['today_menus']]
+        connection.close()
+
+        sampler = DatabaseSampler(options['sample_interval'])
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            recorder, accepted_votes = asyncio.run(simulate(
+                application, dataset['employees'], menu_ids, PASSWORD, ramp=options['ramp'], polls=options['polls'],
+                think=options['think'], workers=options['workers'], seed=options['seed']))
+        finally:
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+
+        steps = recorder.summary()
+        total = sum(step['requests'] for step in steps.values())
+        self.stdout.write(f"{options['users']} users sent {total} requests in {elapsed:.1f}s "
+                          f"({total / elapsed:.1f} req/s) to {options['workers']} workers")
+        self.stdout.write(f"{'step':<10} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  "
+                          f"statuses")
+        for name, step in steps.items():
+            latencies = " ".join(f"{step[key]:>9.2f}" if step[key] is not None else f"{'-':>9}"
+                                 for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+            self.stdout.write(f"{name:<10} {step['requests']:>9} {step['errors']:>7} {latencies}  "
+                              f"{step['statuses']}")
+
+        database = sampler.summary()
+        self.stdout.write(f"Database connections: peak {database['peak_connections']} of "
+                          f"{database['max_connections']} (mean {database['mean_connections']}), "
+                          f"peak active {database['peak_active']}, "
+                          f"peak idle in transaction {database['peak_idle_in_transaction']}")
+        self.stdout.write(f"Lock waits: peak {database['peak_lock_waits']} sessions "
+                          f"(mean {database['mean_lock_waits']}), deadlocks {database['deadlocks']}")
+
+        today = timezone.localdate()
+        failed = []
+        for invariant, passed, detail in check_invariants(today, today - datetime.timedelta(days=options['days']),
+                                                          accepted_votes):
+            line = f"{invariant}: {'ok' if passed else 'FAILED'} ({detail})"
+            self.stdout.write(self.style.SUCCESS(line) if passed else self.style.ERROR(line))
+            if not passed:
+                failed.append(invariant)
+        if failed:
+            raise CommandError(f"Invariants failed: {', '.join(failed)}")
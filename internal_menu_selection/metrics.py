@@ -0,0 +1,278 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': None,
+    'WRITE_INTERVAL': 5,
+    'LATENCY_BUCKETS': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    'QUERY_BUCKETS': [0, 1, 2, 3, 5, 10, 20, 50, 100],
+    'SIZE_BUCKETS': [256, 1024, 4096, 16384, 65536, 262144, 1048576],
+}
+
+# name: (metric, help, buckets setting)
+HISTOGRAMS = {
+    'latency': ('django_http_request_duration_seconds', "Time to answer the request", 'LATENCY_BUCKETS'),
+    'queries': ('django_http_request_queries', "SQL queries run by the request", 'QUERY_BUCKETS'),
+    'size': ('django_http_response_size_bytes', "Size of the response body", 'SIZE_BUCKETS'),
+}
+
+# name: (metric, help)
+COUNTERS = {
+    'db_seconds': ('django_http_request_db_seconds_total', "Time spent running the SQL queries of the requests"),
+    'serialization_seconds': ('django_http_response_serialization_seconds_total',
+                              "Time spent rendering the response bodies"),
+}
+
+
+def metrics_settings():
+    return {**DEFAULT_METRICS, **getattr(settings, 'METRICS', {})}
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def merge(totals, key, stats):
+    total = totals.get(key)
+    if total is None:
+        totals[key] = {name: list(value) if isinstance(value, list) else value for name, value in stats.items()}
+        return
+    for name, value in stats.items():
+        if isinstance(value, list):
+            if len(value) == len(total[name]):
+                total[name] = [left + right for left, right in zip(total[name], value)]
+        else:
+            total[name] += value
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting the queries of a request and the time spent running them
+    """
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsRegistry:
+    """
+    Per route and method statistics of the requests served by this process.
+
+    Every thread writes to its own shard without locking; the shards are only summed when the metrics are
+    exported. The shard of a thread is folded into `retired`, under the lock, once the thread is gone, so threads
+    started per connection do not pile up shards. In multiprocess mode every process also writes its totals to `<MULTIPROCESS_DIR>/metrics-<pid>.json`
+    at most every WRITE_INTERVAL seconds, and the export adds up the files of all the processes.
+    """
+
+    def __init__(self, buckets, multiprocess_dir=None, write_interval=5):
+        self.buckets = buckets
+        self.multiprocess_dir = multiprocess_dir
+        self.write_interval = write_interval
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        # id -> shard of the live threads
+        self.shards = {}
+        self.retired = {}
+        self.next_write = 0
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards[id(shard)] = shard
+            weakref.finalize(threading.current_thread(), self.retire, shard).atexit = False
+            return shard
+
+    def retire(self, shard):
+        with self.lock:
+            del self.shards[id(shard)]
+            for key, stats in shard.items():
+                merge(self.retired, key, stats)
+
+    def new_stats(self):
+        stats = {}
+        for name in HISTOGRAMS:
+            stats[name] = [0] * (len(self.buckets[name]) + 1)
+            stats[f"{name}_sum"] = 0
+        for name in COUNTERS:
+            stats[name] = 0.0
+        return stats
+
+    def add(self, stats, name, value):
+        stats[name][bisect_left(self.buckets[name], value)] += 1
+        stats[f"{name}_sum"] += value
+
+    def observe(self, route, method, latency, queries=None, db_seconds=0.0, serialization_seconds=0.0, size=None):
+        shard = self.shard()
+        stats = shard.get((route, method))
+        if stats is None:
+            stats = shard[(route, method)] = self.new_stats()
+        self.add(stats, 'latency', latency)
+        if queries is not None:
+            self.add(stats, 'queries', queries)
+            stats['db_seconds'] += db_seconds
+        if size is not None:
+            self.add(stats, 'size', size)
+        stats['serialization_seconds'] += serialization_seconds
+        if self.multiprocess_dir and time.monotonic() >= self.next_write:
+            self.write()
+
+    def totals(self):
+        totals = {}
+        with self.lock:
+            shards = list(self.shards.values())
+            for key, stats in self.retired.items():
+                merge(totals, key, stats)
+        for shard in shards:
+            for key, stats in list(shard.items()):
+                merge(totals, key, stats)
+        return totals
+
+    def path(self, pid):
+        return os.path.join(self.multiprocess_dir, f"metrics-{pid}.json")
+
+    def write(self):
+        if not self.write_lock.acquire(blocking=False):
+            return
+        try:
+            self.next_write = time.monotonic() + self.write_interval
+            path = self.path(os.getpid())
+            with open(f"{path}.tmp", 'w') as metrics_file:
+                json.dump([[route, method, stats] for (route, method), stats in self.totals().items()], metrics_file)
+            os.replace(f"{path}.tmp", path)
+        finally:
+            self.write_lock.release()
+
+    def collect(self):
+        """
+        Return the statistics of this process, or of all the processes in multiprocess mode
+        """
+        totals = self.totals()
+        if not self.multiprocess_dir:
+            return totals
+        own = self.path(os.getpid())
+        for path in glob.glob(self.path('*')):
+            if path == own:
+                continue
+            try:
+                with open(path) as metrics_file:
+                    rows = json.load(metrics_file)
+            except (OSError, ValueError):
+                continue
+            for route, method, stats in rows:
+                merge(totals, (route, method), stats)
+        return totals
+
+    def render(self):
+        """
+        Export the statistics in the Prometheus text format
+        """
+        totals = sorted(self.collect().items())
+        lines = []
+        for name, (metric, description, _) in HISTOGRAMS.items():
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} histogram"]
+            bounds = [format_value(bound) for bound in self.buckets[name]] + ['+Inf']
+            for (route, method), stats in totals:
+                labels = f'route="{escape_label(route)}",method="{escape_label(method)}"'
+                cumulative = 0
+                for bound, count in zip(bounds, stats[name]):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {format_value(stats[f'{name}_sum'])}")
+                lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+        for name, (metric, description) in COUNTERS.items():
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            for (route, method), stats in totals:
+                labels = f'route="{escape_label(route)}",method="{escape_label(method)}"'
+                lines.append(f"{metric}{{{labels}}} {format_value(stats[name])}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics_registry = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    global _metrics_registry
+    with _metrics_registry_lock:
+        if _metrics_registry is None:
+            config = metrics_settings()
+            _metrics_registry = MetricsRegistry(
+                {name: config[setting] for name, (_, _, setting) in HISTOGRAMS.items()},
+                config['MULTIPROCESS_DIR'], config['WRITE_INTERVAL'])
+            if config['MULTIPROCESS_DIR']:
+                atexit.register(_metrics_registry.write)
+        return _metrics_registry
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the latency, SQL queries, database time, rendering time and response size of every request by route.
+
+    Queries are counted with a database execute wrapper on the connection of the request thread. The middleware is
+    synchronous so that, under ASGI too, Django runs it on the thread of the sync views, and async views run their
+    queries through sync_to_async on that same thread.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        if not metrics_settings()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.registry = get_metrics_registry()
+
+    def __call__(self, request):
+        queries = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_serialization_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, latency, queries):
+        resolver_match = getattr(request, 'resolver_match', None)
+        self.registry.observe(
+            getattr(resolver_match, 'url_name', None) or 'unmatched', request.method, latency,
+            queries=queries.count, db_seconds=queries.seconds,
+            serialization_seconds=getattr(request, '_metrics_serialization_seconds', 0.0),
+            size=None if response.streaming else len(response.content))
@@ -1,5 +1,61 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from collections import OrderedDict
+
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
 
 
 class CustomPagination(PageNumberPagination):
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset pagination on an indexed ordering: pages cost neither a COUNT(*) nor an OFFSET scan.
+    Add `include_total=true` to get the planner's estimate of the number of rows instead of an exact count.
+    Orderings on a column that is not unique, e.g. `?ordering=name`, get `id` as a tiebreaker, so the rows sharing a
+    name keep one order from page to page.
+    """
+    ordering = '-id'
+    page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    include_total_query_param = 'include_total'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.approximate_total = None
+        page = super().paginate_queryset(queryset, request, view)
+        if page is not None and request.query_params.get(self.include_total_query_param) == 'true':
+            self.approximate_total = self.get_approximate_total(queryset)
+        return page
+
+    @staticmethod
+    def get_approximate_total(queryset):
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.approximate_total is not None:
+            response['approximate_total'] = self.approximate_total
+        response['results'] = data
+        return Response(response)
+
+
+class DailyResultPagination(CustomCursorPagination):
+    ordering = '-service_date'
+    page_size = 30
@@ -0,0 +1,116 @@
+"""
+Maximum number of SQL queries of every endpoint, checked by the tests of every app with `query_budget`:
+
+    with query_budget('list_register_restaurant', 'GET', rows=5):
+        self.client.get(reverse('list_register_restaurant'))
+
+A budget allows `base` queries plus `per_row` queries for every row the request reads or writes, so an endpoint
+whose queries grow with the number of rows needs a non-zero `per_row` to pass with several rows.
+"""
+from collections import namedtuple
+from contextlib import ContextDecorator
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from users.permission_index import get_permission_index
+
+
+class QueryBudget(namedtuple('QueryBudget', ['base', 'per_row'], defaults=[0])):
+
+    def limit(self, rows):
+        return self.base + self.per_row * rows
+
+
+# (url name, method): budget
+QUERY_BUDGETS = {
+    # roles
+    ('List_Create_Role', 'GET'): QueryBudget(1),
+    ('List_Create_Role', 'POST'): QueryBudget(4),
+    ('Retrieve_Update_Delete_Role', 'GET'): QueryBudget(1),
+    ('Retrieve_Update_Delete_Role', 'PUT'): QueryBudget(6),
+    ('Retrieve_Update_Delete_Role', 'PATCH'): QueryBudget(6),
+    ('Retrieve_Update_Delete_Role', 'DELETE'): QueryBudget(7),
+    # users
+    ('register_employee', 'POST'): QueryBudget(6),
+    ('bulk_register_employee', 'POST'): QueryBudget(5),
+    ('list_employee', 'GET'): QueryBudget(1),
+    ('retrieve_update_delete_employee', 'GET'): QueryBudget(1),
+    ('retrieve_update_delete_employee', 'PUT'): QueryBudget(8),
+    ('retrieve_update_delete_employee', 'PATCH'): QueryBudget(6),
+    ('retrieve_update_delete_employee', 'DELETE'): QueryBudget(7),
+    ('token_obtain_pair', 'POST'): QueryBudget(1),
+    ('async_login', 'POST'): QueryBudget(1),
+    ('token_refresh', 'POST'): QueryBudget(0),
+    # restaurant
+    # The fast list path reads the owner usernames with a join
+    ('list_register_restaurant', 'GET'): QueryBudget(1),
+    ('list_register_restaurant', 'POST'): QueryBudget(1),
+    ('retrieve_update_delete_restaurant', 'GET'): QueryBudget(2),
+    ('retrieve_update_delete_restaurant', 'PUT'): QueryBudget(3),
+    ('retrieve_update_delete_restaurant', 'PATCH'): QueryBudget(3),
+    ('retrieve_update_delete_restaurant', 'DELETE'): QueryBudget(5),
+    ('list_add_food_item', 'GET'): QueryBudget(1),
+    ('list_add_food_item', 'POST'): QueryBudget(4),
+    # The food item is read with its restaurant for IsRestaurantOwner
+    ('retrieve_update_food_item', 'GET'): QueryBudget(1),
+    ('retrieve_update_food_item', 'PUT'): QueryBudget(3),
+    ('retrieve_update_food_item', 'PATCH'): QueryBudget(2),
+    # The food items of the menus are prefetched in one query
+    ('list_add_menu', 'GET'): QueryBudget(2),
+    ('list_add_menu', 'POST'): QueryBudget(7),
+    ('batch_add_menu', 'POST'): QueryBudget(7),
+    ('retrieve_update_menu', 'GET'): QueryBudget(2),
+    ('retrieve_update_menu', 'PUT'): QueryBudget(10),
+    ('retrieve_update_menu', 'PATCH'): QueryBudget(3),
+    ('clone_menu', 'POST'): QueryBudget(5),
+    ('list_today_menu', 'GET'): QueryBudget(2),
+    ('today_board', 'GET'): QueryBudget(2),
+    # vote
+    ('Add_Vote', 'POST'): QueryBudget(4),
+    ('List_Vote', 'GET'): QueryBudget(1),
+    ('List_Result_Vote', 'GET'): QueryBudget(2),
+    ('List_Daily_Result', 'GET'): QueryBudget(1),
+    # project
+    ('response_cache_stats', 'GET'): QueryBudget(0),
+    ('metrics', 'GET'): QueryBudget(0),
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail with the captured SQL when the block runs more queries than the budget of an endpoint for `rows` rows.
+
+    The permission index is refreshed first, as it is between the requests of a running server, so only the
+    queries of the request itself are counted.
+    """
+
+    def __init__(self, url_name, method='GET', rows=0, using='default'):
+        self.budget = QUERY_BUDGETS[(url_name, method)]
+        self.name = f"{method} {url_name}"
+        self.rows = rows
+        self.using = using
+
+    def __enter__(self):
+        get_permission_index().refresh()
+        self.queries = CaptureQueriesContext(connections[self.using])
+        self.queries.__enter__()
+        return self.queries
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.queries.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        # Savepoints are left out: the test case transaction turns the transactions of the view into savepoints
+        captured = [query['sql'] for query in self.queries.captured_queries
+                    if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'))]
+        limit = self.budget.limit(self.rows)
+        if len(captured) > limit:
+            listing = "\n".join(f"{number}. {sql}" for number, sql in enumerate(captured, start=1))
+            raise QueryBudgetExceeded(f"{self.name} ran {len(captured)} queries for {self.rows} rows, "
+                                      f"over its budget of {limit}:\n{listing}")
+        return False
@@ -0,0 +1,237 @@
+"""
+Query plans derived from what a view reads: the fields of its serializer and the attributes its object permissions
+compare. `QueryPlanMixin` applies the plan to the queryset of a generic view:
+
+    class MenuRetrieveUpdateView(QueryPlanMixin, generics.RetrieveUpdateAPIView):
+        serializer_class = MenuSerializer
+        permission_classes = [IsAuthenticated, IsAuthorizedForModel, IsRestaurantOwner]
+
+selects the restaurant with the menu for `IsRestaurantOwner`, prefetches the ids of the food items of the
+serializer and, for reads, loads only the columns these need. Permission classes declare the lookups they read
+in `query_paths`, e.g. `['restaurant__owner']`.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from internal_menu_selection.batch_loader import BatchedRelatedField
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_PLANNING = {
+    'ENABLED': True,
+    'DEBUG': False,
+}
+
+
+def query_planning_settings():
+    return {**DEFAULT_QUERY_PLANNING, **getattr(settings, 'QUERY_PLANNING', {})}
+
+
+class QueryPlan:
+    """
+    select_related and prefetch_related lookups and the fields to load of a queryset. `only` is None when some
+    value is read from an attribute the plan cannot see through, so every field has to be loaded.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = set()
+        self.prefetch_related = {}
+        self.only = set()
+
+    def add_only(self, lookup):
+        if self.only is not None:
+            self.only.add(lookup)
+
+    def add_select_related(self, lookup):
+        self.select_related.add(lookup)
+        self.add_only(lookup)
+
+    def add_prefetch(self, lookup, queryset=None):
+        self.prefetch_related[lookup] = queryset
+
+    def add_path(self, names, prefix=''):
+        """
+        Plan reading the attribute path `names` (e.g. ['restaurant', 'owner']) of the rows
+        """
+        model = self.model
+        for index, name in enumerate(names):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                self.only = None
+                return None
+            lookup = f"{prefix}{name}"
+            last = index == len(names) - 1
+            if field.many_to_many or field.one_to_many:
+                self.add_prefetch(lookup)
+                return field
+            if field.is_relation and not last:
+                self.add_select_related(lookup)
+                model = field.related_model
+                prefix = f"{lookup}__"
+                continue
+            self.add_only(lookup)
+            return field
+        return None
+
+    def add_serializer(self, serializer, prefix=''):
+        """
+        Plan the fields read by a model serializer of the rows at `prefix`
+        """
+        for field in serializer._readable_fields:
+            if isinstance(field, BatchedRelatedField):
+                self.add_only(f"{prefix}{field.relation}")
+            elif field.source == '*':
+                if isinstance(field, serializers.ModelSerializer):
+                    self.add_serializer(field, prefix)
+                else:
+                    self.only = None
+            elif isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                self.add_many(field, prefix)
+            elif isinstance(field, serializers.ModelSerializer):
+                if self.add_relation(field.source_attrs, prefix) is not None:
+                    self.add_serializer(field, f"{prefix}{'__'.join(field.source_attrs)}__")
+            elif isinstance(field, serializers.RelatedField) and not isinstance(
+                    field, serializers.PrimaryKeyRelatedField):
+                self.add_relation(field.source_attrs, prefix)
+                self.only = None
+            else:
+                self.add_path(field.source_attrs, prefix)
+
+    def add_relation(self, names, prefix=''):
+        """
+        Select the related object at the end of the foreign key path `names`
+        """
+        model = self.model
+        field = None
+        for name in names:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not (field.many_to_one or field.one_to_one):
+                self.only = None
+                return None
+            lookup = f"{prefix}{name}"
+            self.add_select_related(lookup)
+            model = field.related_model
+            prefix = f"{lookup}__"
+        return field
+
+    def add_many(self, field, prefix=''):
+        """
+        Prefetch the related objects of a many-to-many or reverse foreign key, loading only what the child
+        serializer or related field reads
+        """
+        model_field = self.add_path(field.source_attrs, prefix)
+        if model_field is None or not (model_field.many_to_many or model_field.one_to_many):
+            return
+        lookup = f"{prefix}{'__'.join(field.source_attrs)}"
+        child_plan = QueryPlan(model_field.related_model)
+        if isinstance(field, serializers.ListSerializer):
+            child_plan.add_serializer(field.child)
+        elif isinstance(field.child_relation, serializers.PrimaryKeyRelatedField):
+            child_plan.add_only(model_field.related_model._meta.pk.name)
+        else:
+            child_plan.only = None
+        if model_field.one_to_many:
+            # The rows are matched to their parent by their foreign key
+            child_plan.add_only(model_field.field.name)
+        self.add_prefetch(lookup, child_plan.apply(model_field.related_model._default_manager.all()))
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*(
+                Prefetch(lookup, queryset=prefetch_queryset) if prefetch_queryset is not None else lookup
+                for lookup, prefetch_queryset in sorted(self.prefetch_related.items())))
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+    def describe(self):
+        only = ', '.join(sorted(self.only)) if self.only is not None else 'all fields'
+        return (f"select_related({', '.join(sorted(self.select_related))}) "
+                f"prefetch_related({', '.join(sorted(self.prefetch_related))}) only({only})")
+
+
+def ordering_field_names(view, model):
+    """
+    Names of the model fields a list of the view may be ordered by
+    """
+    paginator = getattr(view, 'paginator', None)
+    names = list(getattr(view, 'ordering_fields', None) or [])
+    for ordering in (getattr(view, 'ordering', None), getattr(paginator, 'ordering', None)):
+        names.extend([ordering] if isinstance(ordering, str) else ordering or [])
+    fields = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name.lstrip('-'))
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and field.name not in fields:
+            fields.append(field.name)
+    return fields
+
+
+def plan_view(view, model, detail, safe):
+    """
+    Plan of the queryset of a view: the fields of its model serializer, the ordering fields of its lists and, for
+    detail views, the lookups of its object permissions. Writes only get the select_related lookups, so the
+    view and the serializer may change the object and its relations freely.
+    """
+    plan = QueryPlan(model)
+    serializer = view.get_serializer()
+    if isinstance(serializer, serializers.ModelSerializer) and serializer.Meta.model is model:
+        plan.add_serializer(serializer)
+    else:
+        plan.only = None
+    if detail:
+        for permission in view.get_permissions():
+            for lookup in getattr(permission, 'query_paths', []):
+                plan.add_path(lookup.split('__'))
+    else:
+        # Cursor pagination reads the ordering field of the last row of a page
+        for name in ordering_field_names(view, model):
+            plan.add_only(name)
+    if not safe:
+        plan.prefetch_related = {}
+        plan.only = None
+    return plan
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+class QueryPlanMixin:
+    """
+    Generic view mixin applying the query plan of the view, computed once per view class, serializer class and
+    kind of request, to its queryset
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        config = query_planning_settings()
+        if not config['ENABLED']:
+            return queryset
+        detail = (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+        safe = self.request.method in SAFE_METHODS
+        key = (type(self), self.get_serializer_class(), detail, safe)
+        plan = _plans.get(key)
+        if plan is None:
+            plan = plan_view(self, queryset.model, detail, safe)
+            with _plans_lock:
+                _plans[key] = plan
+            if config['DEBUG']:
+                logger.info("Query plan of %s %s%s: %s", type(self).__name__, self.request.method,
+                            " (detail)" if detail else "", plan.describe())
+        return plan.apply(queryset)
@@ -0,0 +1,73 @@
+"""
+Renderers negotiated from the Accept header, registered in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] and
+overridable per view with `renderer_classes`:
+
+- `ORJSONRenderer` renders `application/json` with orjson, to the same bytes as DRF's `JSONRenderer` but for
+  floats, which it falls back to when orjson is not installed, cannot encode the data or
+  JSON_RENDERING['ORJSON_FLOATS'] is false.
+- `MessagePackRenderer` renders `application/msgpack` for internal clients when msgpack is installed.
+
+Both convert dates, decimals and the other non-JSON types with DRF's encoder, like `JSONRenderer`.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+DEFAULT_JSON_RENDERING = {
+    'ORJSON_FLOATS': True,
+}
+
+
+def json_rendering_settings():
+    return {**DEFAULT_JSON_RENDERING, **getattr(settings, 'JSON_RENDERING', {})}
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, in one pass over the data. Floats have the same values but orjson's notation:
+    below 1e-4 and from 1e16 they are written 0.00001 and 1e16 where json writes 1e-05 and 1e+16, and non-finite
+    floats, which JSONRenderer refuses, are written null. Clients needing json's notation turn
+    JSON_RENDERING['ORJSON_FLOATS'] off, which renders everything with JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not json_rendering_settings()['ORJSON_FLOATS'] or self.ensure_ascii or not self.compact \
+                or data is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits or non-string keys, left to json to encode or reject
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, so the output stays a strict javascript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer of MessagePack, with the values JSON has no type for converted like JSONRenderer does
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured("MessagePackRenderer needs the msgpack package")
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from users.shared_state import warn_if_local
+
+DEFAULT_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+}
+
+
+def response_cache_settings():
+    return {**DEFAULT_RESPONSE_CACHE, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def version_key(model):
+    return f"response:version:{model._meta.label_lower}"
+
+
+class ResponseCache:
+    """
+    Cache of the data of read endpoints, shared by the users of a role.
+
+    Every entry records a version token of each model its data was read from. A write to one of these models
+    replaces the model's token, so the entries built before it no longer match and are evicted when read. The
+    tokens only reach the processes sharing the cache: with a cache local to each process, the others keep serving
+    their entries until they expire, which is logged as a warning when the cache is created.
+    Hits, misses and evictions are counted per process.
+    """
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, view, request):
+        url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()[:32]
+        role_id = getattr(request.user, 'role_id', None)
+        return f"response:{view.__class__.__name__}:{role_id}:{view.get_cache_key_suffix()}:{url}"
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key, models):
+        """
+        Return the cached data of `key` or None, and the current versions of `models` to store a fresh entry with
+        """
+        version_keys = {version_key(model): model for model in models}
+        cached = self.cache.get_many([key, *version_keys])
+        versions = {}
+        for name in version_keys:
+            if name not in cached:
+                self.cache.add(name, uuid.uuid4().hex, timeout=None)
+                cached[name] = self.cache.get(name)
+            versions[name] = cached[name]
+
+        entry = cached.get(key)
+        if entry is not None and entry['versions'] == versions:
+            self.count('hits')
+            return entry['data'], versions
+        self.count('evictions' if entry is not None else 'misses')
+        if entry is not None:
+            self.cache.delete(key)
+        return None, versions
+
+    def set(self, key, data, versions):
+        self.cache.set(key, {'data': data, 'versions': versions}, self.timeout)
+
+    def respond(self, view, request, build):
+        """
+        Serve the response of a read endpoint from the cache, or build it with `build` and cache it when successful
+        """
+        key = self.key(view, request)
+        data, versions = self.get(key, view.cache_models)
+        if data is not None:
+            return Response(data)
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            self.set(key, response.data, versions)
+        return response
+
+    def invalidate(self, *models):
+        self.cache.set_many({version_key(model): uuid.uuid4().hex for model in models}, timeout=None)
+
+    def stats(self):
+        with self.lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses + evictions
+        return {
+            'backend': self.cache.__class__.__name__,
+            'timeout': self.timeout,
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            config = response_cache_settings()
+            warn_if_local("The invalidation of cached responses", config['CACHE'], "RESPONSE_CACHE['CACHE']")
+            _response_cache = ResponseCache(config['CACHE'], config['TIMEOUT'])
+        return _response_cache
+
+
+def invalidate_responses(*models):
+    """
+    Evict the cached responses read from `models` once the current transaction commits
+    """
+    transaction.on_commit(lambda: get_response_cache().invalidate(*models))
+
+
+class CachedResponseMixin:
+    """
+    Serve GET requests of a view from the response cache. `cache_models` lists every model the response is read
+    from; the permissions of the caller are still checked on every request.
+    """
+    cache_models = ()
+
+    def get_cache_key_suffix(self):
+        return ''
+
+    def get(self, request, *args, **kwargs):
+        if not response_cache_settings()['ENABLED']:
+            return super().get(request, *args, **kwargs)
+        return get_response_cache().respond(self, request, lambda: super(CachedResponseMixin, self).get(
+            request, *args, **kwargs))
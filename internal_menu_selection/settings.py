@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'internal_menu_selection',
     'roles',
     'users',
     'restaurant',
@@ -50,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'internal_menu_selection.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -94,6 +97,70 @@ DATABASES = {
    }
 }
 
+# Cache shared by the processes serving the API, e.g. memcached or redis in production
+# https://docs.djangoproject.com/en/4.0/ref/settings/#caches
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+    # Permission version stamp and token revocations, see users.shared_state: it must be shared by every process and
+    # never evict live entries, e.g. redis with maxmemory-policy noeviction. The default only serves one process, where
+    # StatelessJWTAuthentication loads the user of every request from the database: the users.E001 check stops the
+    # management commands on it outside DEBUG (users.W001 warning with DEBUG).
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'shared'),
+        'TIMEOUT': None,
+    },
+}
+
+SHARED_STATE = {
+    'CACHE': 'shared',
+}
+
+# Cached responses of the list endpoints, shared by the users of a role and evicted by writes to their models
+RESPONSE_CACHE = {
+    'ENABLED': os.getenv('RESPONSE_CACHE_ENABLED', 'true') == 'true',
+    'CACHE': 'default',
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300)),
+}
+
+# Request metrics exported at /metrics; with several worker processes set MULTIPROCESS_DIR to a directory shared by
+# them, where every process writes its totals at most every WRITE_INTERVAL seconds
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'true') == 'true',
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROCESS_DIR') or None,
+    'WRITE_INTERVAL': 5,
+}
+
+# select_related/prefetch_related/only plans of the restaurant views, derived from their serializers and object
+# permissions; with DEBUG every plan is logged the first time it is used
+QUERY_PLANNING = {
+    'ENABLED': os.getenv('QUERY_PLANNING_ENABLED', 'true') == 'true',
+    'DEBUG': os.getenv('QUERY_PLANNING_DEBUG', 'false') == 'true',
+}
+
+# List GETs of food items, restaurants and employees read values() rows and build the serializer's data without
+# model instances
+FAST_SERIALIZERS = {
+    'ENABLED': os.getenv('FAST_SERIALIZERS_ENABLED', 'true') == 'true',
+}
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.IndexedModelBackend',
+]
+
+# In-process index of role and user permissions; other processes' changes are picked up through a version
+# stamp in the cache, checked at most every VERSION_CHECK_INTERVAL seconds
+PERMISSION_INDEX = {
+    'VERSION_CHECK_INTERVAL': 1.0,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -112,12 +179,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# JSON is rendered with orjson (the same bytes as DRF's JSONRenderer, which it falls back to without orjson, but for
+# the notation of floats below 1e-4, from 1e16 or non-finite, see JSON_RENDERING), and MessagePack for clients
+# sending `Accept: application/msgpack` when msgpack is installed
+RENDERER_CLASSES = [
+    'internal_menu_selection.renderers.ORJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+]
+if find_spec('msgpack'):
+    RENDERER_CLASSES.append('internal_menu_selection.renderers.MessagePackRenderer')
+
+# ORJSON_FLOATS: write floats in orjson's notation (0.00001, 1e16, null for NaN) instead of rendering with
+# JSONRenderer, which writes 1e-05, 1e+16 and refuses NaN
+JSON_RENDERING = {
+    'ORJSON_FLOATS': True,
+}
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': RENDERER_CLASSES,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'internal_menu_selection.pagination.CustomPagination',
 }
@@ -127,7 +211,50 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.authentication.ClaimsTokenObtainPairSerializer',
+}
+
+# Async login: password hashes run on HASH_WORKERS threads with at most MAX_QUEUE logins waiting, further logins
+# are answered 503 with a Retry-After of RETRY_AFTER seconds; last_login is written every LAST_LOGIN_FLUSH_INTERVAL
+# seconds for all the logins in between
+LOGIN = {
+    'HASH_WORKERS': int(os.getenv('LOGIN_HASH_WORKERS', 4)),
+    'MAX_QUEUE': int(os.getenv('LOGIN_MAX_QUEUE', 32)),
+    'RETRY_AFTER': 1,
+    'LAST_LOGIN_FLUSH_INTERVAL': 5,
+}
+
+# Maximum number of menus published by one batch request
+MENU_BATCH_MAX_SIZE = 50
+
+# Bulk employee registration: largest batch accepted by the API and number of threads hashing the passwords, shared
+# by the requests of the process (defaults to the number of CPUs)
+EMPLOYEE_ONBOARDING = {
+    'MAX_BATCH_SIZE': 500,
+    'HASH_WORKERS': int(os.getenv('EMPLOYEE_HASH_WORKERS', 0)) or None,
+}
+
+# Vote ingestion: 'sync' records every vote in its own request, 'buffered' queues accepted votes
+# in memory and writes them in batches of BATCH_SIZE or every FLUSH_INTERVAL seconds. A batch the database refuses
+# is retried RETRIES times, after RETRY_BACKOFF seconds doubled every time, then appended to SPILL_PATH
+VOTE_INGESTION = {
+    'MODE': os.getenv('VOTE_INGESTION_MODE', 'sync'),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0.5,
+    'RETRIES': 3,
+    'RETRY_BACKOFF': 0.5,
+    'SPILL_PATH': os.getenv('VOTE_SPILL_PATH', str(BASE_DIR / 'vote-spill.jsonl')),
+}
+
+# Local time of the day after which the vote result of the day can be finalized
+VOTING_CUTOFF = os.getenv('VOTING_CUTOFF', '12:00')
+
+# Live vote results stream served by the ASGI app
+VOTE_STREAM = {
+    'HEARTBEAT_INTERVAL': 15,
+    'HISTORY_SIZE': 1000,
+    'SUBSCRIBER_QUEUE_SIZE': 1000,
 }
 
 # Internationalization
@@ -0,0 +1,318 @@
+"""
+Lunch-rush simulation serving concurrent virtual users in-process, used by `python manage.py lunch_rush`.
+"""
+import asyncio
+import io
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.models import Count
+from django.urls import resolve
+from rest_framework.reverse import reverse
+
+from users.login import get_last_login_buffer
+from vote.ingestion import get_vote_buffer, is_buffered
+from vote.models import UserVote
+from vote.tally import rebuild_tallies
+
+# Statuses counted as a success of every step of the script
+EXPECTED_STATUSES = {
+    'login': {200},
+    'board': {200, 304},
+    'vote': {201, 202},
+    'results': {200, 404},
+}
+
+DATABASE_ACTIVITY_SQL = """
+    SELECT count(*),
+           count(*) FILTER (WHERE state = 'active'),
+           count(*) FILTER (WHERE state LIKE 'idle in transaction%'),
+           count(*) FILTER (WHERE wait_event_type = 'Lock')
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+DEADLOCKS_SQL = "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+
+TERMINATE_SESSIONS_SQL = """
+    SELECT count(pg_terminate_backend(pid))
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+
+class ServerClient:
+    """
+    Minimal HTTP client calling the application directly, without sockets, served like a deployment with `workers`
+    threads: async views by the ASGI application on the event loop, the other views by Django's WSGI handler on one
+    of the worker threads, each with its own database connection.
+
+    Django's ASGI handler would run every sync view on a single thread, one request at a time, so it cannot stand in
+    for the workers of a server.
+    """
+
+    def __init__(self, asgi_app, workers):
+        self.asgi_app = asgi_app
+        self.wsgi_app = WSGIHandler()
+        self.workers = ThreadPoolExecutor(workers, thread_name_prefix='lunch-rush-worker')
+        self.async_views = {}
+
+    def is_async(self, path):
+        if path not in self.async_views:
+            self.async_views[path] = asyncio.iscoroutinefunction(resolve(path).func)
+        return self.async_views[path]
+
+    async def request(self, method, path, data=None, headers=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        if self.is_async(path):
+            return await self.asgi_request(method, path, body, headers or {})
+        return await asyncio.get_running_loop().run_in_executor(self.workers, self.wsgi_request, method, path, body,
+                                                                headers or {})
+
+    def close(self):
+        self.workers.shutdown()
+
+    def wsgi_request(self, method, path, body, headers):
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': 'testserver',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers.items()},
+        }
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = {name.lower(): value for name, value in response_headers}
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            result.close()
+        return response['status'], response['headers'], content
+
+    async def asgi_request(self, method, path, body, headers):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode()),
+                        *((name.lower().encode(), value.encode()) for name, value in headers.items())],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        request_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        response = {'status': None, 'headers': {}, 'body': []}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = {name.decode().lower(): value.decode() for name, value in message['headers']}
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        try:
+            await self.asgi_app(scope, receive, send)
+        finally:
+            disconnected.set()
+        return response['status'], response['headers'], b''.join(response['body'])
+
+
+class StepStats:
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+
+class Recorder:
+    """
+    Latency and status of every request, by step of the script
+    """
+
+    def __init__(self):
+        self.steps = {step: StepStats() for step in EXPECTED_STATUSES}
+
+    async def timed(self, step, request):
+        start = time.perf_counter()
+        status, headers, body = await request
+        stats = self.steps[step]
+        stats.latencies.append(time.perf_counter() - start)
+        stats.statuses[status] += 1
+        if status not in EXPECTED_STATUSES[step]:
+            stats.errors += 1
+        return status, headers, body
+
+    def summary(self):
+        summary = {}
+        for step, stats in self.steps.items():
+            latencies = sorted(stats.latencies)
+            summary[step] = {
+                'requests': len(latencies),
+                'errors': stats.errors,
+                'statuses': dict(stats.statuses),
+                **{f"p{percent}_ms": round(percentile(latencies, percent) * 1000, 2) if latencies else None
+                   for percent in (50, 95, 99)},
+            }
+        return summary
+
+
+def percentile(sorted_values, percent):
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+class DatabaseSampler(threading.Thread):
+    """
+    Sample the connections of the other sessions to the database, the active ones, the ones idle in a transaction
+    and the ones waiting for a lock, every `interval` seconds
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='database-sampler', daemon=True)
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.samples = []
+        self.max_connections = None
+        self.deadlocks = None
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW max_connections")
+                self.max_connections = int(cursor.fetchone()[0])
+                cursor.execute(DEADLOCKS_SQL)
+                deadlocks = cursor.fetchone()[0]
+                while not self.stopping.wait(self.interval):
+                    cursor.execute(DATABASE_ACTIVITY_SQL)
+                    self.samples.append(cursor.fetchone())
+                cursor.execute(DEADLOCKS_SQL)
+                self.deadlocks = cursor.fetchone()[0] - deadlocks
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+    def summary(self):
+        summary = {'max_connections': self.max_connections, 'samples': len(self.samples), 'deadlocks': self.deadlocks}
+        for index, name in enumerate(['connections', 'active', 'idle_in_transaction', 'lock_waits']):
+            values = [sample[index] for sample in self.samples] or [0]
+            summary[f"peak_{name}"] = max(values)
+            summary[f"mean_{name}"] = round(sum(values) / len(values), 2)
+        return summary
+
+
+async def lunch_break(client, recorder, user, menu_ids, password, rng, ramp, polls, think):
+    """
+    Script of a virtual user: log in, fetch the today board, vote for one of today's menus and poll the results
+    """
+    await asyncio.sleep(rng.uniform(0, ramp))
+    while True:
+        status, headers, body = await recorder.timed('login', client.request(
+            'POST', reverse('async_login'), {"username": user.username, "password": password}))
+        if status != 503:
+            break
+        await asyncio.sleep(float(headers.get('retry-after', 1)))
+    if status != 200:
+        return False
+    authorization = {'Authorization': f"Bearer {json.loads(body)['access']}"}
+
+    await recorder.timed('board', client.request('GET', reverse('today_board'), headers=authorization))
+    await asyncio.sleep(rng.uniform(0, think))
+    status, _, _ = await recorder.timed('vote', client.request(
+        'POST', reverse('Add_Vote'), {"menu": rng.choice(menu_ids)}, headers=authorization))
+    for _ in range(polls):
+        await asyncio.sleep(rng.uniform(0, think))
+        await recorder.timed('results', client.request('GET', reverse('List_Result_Vote'), headers=authorization))
+    return status in EXPECTED_STATUSES['vote']
+
+
+async def simulate(app, users, menu_ids, password, ramp=2.0, polls=3, think=1.0, workers=50, seed=0):
+    """
+    Run the script of every user concurrently against the ASGI `app` and `workers` threads serving the sync views.
+    Returns the recorder and the number of accepted votes.
+    """
+    client = ServerClient(app, workers)
+    recorder = Recorder()
+    try:
+        accepted = await asyncio.gather(*(
+            lunch_break(client, recorder, user, menu_ids, password, random.Random(f"{seed}-{user.id}"), ramp,
+                        polls, think)
+            for user in users))
+    finally:
+        client.close()
+    return recorder, sum(accepted)
+
+
+def terminate_other_sessions():
+    """
+    Close the sessions other threads left open on the database, e.g. the ones Django's error reporting opens after
+    a request failed. Returns their number.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TERMINATE_SESSIONS_SQL)
+        return cursor.fetchone()[0]
+
+
+def check_invariants(service_date, first_date, accepted_votes):
+    """
+    Check that nobody voted twice a day, that the tallies match the raw votes and that every accepted vote of
+    `service_date` was recorded. Returns (invariant, passed, detail) rows.
+    """
+    # Drain the background writers first, so their pending rows are checked too
+    if is_buffered():
+        get_vote_buffer().stop()
+    get_last_login_buffer().stop()
+    duplicates = UserVote.objects.values('user_id', 'service_date').annotate(votes=Count('id')).filter(
+        votes__gt=1).count()
+    created, updated, deleted = rebuild_tallies(first_date, service_date, dry_run=True)
+    recorded = UserVote.objects.filter(service_date=service_date).count()
+    return [
+        ("one vote per user per day", duplicates == 0, f"{duplicates} users voted more than once a day"),
+        ("tallies match the raw votes", created == updated == deleted == 0,
+         f"{created} missing, {updated} wrong and {deleted} extra tallies"),
+        ("accepted votes recorded", recorded == accepted_votes, f"{accepted_votes} accepted, {recorded} recorded"),
+    ]
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from internal_menu_selection.batch_loader import BatchLoader, get_loader
+from restaurant.models import Restaurant, Menu
+from restaurant.serializers import RestaurantSerializer
+from roles.models import Role
+from users.models import User
+from vote.models import UserVote
+from vote.serializers import VoteListCreateSerializer, VoteResultListSerializer
+
+
+class TestBatchLoader(TestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="restaurant_owner")
+        self.owners = [User.objects.create_user(email=f"owner{number}@gmail.com", password="test@123",
+                                                username=f"owner{number}", role=self.role) for number in range(3)]
+        self.restaurants = [Restaurant.objects.create(name=f"Restaurant {number}", owner=owner)
+                            for number, owner in enumerate(self.owners)]
+
+    def test_load_batches_pending_keys(self):
+        loader = BatchLoader(User, 'username')
+        loader.prime([owner.id for owner in self.owners] + [None])
+        with self.assertNumQueries(1):
+            self.assertEqual(loader.load(self.owners[0].id), "owner0")
+            self.assertEqual(loader.load(self.owners[2].id), "owner2")
+        with self.assertNumQueries(0):
+            self.assertIsNone(loader.load(None))
+        with self.assertNumQueries(1):
+            self.assertIsNone(loader.load(0))
+        with self.assertNumQueries(0):
+            self.assertIsNone(loader.load(0))
+
+    def test_loaders_are_shared_by_the_request(self):
+        request = type('Request', (), {})()
+        self.assertIs(get_loader({'request': request}, User, 'username'),
+                      get_loader({'request': request}, User, 'username'))
+        self.assertIsNot(get_loader({'request': request}, User, 'username'),
+                         get_loader({'request': request}, User, 'email'))
+        context = {}
+        self.assertIs(get_loader(context, User, 'username'), get_loader(context, User, 'username'))
+
+    def test_list_serializer_loads_the_owners_in_one_query(self):
+        restaurants = list(Restaurant.objects.order_by('id'))
+        with self.assertNumQueries(1):
+            data = RestaurantSerializer(restaurants, many=True).data
+        self.assertEqual([row['owner'] for row in data], ["owner0", "owner1", "owner2"])
+
+    def test_loaded_relations_are_reused(self):
+        restaurants = list(Restaurant.objects.select_related('owner').order_by('id'))
+        with self.assertNumQueries(0):
+            data = RestaurantSerializer(restaurants, many=True).data
+        self.assertEqual(data[0]['owner'], "owner0")
+
+    def test_vote_serializers(self):
+        menus = [Menu.objects.create(restaurant=restaurant, day="Monday") for restaurant in self.restaurants]
+        votes = [UserVote.objects.create(user=owner, menu=menu, service_date=timezone.localdate())
+                 for owner, menu in zip(self.owners, menus)]
+        votes = list(UserVote.objects.filter(id__in=[vote.id for vote in votes]).order_by('id'))
+        with self.assertNumQueries(1):
+            data = VoteListCreateSerializer(votes, many=True).data
+        self.assertEqual([row['user'] for row in data], ["owner0", "owner1", "owner2"])
+        with self.assertNumQueries(2):
+            data = VoteResultListSerializer(Menu.objects.order_by('id'), many=True).data
+        self.assertEqual([row['restaurant'] for row in data], ["Restaurant 0", "Restaurant 1", "Restaurant 2"])
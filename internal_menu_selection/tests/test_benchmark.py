@@ -0,0 +1,56 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from internal_menu_selection.benchmark import SCENARIOS, compare_results, measure, seed_dataset
+from restaurant.models import Menu, MenuFoodItem
+from users.models import User
+from vote.models import DailyResult, UserVote, VoteTally
+
+
+@override_settings(VOTING_CUTOFF='23:59:59.999999')
+class TestBenchmark(TestCase):
+
+    def test_seed_dataset(self):
+        dataset = seed_dataset(restaurants=3, food_items=4, days=5, employees=10)
+        self.assertEqual(Menu.objects.count(), 3 * 6)
+        self.assertEqual(MenuFoodItem.objects.count(), 3 * 6 * 4)
+        self.assertEqual(UserVote.objects.count(), 10 * 5)
+        self.assertEqual(sum(VoteTally.objects.values_list('votes', flat=True)), 10 * 5)
+        self.assertEqual(DailyResult.objects.count(), 5)
+        self.assertEqual(User.objects.filter(role__name="employee").count(), 10)
+        self.assertEqual(len(dataset['today_menus']), 3)
+
+    def test_measure(self):
+        dataset = seed_dataset(restaurants=2, food_items=2, days=1, employees=4)
+        scenarios = {f"{scenario.method} {scenario.url_name}": scenario for scenario in SCENARIOS}
+        result = measure(scenarios['POST Add_Vote'], dataset, requests=3, warmup=1)
+        self.assertEqual(UserVote.objects.filter(service_date=dataset['today_menus'][0].service_date).count(), 4)
+        self.assertEqual(result['requests'], 3)
+        self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+        self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+        self.assertGreater(result['queries'], 0)
+        result = measure(scenarios['GET List_Daily_Result'], dataset, requests=2)
+        self.assertGreater(result['throughput_rps'], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'GET list_today_menu': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0},
+                    'GET today_board': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0}}
+        current = {'GET list_today_menu': {'p50_ms': 1.05, 'p95_ms': 2.5, 'p99_ms': 3.0},
+                   'GET today_board': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 9.0},
+                   'GET List_Vote': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0}}
+        rows, regressions = compare_results(baseline, current, threshold=0.1)
+        self.assertEqual(regressions, ['GET list_today_menu'])
+        self.assertIn(('GET List_Vote', None, None, None, None), rows)
+
+    def test_command_rejects_unknown_endpoints_and_baselines(self):
+        with self.assertRaisesRegex(CommandError, "Unknown endpoints: nowhere"):
+            call_command('bench', '--endpoints', 'nowhere', stdout=StringIO())
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline_file:
+            baseline_file.write("not json")
+            baseline_file.flush()
+            with self.assertRaisesRegex(CommandError, "Could not read the baseline"):
+                call_command('bench', '--compare', baseline_file.name, stdout=StringIO())
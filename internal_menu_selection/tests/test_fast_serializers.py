@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection.benchmark import measure_serializers
+from internal_menu_selection.fast_serializers import FastSerializer
+from restaurant.models import Restaurant, FoodItem
+from restaurant.serializers import FoodItemSerializer, MenuSerializer, RestaurantSerializer
+from roles.models import Role
+from users.models import User
+from users.serializers import EmployeeSerializer
+from vote.serializers import VoteResultListSerializer
+
+
+def create_rows():
+    role, _ = Role.objects.get_or_create(name="restaurant_owner")
+    owner = User.objects.create_user(email="owner@gmail.com", password="test@123", username="owner", role=role,
+                                     first_name="Zoë", last_name=" \"quoted\"")
+    restaurants = [Restaurant.objects.create(name=name, owner=owner) for name in ("TGT", "Café <b>&</b>", "")]
+    for number, (price, food_type) in enumerate([(400, 'entree'), (0.1 + 0.2, 'dessert'), (1e21, 'appetizer'),
+                                                 (-3.5, 'entree')]):
+        FoodItem.objects.create(name=f"Dish {number} ✓", description="Line\nbreak\t\\", price=price,
+                                food_type=food_type, restaurant=restaurants[number % len(restaurants)])
+
+
+class TestFastSerializers(TestCase):
+
+    def setUp(self):
+        create_rows()
+
+    def assert_same_json(self, serializer_class, queryset):
+        fast_serializer = FastSerializer(serializer_class)
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast_serializer.to_representation(queryset.values(*fast_serializer.columns))),
+                         renderer.render(serializer_class(queryset, many=True).data))
+
+    def test_food_items(self):
+        self.assert_same_json(FoodItemSerializer, FoodItem.objects.order_by('id'))
+
+    def test_employees(self):
+        self.assert_same_json(EmployeeSerializer, User.objects.order_by('id'))
+
+    def test_restaurants(self):
+        self.assert_same_json(RestaurantSerializer, Restaurant.objects.order_by('id'))
+
+    def test_fields_read_from_several_rows_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            FastSerializer(MenuSerializer)
+        with self.assertRaises(ImproperlyConfigured):
+            FastSerializer(VoteResultListSerializer)
+
+    def test_measure_serializers(self):
+        results = measure_serializers([FoodItemSerializer, RestaurantSerializer], rows=3, repeat=1)
+        self.assertEqual(results['FoodItemSerializer']['rows'], 3)
+        self.assertTrue(all(result['identical'] for result in results.values()))
+        self.assertGreater(results['RestaurantSerializer']['serializer_ms'], 0)
+
+    def test_bench_serializers_needs_rows(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_serializers', rows=0, stdout=StringIO())
+
+
+class TestFastListViews(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('sync_permissions', stdout=StringIO())
+        create_rows()
+        self.client.force_authenticate(user=User.objects.create_user(
+            email="admin@gmail.com", password="test@123", username="admin", role=Role.objects.get(name="admin")))
+
+    def assert_same_response(self, url):
+        cache.clear()
+        fast = self.client.get(url)
+        cache.clear()
+        with override_settings(FAST_SERIALIZERS={'ENABLED': False}):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_list_views(self):
+        for url_name in ('list_add_food_item', 'list_employee', 'list_register_restaurant'):
+            for query in ('', '?page_size=2', '?ordering=id', '?search=Dish&ordering=-id'):
+                with self.subTest(url_name=url_name, query=query):
+                    self.assert_same_response(reverse(url_name) + query)
+
+    def test_next_page(self):
+        first = self.client.get(reverse('list_add_food_item') + '?page_size=2').json()
+        cache.clear()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(first['results']) + len(second['results']), FoodItem.objects.count())
+        self.assertFalse({item['id'] for item in first['results']} & {item['id'] for item in second['results']})
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import URLResolver, get_resolver
+
+from internal_menu_selection.query_budgets import QUERY_BUDGETS, QueryBudget, QueryBudgetExceeded, query_budget
+from roles.models import Role
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name != 'admin':
+                yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+class TestQueryBudgets(TestCase):
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(set(route_names(get_resolver().url_patterns)), {name for name, _ in QUERY_BUDGETS})
+
+    def test_exceeded_budget_reports_the_queries(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, r'(?s)GET List_Create_Role ran 2 queries for 0 rows, '
+                                                         r'over its budget of 1:\n1\. SELECT .*\n2\. SELECT'):
+            with query_budget('List_Create_Role', 'GET'):
+                list(Role.objects.all())
+                list(Role.objects.all())
+
+    @mock.patch.dict(QUERY_BUDGETS, {('List_Create_Role', 'GET'): QueryBudget(1, per_row=1)})
+    def test_budget_grows_with_rows(self):
+        with query_budget('List_Create_Role', 'GET', rows=1):
+            list(Role.objects.all())
+            list(Role.objects.all())
+
+    def test_decorator(self):
+        @query_budget('metrics', 'GET')
+        def read_roles():
+            list(Role.objects.all())
+
+        with self.assertRaises(QueryBudgetExceeded):
+            read_roles()
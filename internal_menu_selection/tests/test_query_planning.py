@@ -0,0 +1,73 @@
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from internal_menu_selection import query_planning
+from internal_menu_selection.query_planning import QueryPlan, plan_view
+from restaurant.models import Menu, FoodItem, Restaurant
+from restaurant.serializers import MenuSerializer, TodayBoardMenuSerializer
+from restaurant.views import FoodItemRetrieveUpdateView, MenuListCreateView, MenuRetrieveUpdateView
+
+
+def make_view(view_class, method='get', **kwargs):
+    request = Request(getattr(APIRequestFactory(), method)('/'))
+    return view_class(request=request, args=(), kwargs=kwargs, format_kwarg=None)
+
+
+class TestQueryPlanning(TestCase):
+
+    def setUp(self):
+        query_planning._plans.clear()
+
+    def test_serializer_plan(self):
+        plan = QueryPlan(Menu)
+        plan.add_serializer(MenuSerializer())
+        self.assertEqual(plan.select_related, set())
+        self.assertEqual(set(plan.prefetch_related), {'food_item'})
+        self.assertEqual(plan.only, {'id', 'day', 'restaurant', 'date_time', 'service_date'})
+        self.assertEqual(plan.prefetch_related['food_item'].query.deferred_loading, ({'id'}, False))
+
+    def test_nested_serializer_plan(self):
+        plan = QueryPlan(Menu)
+        plan.add_serializer(TodayBoardMenuSerializer())
+        self.assertEqual(plan.select_related, {'restaurant'})
+        self.assertIn('restaurant__name', plan.only)
+        self.assertEqual(plan.prefetch_related['food_item'].query.deferred_loading,
+                         ({'id', 'name', 'description', 'price', 'food_type', 'restaurant'}, False))
+
+    def test_list_plan_loads_the_ordering_fields(self):
+        plan = plan_view(make_view(MenuListCreateView), Menu, detail=False, safe=True)
+        self.assertIn('id', plan.only)
+        self.assertNotIn('name', plan.only)
+
+    def test_detail_plan_selects_what_permissions_read(self):
+        plan = plan_view(make_view(FoodItemRetrieveUpdateView, id=1), FoodItem, detail=True, safe=True)
+        self.assertEqual(plan.select_related, {'restaurant'})
+        self.assertIn('restaurant__owner', plan.only)
+
+    def test_write_plan_only_selects_related(self):
+        plan = plan_view(make_view(MenuRetrieveUpdateView, 'put', id=1), Menu, detail=True, safe=False)
+        self.assertEqual(plan.select_related, {'restaurant'})
+        self.assertEqual(plan.prefetch_related, {})
+        self.assertIsNone(plan.only)
+
+    def test_unknown_attributes_load_every_field(self):
+        plan = QueryPlan(Restaurant)
+        plan.add_path(['__str__'])
+        self.assertIsNone(plan.only)
+        self.assertIn("only(all fields)", plan.describe())
+
+    @override_settings(QUERY_PLANNING={'DEBUG': True})
+    def test_debug_logs_the_plan_once(self):
+        view = make_view(MenuRetrieveUpdateView, id=1)
+        with self.assertLogs('internal_menu_selection.query_planning', 'INFO') as logs:
+            view.get_queryset()
+            view.get_queryset()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Query plan of MenuRetrieveUpdateView GET (detail): select_related(restaurant) "
+                      "prefetch_related(food_item)", logs.output[0])
+
+    @override_settings(QUERY_PLANNING={'ENABLED': False})
+    def test_disabled(self):
+        queryset = make_view(MenuRetrieveUpdateView, id=1).get_queryset()
+        self.assertFalse(queryset.query.select_related)
@@ -0,0 +1,124 @@
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection import renderers
+from internal_menu_selection.benchmark import measure_renderers
+from internal_menu_selection.renderers import MessagePackRenderer, ORJSONRenderer
+
+DATA = OrderedDict([
+    ('date', datetime.date(2022, 12, 5)),
+    ('datetimes', [datetime.datetime(2022, 12, 5, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+                   datetime.datetime(2022, 12, 5, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5.5))),
+                   datetime.datetime(2022, 12, 5, 12, 30)]),
+    ('time', datetime.time(12, 30, 15, 500)),
+    ('duration', datetime.timedelta(minutes=90)),
+    ('decimals', [decimal.Decimal('400.50'), decimal.Decimal('0.1'), decimal.Decimal('1E+2')]),
+    ('price', 400.0),
+    ('floats', [0.1 + 0.2, -0.0, 1e15, 9999999999999998.0, 0.0001, 123.456]),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('lazy', gettext_lazy("Can list menu")),
+    ('text', "Café \"quoted\" \\ </script>\n\t\x00\x1f\x7f \u2028\u2029 ✓ 😀"),
+    ('tuple', (1, True, None)),
+    ('empty', {}),
+])
+
+
+class TestORJSONRenderer(SimpleTestCase):
+
+    def assert_same(self, data, accepted_media_type='application/json'):
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type),
+                         JSONRenderer().render(data, accepted_media_type))
+
+    def test_same_output_as_json_renderer(self):
+        self.assert_same(DATA)
+        self.assert_same([DATA, DATA])
+        self.assert_same(None)
+
+    def test_floats_in_orjson_notation(self):
+        for value in (1e16, 1.5e300, 1e-5, -2.5e-5, 5e-324):
+            with self.subTest(value=value):
+                rendered = ORJSONRenderer().render({'price': value})
+                self.assertEqual(json.loads(rendered), {'price': value})
+        self.assertEqual(ORJSONRenderer().render({'price': 1e-5}), b'{"price":0.00001}')
+
+    @override_settings(JSON_RENDERING={'ORJSON_FLOATS': False})
+    def test_floats_in_json_notation(self):
+        for value in (1e16, 1.5e300, 1e-5, -2.5e-5, 5e-324):
+            with self.subTest(value=value):
+                self.assert_same({'price': value})
+        self.assert_same(DATA)
+
+    def test_strings_looking_like_floats_are_rendered_by_orjson(self):
+        data = {'id': uuid.UUID('00000000-0000-4000-8000-00000000e000'), 'token': "eyJhbGciOiJIUzI1NiJ9.0e30.00000",
+                'name': "Chloe 10e", 'price': 12.5}
+        with mock.patch.object(JSONRenderer, 'render', autospec=True, side_effect=JSONRenderer.render) as render:
+            rendered = ORJSONRenderer().render(data)
+        self.assertFalse(render.called)
+        self.assertEqual(rendered, JSONRenderer().render(data))
+
+    def test_non_finite_floats(self):
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with self.subTest(value=value):
+                self.assertEqual(ORJSONRenderer().render({'price': value}), b'{"price":null}')
+                with override_settings(JSON_RENDERING={'ORJSON_FLOATS': False}), self.assertRaises(ValueError):
+                    ORJSONRenderer().render({'price': value})
+
+    def test_values_orjson_cannot_encode(self):
+        self.assert_same({'big': 2 ** 70})
+        self.assert_same({1: "one", None: "none"})
+
+    def test_indent(self):
+        self.assert_same(DATA, 'application/json; indent=4')
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assert_same(DATA)
+
+    def test_u2028_is_escaped(self):
+        self.assertEqual(ORJSONRenderer().render({'text': "\u2028\u2029"}), b'{"text":"\\u2028\\u2029"}')
+
+    def test_measure_renderers(self):
+        results = measure_renderers([DATA] * 3, [ORJSONRenderer], repeat=1)
+        self.assertTrue(results['ORJSONRenderer']['identical'])
+        self.assertEqual(results['ORJSONRenderer']['bytes'], results['JSONRenderer']['bytes'])
+        self.assertEqual(results['JSONRenderer']['speedup'], 1.0)
+
+
+class TestMessagePackRenderer(SimpleTestCase):
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_render(self):
+        rendered = MessagePackRenderer().render(DATA)
+        self.assertEqual(renderers.msgpack.unpackb(rendered), renderers.orjson.loads(ORJSONRenderer().render(DATA)))
+
+    @mock.patch.object(renderers, 'msgpack', None)
+    def test_needs_msgpack(self):
+        with self.assertRaises(ImproperlyConfigured):
+            MessagePackRenderer().render(DATA)
+
+
+class TestRendererNegotiation(APITestCase):
+
+    def test_json_is_rendered_with_orjson(self):
+        with mock.patch.object(ORJSONRenderer, 'render', autospec=True, side_effect=ORJSONRenderer.render) as render:
+            r = self.client.get(reverse('List_Create_Role'), HTTP_ACCEPT='application/json')
+        self.assertEqual(r['Content-Type'], 'application/json')
+        self.assertTrue(render.called)
+
+    def test_msgpack_is_negotiated_when_installed(self):
+        r = self.client.get(reverse('List_Create_Role'), HTTP_ACCEPT='application/msgpack')
+        if renderers.msgpack is None:
+            self.assertEqual(r.status_code, 406)
+        else:
+            self.assertEqual(r['Content-Type'], 'application/msgpack')
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from internal_menu_selection.asgi import application
+from internal_menu_selection.benchmark import PASSWORD, seed_dataset
+from internal_menu_selection.simulation import DatabaseSampler, ServerClient, check_invariants, simulate
+from restaurant.views import TodayBoardView
+from vote.models import UserVote
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], VOTING_CUTOFF='23:59:59.999999')
+class TestLunchRush(TransactionTestCase):
+
+    def test_simulate(self):
+        dataset = seed_dataset(restaurants=2, food_items=2, days=1, employees=6)
+        menu_ids = [menu_obj.id for menu_obj in dataset['today_menus']]
+        recorder, accepted = asyncio.run(simulate(application, dataset['employees'], menu_ids, PASSWORD, ramp=0,
+                                                  polls=1, think=0, workers=3))
+        summary = recorder.summary()
+        for step in ('login', 'board', 'vote', 'results'):
+            self.assertEqual(summary[step]['requests'], 6)
+            self.assertEqual(summary[step]['errors'], 0)
+        self.assertEqual(accepted, 6)
+        today = timezone.localdate()
+        for invariant, passed, detail in check_invariants(today, today - timezone.timedelta(days=1), accepted):
+            self.assertTrue(passed, f"{invariant}: {detail}")
+
+    def test_check_invariants_reports_lost_votes(self):
+        dataset = seed_dataset(restaurants=1, food_items=1, days=0, employees=2)
+        UserVote.objects.create(user=dataset['employees'][0], menu=dataset['today_menus'][0],
+                                service_date=timezone.localdate())
+        rows = {invariant: passed for invariant, passed, _ in check_invariants(
+            timezone.localdate(), timezone.localdate(), accepted_votes=2)}
+        self.assertFalse(rows["accepted votes recorded"])
+        self.assertTrue(rows["one vote per user per day"])
+
+    def test_database_sampler(self):
+        sampler = DatabaseSampler(interval=0.01)
+        sampler.start()
+        sampler.stopping.wait(0.05)
+        sampler.stop()
+        summary = sampler.summary()
+        self.assertGreater(summary['max_connections'], 0)
+        self.assertGreater(summary['samples'], 0)
+        self.assertEqual(summary['deadlocks'], 0)
+
+    def test_sync_views_are_served_by_several_database_sessions_at_once(self):
+        barrier = threading.Barrier(3, timeout=5)
+        sessions = set()
+
+        def dispatch(view, request, *args, **kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_backend_pid()")
+                sessions.add(cursor.fetchone()[0])
+            # Only returns once the three requests are served at the same time
+            barrier.wait()
+            return HttpResponse()
+
+        async def requests(client):
+            return await asyncio.gather(*(client.request('GET', reverse('today_board')) for _ in range(3)))
+
+        client = ServerClient(application, workers=3)
+        try:
+            with mock.patch.object(TodayBoardView, 'dispatch', dispatch):
+                responses = asyncio.run(requests(client))
+        finally:
+            client.close()
+        self.assertEqual([status for status, _, _ in responses], [200] * 3)
+        self.assertEqual(len(sessions), 3)
+
+    def test_command_needs_users(self):
+        with self.assertRaises(CommandError):
+            call_command('lunch_rush', users=0, stdout=StringIO())
@@ -18,12 +18,18 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt import views as jwt_views
 
+from internal_menu_selection.views import ResponseCacheStatsView, metrics
+from users.views import async_login
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path(f"{settings.PREFIX}auth/login/", jwt_views.TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path(f"{settings.PREFIX}auth/login/async/", async_login, name='async_login'),
     path(f"{settings.PREFIX}auth/token/refresh", jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
     path(f"{settings.PREFIX}roles/", include('roles.urls'), name='roles'),
     path(f"{settings.PREFIX}users/", include('users.urls'), name='users'),
     path(f"{settings.PREFIX}restaurant/", include('restaurant.urls'), name='restaurant'),
     path(f"{settings.PREFIX}vote/", include('vote.urls'), name='vote'),
+    path(f"{settings.PREFIX}cache/stats/", ResponseCacheStatsView.as_view(), name='response_cache_stats'),
+    path('metrics', metrics, name='metrics'),
 ]
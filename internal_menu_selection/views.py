@@ -0,0 +1,24 @@
+from django.http import HttpResponse
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+
+from internal_menu_selection.metrics import CONTENT_TYPE, get_metrics_registry
+from internal_menu_selection.response_cache import get_response_cache
+
+
+class ResponseCacheStatsView(generics.GenericAPIView):
+    """
+    View for the hit, miss and eviction counters of the response cache in this process
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_response_cache().stats(), status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """
+    Request metrics in the Prometheus text format, served outside DRF so scrapers need no token
+    """
+    return HttpResponse(get_metrics_registry().render(), content_type=CONTENT_TYPE)
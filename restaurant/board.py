@@ -0,0 +1,63 @@
+import gzip
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from restaurant.models import Menu
+from restaurant.serializers import TodayBoardMenuSerializer
+
+GENERATION_KEY = 'restaurant:today-board:generation'
+BOARD_TIMEOUT = 60 * 60 * 24
+
+
+def board_key(service_date):
+    return f"restaurant:today-board:{service_date.isoformat()}"
+
+
+def build_board(service_date):
+    """
+    Render the board of a service day: its menus with their restaurant and expanded food items
+    """
+    menus = Menu.objects.filter(service_date=service_date).select_related('restaurant').prefetch_related(
+        'food_item').order_by('-id')
+    body = JSONRenderer().render({'service_date': service_date.isoformat(),
+                                  'menus': TodayBoardMenuSerializer(menus, many=True).data})
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        'body': body,
+        'gzip': gzip.compress(body),
+        'etag': f'"{digest}"',
+        'gzip_etag': f'"{digest}-gzip"',
+    }
+
+
+def get_board(service_date):
+    """
+    Return the cached board of a service day, rebuilding it when a menu, food item or restaurant
+    changed since it was rendered
+    """
+    key = board_key(service_date)
+    cached = cache.get_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY, 0)
+    board = cached.get(key)
+    if board is None or board['generation'] != generation:
+        board = {**build_board(service_date), 'generation': generation}
+        cache.set(key, board, BOARD_TIMEOUT)
+    return board
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        if not cache.add(GENERATION_KEY, 1, timeout=None):
+            cache.incr(GENERATION_KEY)
+
+
+def invalidate_today_board():
+    """
+    Mark every cached board stale once the current transaction commits
+    """
+    transaction.on_commit(bump_generation)
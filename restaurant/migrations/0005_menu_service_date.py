@@ -0,0 +1,39 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:06
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.utils.timezone
+
+
+def backfill_service_date(apps, schema_editor):
+    Menu = apps.get_model("restaurant", "Menu")
+    Menu.objects.update(service_date=TruncDate("date_time"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0004_menu_date_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menu",
+            name="service_date",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(backfill_service_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="menu",
+            index=models.Index(
+                fields=["service_date"], name="restaurant__service_9e9607_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="menu",
+            index=models.Index(
+                fields=["restaurant", "service_date"],
+                name="restaurant__restaur_e9f9b5_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0005_menu_service_date"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="menu",
+            constraint=models.UniqueConstraint(
+                fields=("restaurant", "service_date"),
+                name="restaurant_menu_unique_service_date",
+            ),
+        ),
+        # The unique index of the constraint serves the lookups by restaurant and day
+        migrations.RemoveIndex(
+            model_name="menu",
+            name="restaurant__restaur_e9f9b5_idx",
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 
@@ -50,6 +51,10 @@ class FoodItem(models.Model):
         return f"{self.name} - {self.id}"
 
 
+# One menu per restaurant and service day, whatever the publishes racing each other
+MENU_PER_DAY_CONSTRAINT = 'restaurant_menu_unique_service_date'
+
+
 class Menu(models.Model):
     """
     Model for menu
@@ -69,11 +74,18 @@ class Menu(models.Model):
     food_item = models.ManyToManyField(FoodItem, through="MenuFoodItem")
     day = models.CharField(max_length=10, choices=day)
     date_time = models.DateTimeField(auto_now_add=True)
+    service_date = models.DateField(default=timezone.localdate)
 
     class Meta:
         permissions = [
             ("list_menu", "Can list menu")
         ]
+        indexes = [
+            models.Index(fields=['service_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'service_date'], name=MENU_PER_DAY_CONSTRAINT),
+        ]
 
     def __str__(self):
         return f"{self.restaurant.name}"
@@ -2,10 +2,14 @@ from rest_framework.permissions import DjangoModelPermissions
 
 
 class IsOwner(DjangoModelPermissions):
+    query_paths = ['owner']
+
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
 
 class IsRestaurantOwner(DjangoModelPermissions):
+    query_paths = ['restaurant__owner']
+
     def has_object_permission(self, request, view, obj):
-        return obj.restaurant.owner == request.user
+        return obj.restaurant.owner_id == request.user.id
@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
 
+from internal_menu_selection.batch_loader import BatchedRelatedField, BatchListSerializer
 from restaurant.models import Restaurant, FoodItem, Menu
 
 
@@ -8,14 +10,12 @@ class RestaurantSerializer(serializers.ModelSerializer):
     Serializer for restaurant
     """
 
-    owner = serializers.SerializerMethodField('get_owner')
-
-    def get_owner(self, restaurant_obj):
-        return restaurant_obj.owner.username
+    owner = BatchedRelatedField('owner', 'username')
 
     class Meta:
         model = Restaurant
         fields = ['id', 'name', 'owner']
+        list_serializer_class = BatchListSerializer
 
 
 class FoodItemSerializer(serializers.ModelSerializer):
@@ -35,4 +35,47 @@ class MenuSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Menu
-        fields = ['id', 'day', 'restaurant', 'food_item', 'date_time']
+        fields = ['id', 'day', 'restaurant', 'food_item', 'date_time', 'service_date']
+        read_only_fields = ['service_date']
+
+
+class TodayBoardMenuSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a menu of the today board, with its restaurant name and food items
+    """
+    restaurant_name = serializers.CharField(source='restaurant.name')
+    food_item = FoodItemSerializer(many=True)
+
+    class Meta:
+        model = Menu
+        fields = ['id', 'day', 'restaurant', 'restaurant_name', 'food_item', 'date_time', 'service_date']
+
+
+class MenuBatchEntrySerializer(serializers.Serializer):
+    """
+    Serializer for one menu of a batch, validated without touching the database
+    """
+    restaurant = serializers.IntegerField()
+    day = serializers.ChoiceField(choices=Menu.day.field.choices)
+    service_date = serializers.DateField(default=timezone.localdate)
+    food_item = serializers.ListField(child=serializers.IntegerField(), default=list)
+
+    def validate_service_date(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError("Cannot publish a menu for a past day")
+        return value
+
+
+class MenuCloneSerializer(serializers.Serializer):
+    """
+    Serializer for cloning a menu to another day
+    """
+    service_date = serializers.DateField(default=timezone.localdate)
+    day = serializers.ChoiceField(choices=Menu.day.field.choices, required=False)
+    include = serializers.ListField(child=serializers.IntegerField(), required=False)
+    exclude = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate_service_date(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError("Cannot publish a menu for a past day")
+        return value
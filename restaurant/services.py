@@ -0,0 +1,172 @@
+from django.db import IntegrityError, connection, transaction
+
+from internal_menu_selection.response_cache import invalidate_responses
+from restaurant.board import invalidate_today_board
+from restaurant.models import MENU_PER_DAY_CONSTRAINT, Restaurant, FoodItem, Menu, MenuFoodItem
+
+
+def is_duplicate_menu(error):
+    """
+    Whether an IntegrityError comes from a second menu of a restaurant for a day, published concurrently
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    return diag is not None and diag.constraint_name == MENU_PER_DAY_CONSTRAINT
+
+
+def taken_service_days(restaurant_ids, service_dates):
+    return set(Menu.objects.filter(restaurant_id__in=restaurant_ids, service_date__in=service_dates).values_list(
+        'restaurant_id', 'service_date'))
+
+
+def requested_food_item_ids(data):
+    """
+    Food item ids of a menu request, from a JSON list or repeated form fields
+    """
+    if hasattr(data, 'getlist'):
+        return data.getlist('food_item')
+    food_item_ids = data.get('food_item', [])
+    return food_item_ids if isinstance(food_item_ids, list) else [food_item_ids]
+
+
+def resolve_food_items(restaurant, food_item_ids):
+    """
+    Check the requested food items against the restaurant with one query.
+    Returns the ids of the restaurant's food items, without duplicates and in request order,
+    and the requested ids that were rejected.
+    """
+    requested = []
+    rejected = []
+    for food_item_id in food_item_ids:
+        try:
+            requested.append(int(food_item_id))
+        except (TypeError, ValueError):
+            rejected.append(food_item_id)
+
+    valid_ids = set(FoodItem.objects.filter(restaurant=restaurant, id__in=requested).values_list('id', flat=True))
+    accepted = []
+    for food_item_id in requested:
+        if food_item_id not in valid_ids:
+            rejected.append(food_item_id)
+        elif food_item_id not in accepted:
+            accepted.append(food_item_id)
+    return accepted, rejected
+
+
+def add_menu_food_items(menu, food_item_ids):
+    MenuFoodItem.objects.bulk_create(MenuFoodItem(menu=menu, food_item_id=food_item_id)
+                                     for food_item_id in food_item_ids)
+    invalidate_today_board()
+    invalidate_responses(MenuFoodItem)
+
+
+def set_menu_food_items(menu, food_item_ids):
+    """
+    Make the food items of a menu match `food_item_ids`, deleting the removed and inserting the added ones only
+    """
+    with transaction.atomic():
+        current = set(MenuFoodItem.objects.select_for_update().filter(menu=menu).values_list('food_item_id',
+                                                                                              flat=True))
+        wanted = set(food_item_ids)
+        if current - wanted:
+            MenuFoodItem.objects.filter(menu=menu, food_item_id__in=current - wanted).delete()
+        add_menu_food_items(menu, [food_item_id for food_item_id in food_item_ids if food_item_id not in current])
+
+
+def publish_menus(user, entries):
+    """
+    Create a batch of validated menu entries (restaurant, day, service_date, food_item) owned by `user`
+    with a fixed number of queries. Returns one result per entry, in order.
+    When another publish takes a day of the batch in the meantime, the batch is planned again with the taken days.
+    """
+    restaurant_ids = {entry['restaurant'] for entry in entries}
+    owners = dict(Restaurant.objects.filter(id__in=restaurant_ids).values_list('id', 'owner_id'))
+    food_item_restaurants = dict(FoodItem.objects.filter(
+        id__in={food_item_id for entry in entries for food_item_id in entry['food_item']}).values_list(
+        'id', 'restaurant_id'))
+    while True:
+        taken = taken_service_days(restaurant_ids, {entry['service_date'] for entry in entries})
+        try:
+            return create_menus(user, entries, owners, taken, food_item_restaurants)
+        except IntegrityError as error:
+            if not is_duplicate_menu(error):
+                raise
+
+
+def create_menus(user, entries, owners, taken, food_item_restaurants):
+    """
+    Create the menus of publish_menus knowing the restaurant owners, the (restaurant, service_date) days taken and
+    the restaurant of the food items
+    """
+    results = [{'index': index} for index in range(len(entries))]
+    menus = []
+    menu_results = []
+    for entry, result in zip(entries, results):
+        key = (entry['restaurant'], entry['service_date'])
+        if entry['restaurant'] not in owners:
+            result['errors'] = {'restaurant': [f"Invalid pk \"{entry['restaurant']}\" - object does not exist."]}
+        elif owners[entry['restaurant']] != user.id:
+            result['errors'] = {'restaurant': ["Permission denied"]}
+        elif key in taken:
+            result['errors'] = {'service_date': ["Cannot upload more than one menu"]}
+        else:
+            taken.add(key)
+            menus.append(Menu(restaurant_id=entry['restaurant'], day=entry['day'],
+                              service_date=entry['service_date']))
+            menu_results.append((entry, result))
+
+    with transaction.atomic():
+        Menu.objects.bulk_create(menus)
+        menu_food_items = []
+        for menu, (entry, result) in zip(menus, menu_results):
+            accepted, rejected = [], []
+            for food_item_id in entry['food_item']:
+                if food_item_restaurants.get(food_item_id) != menu.restaurant_id:
+                    rejected.append(food_item_id)
+                elif food_item_id not in accepted:
+                    accepted.append(food_item_id)
+            menu_food_items.extend(MenuFoodItem(menu=menu, food_item_id=food_item_id) for food_item_id in accepted)
+            result['menu'] = menu
+            result['rejected_food_item'] = rejected
+        MenuFoodItem.objects.bulk_create(menu_food_items)
+        invalidate_today_board()
+        invalidate_responses(Menu, MenuFoodItem)
+    return results
+
+
+COPY_MENU_FOOD_ITEMS_SQL = """
+    INSERT INTO {table} (menu_id, food_item_id)
+    SELECT %s, food_item_id FROM {table}
+    WHERE menu_id = %s{filters}
+"""
+
+
+def clone_menu(menu, service_date, day, include=None, exclude=None):
+    """
+    Copy a menu and its food items to another service day inside the database, optionally keeping only the
+    `include` food items and leaving out the `exclude` ones.
+    Returns the new menu, or None when the restaurant already has a menu that day.
+    """
+    filters, params = [], []
+    if include is not None:
+        filters.append("food_item_id = ANY(%s)")
+        params.append(list(include))
+    if exclude:
+        filters.append("NOT (food_item_id = ANY(%s))")
+        params.append(list(exclude))
+
+    try:
+        with transaction.atomic():
+            if Menu.objects.filter(restaurant_id=menu.restaurant_id, service_date=service_date).exists():
+                return None
+            new_menu = Menu.objects.create(restaurant_id=menu.restaurant_id, day=day, service_date=service_date)
+            with connection.cursor() as cursor:
+                cursor.execute(COPY_MENU_FOOD_ITEMS_SQL.format(
+                    table=connection.ops.quote_name(MenuFoodItem._meta.db_table),
+                    filters="".join(f" AND {condition}" for condition in filters)), [new_menu.id, menu.id] + params)
+            invalidate_today_board()
+            invalidate_responses(MenuFoodItem)
+    except IntegrityError as error:
+        if not is_duplicate_menu(error):
+            raise
+        return None
+    return new_menu
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from internal_menu_selection.response_cache import invalidate_responses
+from restaurant.board import invalidate_today_board
+from restaurant.models import Restaurant, FoodItem, Menu, MenuFoodItem
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=MenuFoodItem)
+@receiver(post_delete, sender=MenuFoodItem)
+def invalidate_cached_reads(sender, **kwargs):
+    invalidate_today_board()
+    invalidate_responses(sender)
+
+
+@receiver(m2m_changed, sender=MenuFoodItem)
+def invalidate_cached_reads_on_food_items_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_today_board()
+        invalidate_responses(MenuFoodItem)
@@ -0,0 +1,113 @@
+import gc
+import json
+import os
+import tempfile
+import threading
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection.metrics import MetricsRegistry, get_metrics_registry, metrics_settings
+from restaurant.models import Restaurant
+from roles.models import Role
+from users.models import User
+
+
+def route_stats(route, method='GET'):
+    return get_metrics_registry().collect().get((route, method)) or get_metrics_registry().new_stats()
+
+
+class TestRequestMetrics(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="restaurant_owner")
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+        self.user.user_permissions.add(Permission.objects.get(name='Can list restaurant'))
+        Restaurant.objects.create(name="TGT", owner=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_request_recorded_by_route(self):
+        before = route_stats('list_register_restaurant')
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(reverse('list_register_restaurant'))
+        self.assertEqual(r.status_code, 200)
+        after = route_stats('list_register_restaurant')
+        self.assertEqual(sum(after['latency']) - sum(before['latency']), 1)
+        self.assertEqual(after['queries_sum'] - before['queries_sum'], len(queries.captured_queries))
+        self.assertEqual(after['size_sum'] - before['size_sum'], len(r.content))
+        self.assertGreater(after['db_seconds'], before['db_seconds'])
+        self.assertGreater(after['serialization_seconds'], before['serialization_seconds'])
+
+    def test_unresolved_requests_grouped(self):
+        before = route_stats('unmatched')
+        self.client.get('/not-a-route/')
+        self.assertEqual(sum(route_stats('unmatched')['latency']) - sum(before['latency']), 1)
+
+    def test_metrics_exposition(self):
+        self.client.get(reverse('list_register_restaurant'))
+        self.client.force_authenticate(user=None)
+        r = self.client.get(reverse('metrics'))
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = r.content.decode()
+        self.assertIn("# TYPE django_http_request_duration_seconds histogram", body)
+        self.assertIn('django_http_request_duration_seconds_bucket{route="list_register_restaurant",method="GET",'
+                      'le="+Inf"}', body)
+        self.assertIn('django_http_request_db_seconds_total{route="list_register_restaurant",method="GET"}', body)
+
+    async def test_queries_of_sync_views_recorded_under_asgi(self):
+        before = route_stats('token_obtain_pair', 'POST')
+        r = await self.async_client.post(reverse('token_obtain_pair'), {"username": "test", "password": "test@123"},
+                                         content_type='application/json')
+        self.assertEqual(r.status_code, 200)
+        after = route_stats('token_obtain_pair', 'POST')
+        self.assertEqual(sum(after['queries']) - sum(before['queries']), 1)
+        self.assertGreater(after['queries_sum'], before['queries_sum'])
+
+
+class TestMultiprocessMetrics(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        config = metrics_settings()
+        self.buckets = {'latency': config['LATENCY_BUCKETS'], 'queries': config['QUERY_BUCKETS'],
+                        'size': config['SIZE_BUCKETS']}
+
+    def test_totals_of_all_processes(self):
+        other = MetricsRegistry(self.buckets)
+        other.observe('list_today_menu', 'GET', 0.02, queries=3, db_seconds=0.01, size=100)
+        with open(os.path.join(self.directory.name, "metrics-1.json"), 'w') as metrics_file:
+            json.dump([['list_today_menu', 'GET', other.totals()[('list_today_menu', 'GET')]]], metrics_file)
+
+        registry = MetricsRegistry(self.buckets, self.directory.name, write_interval=0)
+        registry.observe('list_today_menu', 'GET', 0.2, queries=5, db_seconds=0.1, size=300)
+        self.assertTrue(os.path.exists(registry.path(os.getpid())))
+        stats = registry.collect()[('list_today_menu', 'GET')]
+        self.assertEqual(sum(stats['latency']), 2)
+        self.assertEqual(stats['queries_sum'], 8)
+        self.assertEqual(stats['size_sum'], 400)
+        self.assertIn('django_http_request_queries_count{route="list_today_menu",method="GET"} 2',
+                      registry.render())
+
+    def test_shards_of_finished_threads_are_folded(self):
+        registry = MetricsRegistry(self.buckets)
+        threads = [threading.Thread(target=registry.observe, args=('list_today_menu', 'GET', 0.02), kwargs={
+            'queries': 2}) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        del threads, thread
+        gc.collect()
+        self.assertEqual(registry.shards, {})
+        registry.observe('list_today_menu', 'GET', 0.02, queries=2)
+        stats = registry.totals()[('list_today_menu', 'GET')]
+        self.assertEqual(sum(stats['latency']), 51)
+        self.assertEqual(stats['queries_sum'], 102)
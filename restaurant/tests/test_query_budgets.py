@@ -0,0 +1,147 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection.query_budgets import query_budget
+from restaurant.models import Restaurant, FoodItem, Menu
+from roles.models import Role
+from users.models import User
+
+
+class TestRestaurantQueryBudgets(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('sync_permissions', stdout=StringIO())
+        self.role = Role.objects.get(name="restaurant_owner")
+        self.user = self.create_owner("owner")
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.food_items = [self.create_food_item(self.restaurant, name) for name in ("Paneer", "Naan")]
+        self.client.force_authenticate(user=self.user)
+
+    def create_owner(self, username):
+        return User.objects.create_user(email=f"{username}@gmail.com", password="test@123", username=username,
+                                        role=self.role)
+
+    def create_food_item(self, restaurant, name):
+        return FoodItem.objects.create(name=name, restaurant=restaurant, description="Nice dish", price=400,
+                                       food_type='entree')
+
+    def create_menu(self, restaurant, service_date=None):
+        menu = Menu.objects.create(restaurant=restaurant, day="Monday",
+                                   service_date=service_date or timezone.localdate())
+        menu.food_item.set([self.create_food_item(restaurant, name) for name in ("Paneer", "Naan")])
+        return menu
+
+    def create_restaurants(self, count):
+        # Every restaurant has its own owner, so per-row owner lookups are not hidden by a shared instance
+        return [Restaurant.objects.create(name=f"Restaurant {number}",
+                                          owner=self.create_owner(f"owner{Restaurant.objects.count()}"))
+                for number in range(count)]
+
+    def assert_list_budget(self, url_name, add_rows, url=None):
+        rows = 0
+        for count in (1, 5):
+            add_rows(count - rows)
+            rows = count
+            cache.clear()
+            with query_budget(url_name, 'GET', rows=rows):
+                r = self.client.get(url or reverse(url_name))
+            self.assertEqual(r.status_code, 200)
+
+    def test_list_restaurants(self):
+        FoodItem.objects.all().delete()
+        Restaurant.objects.all().delete()
+        self.assert_list_budget('list_register_restaurant', self.create_restaurants)
+
+    def test_create_restaurant(self):
+        with query_budget('list_register_restaurant', 'POST', rows=1):
+            r = self.client.post(reverse('list_register_restaurant'), {"name": "TGM"})
+        self.assertEqual(r.status_code, 201)
+
+    def test_restaurant_detail(self):
+        url = reverse('retrieve_update_delete_restaurant', kwargs={'id': self.restaurant.id})
+        with query_budget('retrieve_update_delete_restaurant', 'GET', rows=1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget('retrieve_update_delete_restaurant', 'PUT', rows=1):
+            self.assertEqual(self.client.put(url, {"name": "TGM"}).status_code, 200)
+        with query_budget('retrieve_update_delete_restaurant', 'PATCH', rows=1):
+            self.assertEqual(self.client.patch(url, {"name": "TGT"}).status_code, 200)
+        restaurant = Restaurant.objects.create(name="TGM", owner=self.user)
+        with query_budget('retrieve_update_delete_restaurant', 'DELETE', rows=1):
+            r = self.client.delete(reverse('retrieve_update_delete_restaurant', kwargs={'id': restaurant.id}))
+        self.assertEqual(r.status_code, 204)
+
+    def test_list_food_items(self):
+        FoodItem.objects.all().delete()
+        self.assert_list_budget('list_add_food_item', lambda count: [
+            self.create_food_item(self.restaurant, f"Dish {number}") for number in range(count)])
+
+    def test_create_food_item(self):
+        with query_budget('list_add_food_item', 'POST', rows=1):
+            r = self.client.post(reverse('list_add_food_item'), {
+                "name": "Dal", "description": "Lentils", "price": 200, "food_type": "entree",
+                "restaurant": self.restaurant.id})
+        self.assertEqual(r.status_code, 201)
+
+    def test_food_item_detail(self):
+        url = reverse('retrieve_update_food_item', kwargs={'id': self.food_items[0].id})
+        data = {"name": "Dal", "description": "Lentils", "price": 200, "food_type": "entree",
+                "restaurant": self.restaurant.id}
+        with query_budget('retrieve_update_food_item', 'GET', rows=1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget('retrieve_update_food_item', 'PUT', rows=1):
+            self.assertEqual(self.client.put(url, data).status_code, 200)
+        with query_budget('retrieve_update_food_item', 'PATCH', rows=1):
+            self.assertEqual(self.client.patch(url, {"price": 250}).status_code, 200)
+
+    def test_list_menus(self):
+        self.assert_list_budget('list_add_menu', lambda count: [
+            self.create_menu(restaurant) for restaurant in self.create_restaurants(count)])
+
+    def test_list_today_menus(self):
+        self.assert_list_budget('list_today_menu', lambda count: [
+            self.create_menu(restaurant) for restaurant in self.create_restaurants(count)])
+
+    def test_today_board(self):
+        self.assert_list_budget('today_board', lambda count: [
+            self.create_menu(restaurant) for restaurant in self.create_restaurants(count)])
+
+    def test_create_menu(self):
+        with query_budget('list_add_menu', 'POST', rows=1):
+            r = self.client.post(reverse('list_add_menu'), {
+                "restaurant": self.restaurant.id, "day": "Monday",
+                "food_item": [food_item.id for food_item in self.food_items]})
+        self.assertEqual(r.status_code, 201)
+
+    def test_batch_menus(self):
+        for days in (1, 5):
+            entries = [{"restaurant": self.restaurant.id, "day": "Monday",
+                        "service_date": (timezone.localdate() + timezone.timedelta(days=10 * days + number)).isoformat(),
+                        "food_item": [food_item.id for food_item in self.food_items]} for number in range(days)]
+            with query_budget('batch_add_menu', 'POST', rows=days):
+                r = self.client.post(reverse('batch_add_menu'), entries, format='json')
+            self.assertEqual(r.status_code, 201)
+
+    def test_menu_detail(self):
+        menu = self.create_menu(self.restaurant)
+        url = reverse('retrieve_update_menu', kwargs={'id': menu.id})
+        data = {"restaurant": self.restaurant.id, "day": "Tuesday",
+                "food_item": [food_item.id for food_item in self.food_items]}
+        with query_budget('retrieve_update_menu', 'GET', rows=1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget('retrieve_update_menu', 'PUT', rows=1):
+            self.assertEqual(self.client.put(url, data).status_code, 200)
+        with query_budget('retrieve_update_menu', 'PATCH', rows=1):
+            self.assertEqual(self.client.patch(url, {"day": "Monday"}).status_code, 200)
+
+    def test_clone_menu(self):
+        menu = self.create_menu(self.restaurant)
+        with query_budget('clone_menu', 'POST', rows=1):
+            r = self.client.post(reverse('clone_menu', kwargs={'id': menu.id}), {
+                "service_date": (timezone.localdate() + timezone.timedelta(days=1)).isoformat()})
+        self.assertEqual(r.status_code, 201)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection import response_cache
+from internal_menu_selection.response_cache import get_response_cache
+from restaurant.models import Restaurant
+from roles.models import Role
+from users.models import User
+
+
+class TestResponseCache(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="restaurant_owner")
+        self.list_permission = Permission.objects.get(name='Can list restaurant')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.user2 = User.objects.create_user(
+            email="test2@gmail.com",
+            password="test@123",
+            username="test2",
+            role=self.role)
+        self.user.user_permissions.add(self.list_permission)
+        self.user2.user_permissions.add(self.list_permission)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.restaurant_list_url = reverse('list_register_restaurant')
+        self.stats_url = reverse('response_cache_stats')
+
+    def restaurant_queries(self, url, user):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        return r, [query for query in queries.captured_queries if '"Restaurant"' in query['sql']]
+
+    def test_list_served_from_cache_for_the_role(self):
+        stats = get_response_cache().stats()
+        _, queries = self.restaurant_queries(self.restaurant_list_url, self.user)
+        self.assertTrue(queries)
+        r, queries = self.restaurant_queries(self.restaurant_list_url, self.user2)
+        self.assertFalse(queries)
+        self.assertEqual(r.data['results'][0]['name'], "TGT")
+        self.assertEqual(get_response_cache().stats()['hits'], stats['hits'] + 1)
+
+    def test_list_cached_per_query_string(self):
+        self.restaurant_queries(self.restaurant_list_url, self.user)
+        _, queries = self.restaurant_queries(f"{self.restaurant_list_url}?search=TGM", self.user)
+        self.assertTrue(queries)
+
+    def test_list_evicted_after_write(self):
+        self.restaurant_queries(self.restaurant_list_url, self.user)
+        stats = get_response_cache().stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            Restaurant.objects.create(name="TGM", owner=self.user)
+        r, queries = self.restaurant_queries(self.restaurant_list_url, self.user)
+        self.assertTrue(queries)
+        self.assertEqual([restaurant['name'] for restaurant in r.data['results']], ["TGM", "TGT"])
+        self.assertEqual(get_response_cache().stats()['evictions'], stats['evictions'] + 1)
+
+    def test_list_evicted_after_owner_change(self):
+        self.restaurant_queries(self.restaurant_list_url, self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "owner"
+            self.user.save()
+        r, _ = self.restaurant_queries(self.restaurant_list_url, self.user)
+        self.assertEqual(r.data['results'][0]['owner'], "owner")
+
+    def test_cached_list_still_checks_permissions(self):
+        self.restaurant_queries(self.restaurant_list_url, self.user)
+        self.user2.user_permissions.remove(self.list_permission)
+        self.user2 = User.objects.get(id=self.user2.id)
+        self.client.force_authenticate(user=self.user2)
+        r = self.client.get(self.restaurant_list_url)
+        self.assertEqual(r.status_code, 403)
+
+    def test_stats_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.stats_url)
+        self.assertEqual(r.status_code, 403)
+
+    def test_stats_for_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.stats_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(set(r.data), {'backend', 'timeout', 'hits', 'misses', 'evictions', 'hit_ratio'})
+
+    def test_cache_local_to_the_process_is_reported(self):
+        with mock.patch.object(response_cache, '_response_cache', None), \
+                self.assertLogs('users.shared_state', 'WARNING') as logs:
+            get_response_cache()
+        self.assertIn("RESPONSE_CACHE['CACHE']", logs.output[0])
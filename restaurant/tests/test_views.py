@@ -1,8 +1,21 @@
+import datetime
+import gzip
+import json
+from unittest import mock
+
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
-from restaurant.models import Restaurant, FoodItem, Menu
+from internal_menu_selection.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from restaurant import services
+from restaurant.models import Restaurant, FoodItem, Menu, MenuFoodItem
 from roles.models import Role
 from users.models import User
 
@@ -56,7 +69,55 @@ class TestRestaurant(APITestCase):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.restaurant_list_create_url)
         self.assertEqual(r.status_code, 200)
-        self.assertEqual(r.data[0]['name'], "TGT")
+        self.assertEqual(r.data['results'][0]['name'], "TGT")
+
+    def test_list_restaurant_cursor_pages(self):
+        Restaurant.objects.create(name="TGM", owner=self.user)
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.restaurant_list_create_url, {"page_size": 1, "include_total": "true"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([restaurant['name'] for restaurant in r.data['results']], ["TGM"])
+        self.assertIn('approximate_total', r.data)
+        self.assertNotIn('count', r.data)
+        r = self.client.get(r.data['next'])
+        self.assertEqual([restaurant['name'] for restaurant in r.data['results']], ["TGT"])
+        self.assertIsNone(r.data['next'])
+
+    def test_list_restaurant_page_size_is_capped(self):
+        Restaurant.objects.bulk_create(Restaurant(name=f"R{i}", owner=self.user) for i in range(MAX_PAGE_SIZE + 1))
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.restaurant_list_create_url, {"page_size": 10000})
+        self.assertEqual(len(r.data['results']), MAX_PAGE_SIZE)
+
+    def test_list_restaurant_paginated_by_default(self):
+        Restaurant.objects.bulk_create(Restaurant(name=f"R{i}", owner=self.user) for i in range(DEFAULT_PAGE_SIZE))
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.restaurant_list_create_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.data['results']), DEFAULT_PAGE_SIZE)
+        self.assertIsNotNone(r.data['next'])
+        r = self.client.get(r.data['next'])
+        self.assertEqual([restaurant['name'] for restaurant in r.data['results']], ["TGT"])
+
+    def test_list_restaurant_cursor_ordered_by_name(self):
+        restaurants = [Restaurant.objects.create(name=name, owner=self.user) for name in ["AAA", "BBB", "AAA", "AAA"]]
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        for ordering, expected in (
+                ("name", [restaurants[0], restaurants[2], restaurants[3], restaurants[1], self.restaurant]),
+                ("-name", [self.restaurant, restaurants[1], restaurants[3], restaurants[2], restaurants[0]])):
+            with self.subTest(ordering=ordering):
+                ids = []
+                r = self.client.get(self.restaurant_list_create_url, {"ordering": ordering, "page_size": 2})
+                while True:
+                    ids += [restaurant['id'] for restaurant in r.data['results']]
+                    if not r.data['next']:
+                        break
+                    r = self.client.get(r.data['next'])
+                self.assertEqual(ids, [restaurant.id for restaurant in expected])
 
     def test_get_restaurant_permission_denied(self):
         self.client.force_authenticate(user=self.user)
@@ -149,7 +210,7 @@ class TestFoodItem(APITestCase):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.food_item_list_create_url)
         self.assertEqual(r.status_code, 200)
-        self.assertEqual(r.data[0]['name'], "Paneer")
+        self.assertEqual(r.data['results'][0]['name'], "Paneer")
 
     def test_get_food_item_permission_denied(self):
         self.client.force_authenticate(user=self.user)
@@ -233,6 +294,28 @@ class TestMenu(APITestCase):
         self.assertEqual(r.status_code, 400)
         self.assertEqual(r.data['message'], "Cannot upload more than one menu")
 
+    def test_add_menu_published_concurrently(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        # The menu of the day is published after the check of this request
+        with mock.patch.object(QuerySet, 'exists', return_value=False):
+            r = self.client.post(self.menu_list_create_url, self.menu1)
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data['message'], "Cannot upload more than one menu")
+        self.assertEqual(Menu.objects.filter(restaurant=self.restaurant).count(), 1)
+
+    def test_add_menu_with_food_items(self):
+        restaurant = Restaurant.objects.create(name="TGM", owner=self.user)
+        food_item = FoodItem.objects.create(name="Dosa", restaurant=restaurant, description="South",
+                                            price=100, food_type='entree')
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        data = {"restaurant": restaurant.id, "day": "Thursday", "food_item": [food_item.id, self.food_item.id]}
+        r = self.client.post(self.menu_list_create_url, data)
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data['food_item'], [food_item.id])
+        self.assertEqual(r.data['rejected_food_item'], [self.food_item.id])
+
     def test_list_menu_permission_denied(self):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.menu_list_create_url)
@@ -244,7 +327,7 @@ class TestMenu(APITestCase):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.menu_list_create_url)
         self.assertEqual(r.status_code, 200)
-        self.assertEqual(r.data[0]['restaurant'], self.restaurant.id)
+        self.assertEqual(r.data['results'][0]['restaurant'], self.restaurant.id)
 
     def test_get_menu_permission_denied(self):
         self.client.force_authenticate(user=self.user)
@@ -279,6 +362,113 @@ class TestMenu(APITestCase):
         self.assertEqual(r.status_code, 200)
         self.assertEqual(r.data['food_item'], [self.food_item.id])
 
+    def test_update_menu_only_applies_changed_food_items(self):
+        kept_row_id = MenuFoodItem.objects.get(menu=self.menu, food_item=self.food_item).id
+        other_restaurant = Restaurant.objects.create(name="TGM", owner=self.user2)
+        other_food_item = FoodItem.objects.create(name="Dosa", restaurant=other_restaurant, description="South",
+                                                  price=100, food_type='entree')
+        food_item3 = FoodItem.objects.create(name="Kheer", restaurant=self.restaurant, description="Sweet",
+                                             price=100, food_type='dessert')
+        self.user.user_permissions.add(self.change_permission)
+        self.client.force_authenticate(user=self.user)
+        data = {"day": "Thursday", "restaurant": self.restaurant.id,
+                "food_item": [self.food_item.id, food_item3.id, other_food_item.id, food_item3.id]}
+        r = self.client.put(self.menu_retrieve_update_url, data, format='json')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(sorted(r.data['food_item']), sorted([self.food_item.id, food_item3.id]))
+        self.assertEqual(r.data['rejected_food_item'], [other_food_item.id])
+        self.assertEqual(MenuFoodItem.objects.get(menu=self.menu, food_item=self.food_item).id, kept_row_id)
+
+
+class TestMenuClone(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        self.role = Role.objects.create(name="restaurant_owner")
+        self.add_permission = Permission.objects.get(name='Can add menu')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.user2 = User.objects.create_user(
+            email="test2@gmail.com",
+            password="test@123",
+            username="test2",
+            role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.food_item = FoodItem.objects.create(name="Paneer", restaurant=self.restaurant, description="Nice dish",
+                                                 price=400, food_type='entree')
+        self.food_item2 = FoodItem.objects.create(name="Naan", restaurant=self.restaurant, description="Type of Roti",
+                                                  price=400, food_type='entree')
+        self.food_item3 = FoodItem.objects.create(name="Kheer", restaurant=self.restaurant, description="Sweet",
+                                                  price=100, food_type='dessert')
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        self.menu.food_item.set([self.food_item.id, self.food_item2.id, self.food_item3.id])
+        self.tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        self.menu_clone_url = reverse('clone_menu', kwargs={'id': self.menu.id})
+
+    def test_clone_menu_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.menu_clone_url, {"service_date": self.tomorrow}, format='json')
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(r.data["detail"], "You do not have permission to perform this action.")
+
+    def test_clone_menu_other_user_permission_denied(self):
+        self.user2.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user2)
+        r = self.client.post(self.menu_clone_url, {"service_date": self.tomorrow}, format='json')
+        self.assertEqual(r.status_code, 403)
+
+    def test_clone_menu_with_permission(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.post(self.menu_clone_url, {"service_date": self.tomorrow}, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data['service_date'], self.tomorrow.isoformat())
+        self.assertEqual(r.data['day'], self.tomorrow.strftime('%A'))
+        self.assertEqual(sorted(r.data['food_item']),
+                         sorted([self.food_item.id, self.food_item2.id, self.food_item3.id]))
+        copies = [query['sql'] for query in queries.captured_queries if 'INSERT INTO "restaurant_menufooditem"'
+                  in query['sql']]
+        self.assertEqual(len(copies), 1)
+
+    def test_clone_menu_with_include_and_exclude(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        data = {"service_date": self.tomorrow, "day": "Friday",
+                "include": [self.food_item.id, self.food_item2.id], "exclude": [self.food_item2.id]}
+        r = self.client.post(self.menu_clone_url, data, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data['day'], "Friday")
+        self.assertEqual(r.data['food_item'], [self.food_item.id])
+
+    def test_clone_menu_already_exists(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.menu_clone_url, {}, format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data['message'], "Cannot upload more than one menu")
+
+    def test_clone_menu_published_concurrently(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        with mock.patch.object(QuerySet, 'exists', return_value=False):
+            r = self.client.post(self.menu_clone_url, {}, format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data['message'], "Cannot upload more than one menu")
+        self.assertEqual(Menu.objects.filter(restaurant=self.restaurant).count(), 1)
+
+    def test_clone_menu_to_past_day(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        r = self.client.post(self.menu_clone_url, {"service_date": yesterday}, format='json')
+        self.assertEqual(r.status_code, 400)
+
 
 class TestTodayMenu(APITestCase):
     email = 'test@gmail.com'
@@ -324,3 +514,200 @@ class TestTodayMenu(APITestCase):
         r = self.client.get(self.menu_list_url)
         self.assertEqual(r.status_code, 200)
         self.assertEqual(r.data[0]['restaurant'], self.restaurant.id)
+
+    def test_list_today_menu_excludes_other_days(self):
+        Menu.objects.create(restaurant=self.restaurant, day="Thursday",
+                            service_date=timezone.localdate() - datetime.timedelta(days=31))
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.menu_list_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([menu['id'] for menu in r.data], [self.menu.id])
+
+
+class TestTodayBoard(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="employee")
+        self.list_permission = Permission.objects.get(name='Can list menu')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.food_item = FoodItem.objects.create(name="Paneer", restaurant=self.restaurant, description="Nice dish",
+                                                 price=400, food_type='entree')
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        self.menu.food_item.set([self.food_item.id])
+        self.board_url = reverse('today_board')
+
+    def test_today_board_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.board_url)
+        self.assertEqual(r.status_code, 403)
+
+    def test_today_board_with_permission(self):
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.board_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.has_header('ETag'))
+        board = json.loads(r.content)
+        self.assertEqual(board['menus'][0]['restaurant_name'], "TGT")
+        self.assertEqual(board['menus'][0]['food_item'][0]['name'], "Paneer")
+
+    def test_today_board_gzip(self):
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        plain = self.client.get(self.board_url)
+        r = self.client.get(self.board_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(r['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(r.content), plain.content)
+        self.assertNotEqual(r['ETag'], plain['ETag'])
+
+    def test_today_board_not_modified_without_menu_queries(self):
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.board_url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(self.board_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r['ETag'], etag)
+        self.assertFalse([query for query in queries.captured_queries if 'restaurant_menu' in query['sql']])
+
+    def test_today_board_changes_after_write(self):
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.board_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food_item.name = "Paneer tikka"
+            self.food_item.save()
+        r = self.client.get(self.board_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r['ETag'], etag)
+        self.assertEqual(json.loads(r.content)['menus'][0]['food_item'][0]['name'], "Paneer tikka")
+
+    def test_today_board_changes_after_clone(self):
+        self.user.user_permissions.add(self.list_permission, Permission.objects.get(name='Can add menu'))
+        self.client.force_authenticate(user=self.user)
+        other_restaurant = Restaurant.objects.create(name="TGM", owner=self.user)
+        old_menu = Menu.objects.create(restaurant=other_restaurant, day="Monday",
+                                       service_date=timezone.localdate() - datetime.timedelta(days=3))
+        etag = self.client.get(self.board_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('clone_menu', kwargs={'id': old_menu.id}), {}, format='json')
+        r = self.client.get(self.board_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(json.loads(r.content)['menus']), 2)
+
+
+class TestMenuBatch(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        self.role = Role.objects.create(name="restaurant_owner")
+        self.add_permission = Permission.objects.get(name='Can add menu')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.user2 = User.objects.create_user(
+            email="test2@gmail.com",
+            password="test@123",
+            username="test2",
+            role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.restaurant2 = Restaurant.objects.create(name="TGM", owner=self.user)
+        self.other_restaurant = Restaurant.objects.create(name="Other", owner=self.user2)
+        self.food_item = FoodItem.objects.create(name="Paneer", restaurant=self.restaurant, description="Nice dish",
+                                                 price=400, food_type='entree')
+        self.food_item2 = FoodItem.objects.create(name="Naan", restaurant=self.restaurant2,
+                                                  description="Type of Roti", price=50, food_type='entree')
+        self.today = timezone.localdate()
+        self.menu_batch_url = reverse('batch_add_menu')
+
+    def week(self, restaurant, food_item, days=5):
+        return [{"restaurant": restaurant.id, "day": "Monday",
+                 "service_date": (self.today + datetime.timedelta(days=offset)).isoformat(),
+                 "food_item": [food_item.id, self.food_item.id]} for offset in range(1, days + 1)]
+
+    def test_batch_menu_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.menu_batch_url, self.week(self.restaurant, self.food_item), format='json')
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(r.data["detail"], "You do not have permission to perform this action.")
+
+    def test_batch_menu_with_permission(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        data = self.week(self.restaurant, self.food_item) + self.week(self.restaurant2, self.food_item2)
+        r = self.client.post(self.menu_batch_url, data, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(len(r.data), 10)
+        self.assertEqual(r.data[0]['menu']['food_item'], [self.food_item.id])
+        self.assertEqual(r.data[0]['rejected_food_item'], [])
+        self.assertEqual(r.data[5]['menu']['food_item'], [self.food_item2.id])
+        self.assertEqual(r.data[5]['rejected_food_item'], [self.food_item.id])
+        self.assertEqual(Menu.objects.filter(restaurant__in=[self.restaurant, self.restaurant2]).count(), 10)
+
+    def test_batch_menu_reports_invalid_entries(self):
+        Menu.objects.create(restaurant=self.restaurant, day="Monday",
+                            service_date=self.today + datetime.timedelta(days=1))
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        data = self.week(self.restaurant, self.food_item, days=2) + [
+            {"restaurant": self.other_restaurant.id, "day": "Monday"},
+            {"restaurant": self.restaurant2.id, "day": "Someday"},
+            {"restaurant": self.restaurant2.id, "day": "Monday",
+             "service_date": (self.today - datetime.timedelta(days=1)).isoformat()},
+        ]
+        r = self.client.post(self.menu_batch_url, data, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data[0]['errors'], {'service_date': ["Cannot upload more than one menu"]})
+        self.assertIn('menu', r.data[1])
+        self.assertEqual(r.data[2]['errors'], {'restaurant': ["Permission denied"]})
+        self.assertIn('day', r.data[3]['errors'])
+        self.assertIn('service_date', r.data[4]['errors'])
+
+    def test_batch_menu_day_published_concurrently(self):
+        Menu.objects.create(restaurant=self.restaurant, day="Monday",
+                            service_date=self.today + datetime.timedelta(days=1))
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        taken_service_days = services.taken_service_days
+        # The first plan of the batch misses the menu, as if it was published in the meantime
+        plans = iter([lambda *args: set(), taken_service_days])
+        with mock.patch('restaurant.services.taken_service_days', side_effect=lambda *args: next(plans)(*args)):
+            r = self.client.post(self.menu_batch_url, self.week(self.restaurant, self.food_item, days=2),
+                                 format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data[0]['errors'], {'service_date': ["Cannot upload more than one menu"]})
+        self.assertIn('menu', r.data[1])
+        self.assertEqual(Menu.objects.filter(restaurant=self.restaurant).count(), 2)
+
+    @override_settings(MENU_BATCH_MAX_SIZE=3)
+    def test_batch_menu_too_large(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.menu_batch_url, self.week(self.restaurant, self.food_item), format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Cannot publish more than 3 menus at once")
+
+    def test_batch_menu_queries_do_not_grow_with_batch(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(self.menu_batch_url, [], format='json')
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(self.menu_batch_url, self.week(self.restaurant, self.food_item, days=1), format='json')
+        with CaptureQueriesContext(connection) as large_batch:
+            self.client.post(self.menu_batch_url, self.week(self.restaurant2, self.food_item2, days=7),
+                             format='json')
+        self.assertEqual(len(small_batch), len(large_batch))
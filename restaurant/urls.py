@@ -1,7 +1,8 @@
 from django.urls import path
 
 from restaurant.views import RestaurantListCreateView, RestaurantRetrieveUpdateDeleteView, FoodItemListCreateView, \
-    FoodItemRetrieveUpdateView, MenuListCreateView, MenuRetrieveUpdateView, MenuListView
+    FoodItemRetrieveUpdateView, MenuListCreateView, MenuRetrieveUpdateView, MenuListView, MenuBatchCreateView, \
+    MenuCloneView, TodayBoardView
 
 urlpatterns = [
     path('', RestaurantListCreateView.as_view(), name="list_register_restaurant"),
@@ -11,8 +12,11 @@ urlpatterns = [
     path('food-item/<int:id>/', FoodItemRetrieveUpdateView.as_view(),
          name="retrieve_update_food_item"),
     path('menu/', MenuListCreateView.as_view(), name="list_add_menu"),
+    path('menu/batch/', MenuBatchCreateView.as_view(), name="batch_add_menu"),
     path('menu/<int:id>/', MenuRetrieveUpdateView.as_view(),
          name="retrieve_update_menu"),
+    path('menu/<int:id>/clone/', MenuCloneView.as_view(), name="clone_menu"),
     path('menu/current-day/', MenuListView.as_view(),
          name="list_today_menu"),
+    path('menu/today-board/', TodayBoardView.as_view(), name="today_board"),
 ]
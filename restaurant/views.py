@@ -1,27 +1,40 @@
-from datetime import date
-
-from django.db.models import ProtectedError, Q
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
 
 from internal_menu_selection.common_permissions import IsAuthorizedForListModel, IsAuthorizedForModel
-from internal_menu_selection.pagination import CustomPagination
+from internal_menu_selection.fast_serializers import FastListMixin
+from internal_menu_selection.pagination import CustomPagination, CustomCursorPagination
+from internal_menu_selection.query_planning import QueryPlanMixin
+from internal_menu_selection.response_cache import CachedResponseMixin
+from restaurant.board import get_board
 from restaurant.models import Restaurant, FoodItem, Menu, MenuFoodItem
 from restaurant.permissions import IsOwner, IsRestaurantOwner
-from restaurant.serializers import RestaurantSerializer, FoodItemSerializer, MenuSerializer
+from restaurant.serializers import RestaurantSerializer, FoodItemSerializer, MenuSerializer, MenuBatchEntrySerializer, \
+    MenuCloneSerializer
+from restaurant.services import requested_food_item_ids, resolve_food_items, add_menu_food_items, \
+    set_menu_food_items, publish_menus, clone_menu, is_duplicate_menu
+from users.models import User
 
 
-class RestaurantListCreateView(generics.ListCreateAPIView):
+class RestaurantListCreateView(CachedResponseMixin, QueryPlanMixin, FastListMixin, generics.ListCreateAPIView):
     """
     View for creating restaurant and view list of all restaurants
     """
     serializer_class = RestaurantSerializer
     queryset = Restaurant.objects.all().order_by('-id')
-    pagination_class = CustomPagination
+    cache_models = [Restaurant, User]
+    pagination_class = CustomCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['id', 'name', '-id', '-name']
+    ordering = ['-id']
     permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
 
     def post(self, request, *args, **kwargs):
@@ -31,7 +44,7 @@ class RestaurantListCreateView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class RestaurantRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class RestaurantRetrieveUpdateDeleteView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     View for retrieving, update and delete restaurant
     """
@@ -57,16 +70,18 @@ class RestaurantRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
 
-class FoodItemListCreateView(generics.ListCreateAPIView):
+class FoodItemListCreateView(CachedResponseMixin, QueryPlanMixin, FastListMixin, generics.ListCreateAPIView):
     """
     View for creating food items and view list of all food items
     """
     serializer_class = FoodItemSerializer
     queryset = FoodItem.objects.all().order_by('-id')
-    pagination_class = CustomPagination
+    cache_models = [FoodItem]
+    pagination_class = CustomCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['id', 'name', '-id', '-name']
+    ordering = ['-id']
     permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
 
     def post(self, request, *args, **kwargs):
@@ -80,7 +95,7 @@ class FoodItemListCreateView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class FoodItemRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+class FoodItemRetrieveUpdateView(QueryPlanMixin, generics.RetrieveUpdateAPIView):
     """
     View for retrieving, update and delete restaurant
     """
@@ -97,44 +112,84 @@ class FoodItemRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class MenuListCreateView(generics.ListCreateAPIView):
+class MenuListCreateView(CachedResponseMixin, QueryPlanMixin, generics.ListCreateAPIView):
     """
     View for creating menu and view list of all menu
     """
     serializer_class = MenuSerializer
     queryset = Menu.objects.all().order_by('-id')
-    pagination_class = CustomPagination
+    cache_models = [Menu, MenuFoodItem]
+    pagination_class = CustomCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['day']
     ordering_fields = ['id', 'name', '-id', '-name']
+    ordering = ['-id']
     permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        restaurant_id = request.data.get('restaurant')
-        rest_obj = Restaurant.objects.get(id=restaurant_id)
+        rest_obj = serializer.validated_data['restaurant']
         if request.user != rest_obj.owner:
             return Response({'error': "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-        today = date.today()
+        today = timezone.localdate()
+        if Menu.objects.filter(restaurant=rest_obj, service_date=today).exists():
+            return Response({"message": "Cannot upload more than one menu"}, status=status.HTTP_400_BAD_REQUEST)
+        food_item_ids, rejected_food_item_ids = resolve_food_items(rest_obj, requested_food_item_ids(request.data))
         try:
-            Menu.objects.get(restaurant=rest_obj, date_time__day=today.day)
+            with transaction.atomic():
+                menu_data = serializer.save()
+                add_menu_food_items(menu_data, food_item_ids)
+        except IntegrityError as error:
+            if not is_duplicate_menu(error):
+                raise
             return Response({"message": "Cannot upload more than one menu"}, status=status.HTTP_400_BAD_REQUEST)
-        except Menu.DoesNotExist:
-            pass
-        menu_data = serializer.save()
 
-        for food_item_id in request.data.get("food_item", []):
-            try:
-                food_item_obj = FoodItem.objects.get(Q(id=food_item_id) & Q(restaurant=rest_obj))
-                menu_data.food_item.add(food_item_obj)
-            except FoodItem.DoesNotExist:
-                pass
+        response_data = serializer.data
+        response_data['rejected_food_item'] = rejected_food_item_ids
+        return Response(response_data, status=status.HTTP_201_CREATED)
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+class MenuBatchCreateView(generics.CreateAPIView):
+    """
+    View for publishing several menus (e.g. the days of a week for each restaurant) in one request
+    """
+    serializer_class = MenuBatchEntrySerializer
+    queryset = Menu.objects.all()
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
 
-class MenuRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+    def post(self, request, *args, **kwargs):
+        entries = request.data if isinstance(request.data, list) else request.data.get('menus')
+        if not isinstance(entries, list) or not entries:
+            return Response({"message": "Expected a list of menus"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > settings.MENU_BATCH_MAX_SIZE:
+            return Response({"message": f"Cannot publish more than {settings.MENU_BATCH_MAX_SIZE} menus at once"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(entries)
+        valid_indexes, valid_entries = [], []
+        for index, entry in enumerate(entries):
+            serializer = self.get_serializer(data=entry)
+            if serializer.is_valid():
+                valid_indexes.append(index)
+                valid_entries.append(serializer.validated_data)
+            else:
+                results[index] = {'index': index, 'errors': serializer.errors}
+
+        published = publish_menus(request.user, valid_entries)
+        created_ids = [result['menu'].id for result in published if 'menu' in result]
+        created_menus = Menu.objects.prefetch_related('food_item').in_bulk(created_ids)
+        for index, result in zip(valid_indexes, published):
+            result['index'] = index
+            if 'menu' in result:
+                result['menu'] = MenuSerializer(created_menus[result['menu'].id]).data
+            results[index] = result
+
+        response_status = status.HTTP_201_CREATED if created_ids else status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+
+class MenuRetrieveUpdateView(QueryPlanMixin, generics.RetrieveUpdateAPIView):
     """
     View for retrieving, update menu
     """
@@ -147,38 +202,92 @@ class MenuRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data)
         serializer.is_valid(raise_exception=True)
-        restaurant_id = request.data.get('restaurant')
-        rest_obj = Restaurant.objects.get(id=restaurant_id)
+        rest_obj = serializer.validated_data['restaurant']
         if request.user != rest_obj.owner:
             return Response({'error': "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        if "food_item" in request.data:
-            MenuFoodItem.objects.filter(menu=instance).delete()
-        for food_item_id in request.data.get("food_item", []):
-            try:
-                food_item_obj = FoodItem.objects.get(Q(id=food_item_id) & Q(restaurant=rest_obj))
-                instance.food_item.add(food_item_obj)
-            except FoodItem.DoesNotExist:
-                pass
-        serializer.save()
+        food_item_ids, rejected_food_item_ids = resolve_food_items(rest_obj, requested_food_item_ids(request.data))
+        try:
+            with transaction.atomic():
+                serializer.save()
+                if "food_item" in request.data:
+                    set_menu_food_items(instance, food_item_ids)
+        except IntegrityError as error:
+            if not is_duplicate_menu(error):
+                raise
+            return Response({"message": "Cannot upload more than one menu"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        response_data = serializer.data
+        response_data['rejected_food_item'] = rejected_food_item_ids
+        return Response(response_data, status=status.HTTP_200_OK)
 
 
-class MenuListView(generics.ListAPIView):
+class TodayBoardView(generics.GenericAPIView):
+    """
+    View for the today board: all of today's menus with their restaurant and food items, served pre-rendered
+    """
+    queryset = Menu.objects.all()
+    permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
+
+    def get(self, request, *args, **kwargs):
+        board = get_board(timezone.localdate())
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        etag = board['gzip_etag'] if use_gzip else board['etag']
+        if_none_match = {tag[2:] if tag.startswith('W/') else tag
+                         for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(board['gzip'] if use_gzip else board['body'], content_type='application/json')
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class MenuCloneView(QueryPlanMixin, generics.GenericAPIView):
+    """
+    View for cloning a menu with its food items to another day
+    """
+    serializer_class = MenuCloneSerializer
+    queryset = Menu.objects.all()
+    lookup_field = 'id'
+    permission_classes = [IsAuthenticated, IsAuthorizedForModel, IsRestaurantOwner]
+
+    def post(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        service_date = serializer.validated_data['service_date']
+        menu_obj = clone_menu(instance, service_date,
+                              day=serializer.validated_data.get('day', service_date.strftime('%A')),
+                              include=serializer.validated_data.get('include'),
+                              exclude=serializer.validated_data.get('exclude'))
+        if menu_obj is None:
+            return Response({"message": "Cannot upload more than one menu"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(MenuSerializer(menu_obj).data, status=status.HTTP_201_CREATED)
+
+
+class MenuListView(CachedResponseMixin, QueryPlanMixin, generics.ListAPIView):
     """
     View for list of all menu
     """
     serializer_class = MenuSerializer
     queryset = Menu.objects.all().order_by('-id')
+    cache_models = [Menu, MenuFoodItem]
     pagination_class = CustomPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['day']
     ordering_fields = ['id', 'name', '-id', '-name']
     permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
 
-    def get(self, request, *args, **kwargs):
-        today = date.today()
-        today_menu = Menu.objects.filter(date_time__day=today.day)
+    def get_cache_key_suffix(self):
+        return timezone.localdate().isoformat()
+
+    def list(self, request, *args, **kwargs):
+        today = timezone.localdate()
+        today_menu = self.get_queryset().filter(service_date=today).order_by('-id')
         serializer = self.get_serializer(today_menu, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import Group
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
+from internal_menu_selection.response_cache import invalidate_responses
 from roles.models import Role
+from users.permission_index import invalidate_permissions
 
 
 @receiver(pre_save, sender=Role)
@@ -20,3 +22,10 @@ def update_group(sender, instance, **kwargs):
 def delete_group(sender, instance, **kwargs):
     _, _ = sender, kwargs
     Group.objects.filter(name=instance.name).delete()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_cached_roles(sender, **kwargs):
+    invalidate_responses(Role)
+    invalidate_permissions(roles=True)
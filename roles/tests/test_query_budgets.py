@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection.query_budgets import query_budget
+from roles.models import Role
+from users.models import User
+
+
+class TestRoleQueryBudgets(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('sync_permissions', stdout=StringIO())
+        self.admin = User.objects.create_user(email="admin@gmail.com", password="test@123", username="admin",
+                                              role=Role.objects.get(name="admin"))
+        self.client.force_authenticate(user=self.admin)
+
+    def test_list_roles(self):
+        for count in (5, 10):
+            Role.objects.bulk_create(Role(name=f"Role {number}") for number in range(Role.objects.count(), count))
+            cache.clear()
+            with query_budget('List_Create_Role', 'GET', rows=Role.objects.count()):
+                self.assertEqual(self.client.get(reverse('List_Create_Role')).status_code, 200)
+
+    def test_create_role(self):
+        with query_budget('List_Create_Role', 'POST', rows=1):
+            self.assertEqual(self.client.post(reverse('List_Create_Role'), {"name": "chef"}).status_code, 201)
+
+    def test_role_detail(self):
+        role = Role.objects.create(name="chef")
+        url = reverse('Retrieve_Update_Delete_Role', kwargs={'id': role.id})
+        with query_budget('Retrieve_Update_Delete_Role', 'GET', rows=1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget('Retrieve_Update_Delete_Role', 'PUT', rows=1):
+            self.assertEqual(self.client.put(url, {"name": "cook"}).status_code, 200)
+        with query_budget('Retrieve_Update_Delete_Role', 'PATCH', rows=1):
+            self.assertEqual(self.client.patch(url, {"name": "chef"}).status_code, 200)
+        with query_budget('Retrieve_Update_Delete_Role', 'DELETE', rows=1):
+            self.assertEqual(self.client.delete(url).status_code, 204)
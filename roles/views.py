@@ -4,7 +4,8 @@ from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
 
 from internal_menu_selection.common_permissions import IsAuthorizedForModel, IsAuthorizedForListModel
-from internal_menu_selection.pagination import CustomPagination
+from internal_menu_selection.pagination import CustomCursorPagination
+from internal_menu_selection.response_cache import CachedResponseMixin
 from roles.models import Role
 from roles.serializers import RoleSerializer
 
@@ -29,14 +30,16 @@ class RoleRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         return Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
 
 
-class RoleListCreateView(generics.ListCreateAPIView):
+class RoleListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
     """
     View to Add role and view list of roles
     """
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
-    pagination_class = CustomPagination
+    cache_models = [Role]
+    pagination_class = CustomCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['id', 'name', '-id', '-name']
+    ordering = ['-id']
     permission_classes = [IsAuthenticated, DjangoModelPermissions, IsAuthorizedForListModel]
@@ -0,0 +1,126 @@
+import threading
+import time
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from users.login import get_last_login_buffer
+from users.models import User
+from users.permission_index import VERSION_KEY, acurrent_version, current_version
+from users.shared_state import is_shared, shared_cache
+
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields
+               if field.attname in {'id', 'username', 'role_id', 'is_active', 'is_superuser'}]
+
+
+def lightweight_user(**values):
+    """
+    Build a user from a few of its fields, the others are deferred and loaded only if they are accessed
+    """
+    return User.from_db('default', USER_FIELDS, [values[field] for field in USER_FIELDS])
+
+
+def revoked_key(user_id):
+    return f"users:revoked:{user_id}"
+
+
+def stamp_claims(token, user, version=None):
+    """
+    Embed what permission checks need to know about the user in a token, with the current permission version
+    unless given
+    """
+    token['username'] = user.username
+    token['role'] = user.role_id
+    token['is_superuser'] = user.is_superuser
+    token['perm_version'] = current_version() if version is None else version
+    return token
+
+
+def revoke_tokens(user_id):
+    """
+    Stop trusting the claims of the tokens issued to a user until now: they are checked against the database
+    until they expire
+    """
+    shared_cache().set(revoked_key(user_id), int(time.time()),
+                       timeout=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()))
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer for login, issuing tokens with the claims of the user
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        return stamp_claims(super().get_token(user), user)
+
+    @classmethod
+    async def aget_token(cls, user):
+        """
+        Async get_token, reading the permission version from the shared state cache without blocking the event loop
+        """
+        return stamp_claims(super().get_token(user), user, await acurrent_version())
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        get_last_login_buffer().record(self.user.id)
+        return data
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication building the user from the claims of the token instead of querying it.
+
+    The claims are trusted while their permission version is the current one and the user's tokens were not
+    revoked since the token was issued; otherwise the user is loaded from the database, once per process and
+    permission version. Both are read from the shared state cache: when it is local to the process, revocations
+    of the other processes are not seen and every token is checked against the database.
+    """
+
+    def get_user(self, validated_token):
+        if 'perm_version' not in validated_token or api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        cache = shared_cache()
+        if not is_shared(cache):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        cached = cache.get_many([VERSION_KEY, revoked_key(user_id)])
+        version = cached.get(VERSION_KEY) or current_version()
+        revoked_at = cached.get(revoked_key(user_id))
+        if revoked_at is not None and validated_token.get('iat', 0) <= revoked_at:
+            return super().get_user(validated_token)
+        if validated_token['perm_version'] == version:
+            return lightweight_user(id=user_id, username=validated_token['username'],
+                                    role_id=validated_token['role'], is_active=True,
+                                    is_superuser=validated_token['is_superuser'])
+        return _verified_users.get(user_id, version, lambda: super(StatelessJWTAuthentication, self).get_user(
+            validated_token))
+
+
+class VerifiedUsers:
+    """
+    Users loaded from the database for tokens with an outdated permission version, valid until the version moves
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.users = {}
+
+    def get(self, user_id, version, load):
+        with self.lock:
+            if self.version != version:
+                self.version = version
+                self.users = {}
+            values = self.users.get(user_id)
+        if values is None:
+            user = load()
+            values = {field: getattr(user, field) for field in USER_FIELDS}
+            with self.lock:
+                if self.version == version:
+                    self.users[user_id] = values
+        return lightweight_user(**values)
+
+
+_verified_users = VerifiedUsers()
@@ -0,0 +1,34 @@
+from django.contrib.auth.backends import ModelBackend
+
+from users.permission_index import get_permission_index
+
+
+class IndexedModelBackend(ModelBackend):
+    """
+    Authentication backend answering permission checks from the in-process permission index
+    instead of querying the permissions of the user and of its groups
+    """
+
+    def get_user_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_permission_index().direct_permissions(user_obj.id))
+
+    def get_group_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_permission_index().role_permissions(user_obj.role_id))
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj)
+        return self.get_user_permissions(user_obj) | self.get_group_permissions(user_obj)
+
+    def has_perm(self, user_obj, perm, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return False
+        if user_obj.is_superuser:
+            return super().has_perm(user_obj, perm, obj)
+        return get_permission_index().has_perm(user_obj, perm)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+
+from users.authentication import StatelessJWTAuthentication
+from users.shared_state import is_shared, shared_cache, shared_state_settings
+
+
+@register(Tags.caches)
+def check_stateless_authentication_cache(app_configs, **kwargs):
+    """
+    StatelessJWTAuthentication only trusts the claims of the tokens with a shared state cache: with a cache local
+    to the process every request loads its user from the database. An error outside DEBUG, a warning with it.
+    """
+    authentication_classes = [import_string(path) if isinstance(path, str) else path
+                              for path in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    if not any(issubclass(cls, StatelessJWTAuthentication) for cls in authentication_classes):
+        return []
+    cache = shared_cache()
+    if is_shared(cache):
+        return []
+    alias = shared_state_settings()['CACHE']
+    message = (f"StatelessJWTAuthentication loads the user of every request from the database: the shared state "
+               f"cache {alias!r} is a {type(cache).__name__}, local to the process.")
+    hint = ("Set SHARED_CACHE_BACKEND and SHARED_CACHE_LOCATION to a cache shared by every process that never evicts "
+            "live keys, e.g. redis with maxmemory-policy noeviction.")
+    if settings.DEBUG:
+        return [Warning(message, hint=hint, id='users.W001')]
+    return [Error(message, hint=hint, id='users.E001')]
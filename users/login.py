@@ -0,0 +1,137 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOGIN = {
+    'HASH_WORKERS': 4,
+    'MAX_QUEUE': 32,
+    'RETRY_AFTER': 1,
+    'LAST_LOGIN_FLUSH_INTERVAL': 5,
+}
+
+UPDATE_LAST_LOGIN_SQL = """
+    UPDATE {table} AS account SET last_login = login.last_login
+    FROM (VALUES {rows}) AS login(id, last_login)
+    WHERE account.id = login.id AND (account.last_login IS NULL OR account.last_login < login.last_login)
+"""
+
+
+def login_settings():
+    return {**DEFAULT_LOGIN, **getattr(settings, 'LOGIN', {})}
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Bounded pool of threads verifying passwords (PBKDF2 releases the GIL while hashing).
+
+    At most `workers` hashes run at once and `max_queue` more wait for a thread; beyond that new logins are
+    refused at once with PoolSaturated instead of queueing behind the burst.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self.capacity = workers + max_queue
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def release(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    async def run(self, func, *args):
+        with self.lock:
+            if self.pending >= self.capacity:
+                raise PoolSaturated
+            self.pending += 1
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self.release)
+        return await asyncio.wrap_future(future)
+
+
+class LastLoginBuffer:
+    """
+    Coalesce the last_login updates of the logins into one UPDATE every `flush_interval` seconds
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self.logins = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.flusher = None
+
+    def record(self, user_id, when=None):
+        with self.lock:
+            self.logins[user_id] = when or timezone.now()
+            if self.flusher is None or not self.flusher.is_alive():
+                self.stopping.clear()
+                self.flusher = threading.Thread(target=self.run, name='last-login-flusher', daemon=True)
+                self.flusher.start()
+
+    def run(self):
+        while not self.stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write the last logins")
+            finally:
+                connection.close()
+
+    def flush(self):
+        with self.lock:
+            logins, self.logins = self.logins, {}
+        if not logins:
+            return 0
+        rows = sorted(logins.items())
+        with connection.cursor() as cursor:
+            cursor.execute(UPDATE_LAST_LOGIN_SQL.format(
+                table=connection.ops.quote_name(User._meta.db_table),
+                rows=", ".join(["(%s::bigint, %s::timestamptz)"] * len(rows))),
+                [value for row in rows for value in row])
+        return len(rows)
+
+    def stop(self):
+        self.stopping.set()
+        if self.flusher is not None:
+            self.flusher.join()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write the last logins")
+
+
+_hashing_pool = None
+_last_login_buffer = None
+_login_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _hashing_pool
+    with _login_lock:
+        if _hashing_pool is None:
+            config = login_settings()
+            _hashing_pool = HashingPool(config['HASH_WORKERS'], config['MAX_QUEUE'])
+        return _hashing_pool
+
+
+def get_last_login_buffer():
+    global _last_login_buffer
+    with _login_lock:
+        if _last_login_buffer is None:
+            _last_login_buffer = LastLoginBuffer(login_settings()['LAST_LOGIN_FLUSH_INTERVAL'])
+            atexit.register(_last_login_buffer.stop)
+        return _last_login_buffer
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from users.serializers import EmployeeBulkEntrySerializer
+from users.services import read_employee_rows, onboard_employees
+
+
+class Command(BaseCommand):
+    help = "Register employees in bulk from a CSV file (with a header row) or a JSON list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file with email, username, password, first_name, "
+                                         "last_name and role (id or name) of every employee")
+        parser.add_argument('--format', choices=['csv', 'json'], help="File format, defaults to the extension")
+        parser.add_argument('--workers', type=int, help="Number of threads hashing the passwords")
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('json' if options['path'].endswith('.json') else 'csv')
+        try:
+            with open(options['path'], encoding='utf-8') as employees_file:
+                entries = read_employee_rows(employees_file.read(), file_format)
+        except (OSError, ValueError) as err:
+            raise CommandError(f"Could not read {options['path']}: {err}")
+        if not isinstance(entries, list):
+            raise CommandError("Expected a list of employees")
+
+        rejected = 0
+        valid_rows, valid_entries = [], []
+        for index, entry in enumerate(entries):
+            serializer = EmployeeBulkEntrySerializer(data=entry)
+            if serializer.is_valid():
+                valid_rows.append(index)
+                valid_entries.append(serializer.validated_data)
+            else:
+                rejected += 1
+                self.report_errors(index, serializer.errors)
+
+        try:
+            results = onboard_employees(valid_entries, workers=options['workers'])
+        except IntegrityError as err:
+            raise CommandError(f"Employees were registered concurrently, nothing was imported: {err}")
+        for index, result in zip(valid_rows, results):
+            if 'errors' in result:
+                rejected += 1
+                self.report_errors(index, result['errors'])
+        self.stdout.write(f"Imported {len(entries) - rejected} employees, rejected {rejected} rows")
+
+    def report_errors(self, index, errors):
+        details = "; ".join(f"{field}: {' '.join(str(message) for message in messages)}"
+                            for field, messages in errors.items())
+        self.stderr.write(f"Row {index + 1}: {details}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.permission_manifest import ROLE_PERMISSIONS
+from users.services import sync_role_permissions
+
+
+class Command(BaseCommand):
+    help = "Create the roles and give their groups exactly the permissions of the permission manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the changes to apply")
+
+    def handle(self, *args, **options):
+        try:
+            report = sync_role_permissions(ROLE_PERMISSIONS, dry_run=options['dry_run'])
+        except ValueError as err:
+            raise CommandError(str(err))
+
+        if not report['created_roles'] and not report['changes']:
+            self.stdout.write("Permissions already in sync")
+            return
+        dry_run = options['dry_run']
+        for name in report['created_roles']:
+            self.stdout.write(f"{'Would create' if dry_run else 'Created'} role {name}")
+        for name, change in report['changes'].items():
+            if change['added']:
+                self.stdout.write(f"{'Would add to' if dry_run else 'Added to'} {name}: {', '.join(change['added'])}")
+            if change['removed']:
+                self.stdout.write(f"{'Would remove from' if dry_run else 'Removed from'} {name}: "
+                                  f"{', '.join(change['removed'])}")
@@ -0,0 +1,21 @@
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from users.services import read_employee_rows
+
+
+class CSVParser(BaseParser):
+    """
+    Parse a CSV document with a header row into a list of rows
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return read_employee_rows(stream.read().decode(encoding), 'csv')
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
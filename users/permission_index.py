@@ -0,0 +1,286 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.db import connection, transaction
+
+from roles.models import Role
+from users.shared_state import shared_cache, warn_if_local
+
+VERSION_KEY = 'users:permission-index:version'
+
+DEFAULT_PERMISSION_INDEX = {
+    'VERSION_CHECK_INTERVAL': 1.0,
+}
+
+
+def permission_index_settings():
+    return {**DEFAULT_PERMISSION_INDEX, **getattr(settings, 'PERMISSION_INDEX', {})}
+
+
+def current_version():
+    """
+    Return the shared version stamp of the permissions, moved by every permission or role change
+    """
+    cache = shared_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acurrent_version():
+    """
+    Async current_version, for views running on the event loop
+    """
+    cache = shared_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def permission_names(rows):
+    """
+    Group (key, app_label, codename) rows into sets of "app_label.codename" permission names by key
+    """
+    permissions = {}
+    for key, app_label, codename in rows:
+        permissions.setdefault(key, set()).add(f"{app_label}.{codename}")
+    return {key: frozenset(names) for key, names in permissions.items()}
+
+
+class PermissionIndex:
+    """
+    Process-wide index of the permissions of every role (through the group named after it) and of the
+    permissions given directly to users, so permission checks are set lookups instead of queries.
+
+    Writes mark the affected groups, roles or users stale and the index refreshes only those on the next
+    check. Other processes learn about a change from the version stamp kept in the shared cache, checked
+    at most every VERSION_CHECK_INTERVAL seconds, and rebuild their index when it moved.
+
+    Refreshes query the database outside of `lock`, which only guards the swap of their results, one at a time.
+    A check waits for the refresh of the changes this process marked before it; rebuilds for the changes of other
+    processes, seen up to VERSION_CHECK_INTERVAL late anyway, are not waited for once the index is built.
+
+    Changes are marked once their transaction commits, and the index is never refreshed inside a transaction,
+    whose reads may be rolled back: checks made there that it cannot answer as it is, or after the transaction
+    changed permissions, are answered by the index of that transaction (see `transaction_index`).
+    """
+
+    def __init__(self, version_check_interval):
+        self.version_check_interval = version_check_interval
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.built = False
+        self.version = None
+        self.next_version_check = 0
+        self.group_permissions = {}
+        self.role_groups = {}
+        self.user_permissions = {}
+        self.stale_all = True
+        self.stale_roles = False
+        self.stale_groups = set()
+        self.stale_users = set()
+        # Number of mark_stale calls, and how many of them the maps include
+        self.marks = 0
+        self.refreshed_marks = 0
+
+    def refresh(self):
+        """
+        Refresh the index and return the one answering the checks of this thread
+        """
+        if connection.in_atomic_block:
+            index = transaction_index(create=not self.is_fresh())
+            if index is not None:
+                return index.refresh()
+            return self
+        self.refresh_stale()
+        return self
+
+    def is_fresh(self):
+        self.check_version()
+        return (self.built and self.refreshed_marks == self.marks
+                and not (self.stale_all or self.stale_roles or self.stale_groups or self.stale_users))
+
+    def refresh_stale(self):
+        self.check_version()
+        # The marks of this process are cleared when a refresh starts, so they are waited for until it ends
+        wait = not self.built or self.refreshed_marks < self.marks
+        if not (wait or self.stale_all or self.stale_roles or self.stale_groups or self.stale_users):
+            return
+        if not self.refresh_lock.acquire(blocking=wait):
+            return
+        try:
+            with self.lock:
+                everything, roles, groups, users = (self.stale_all, self.stale_roles, self.stale_groups,
+                                                    self.stale_users)
+                if not (everything or roles or groups or users):
+                    # Refreshed by the thread this one waited for
+                    return
+                marks = self.marks
+                self.stale_all = self.stale_roles = False
+                self.stale_groups = set()
+                self.stale_users = set()
+            if everything:
+                self.rebuild(marks)
+            else:
+                self.update(marks, roles, groups, users)
+        finally:
+            self.refresh_lock.release()
+
+    def check_version(self):
+        now = time.monotonic()
+        if now < self.next_version_check:
+            return
+        with self.lock:
+            if now < self.next_version_check:
+                return
+            self.next_version_check = now + self.version_check_interval
+        version = current_version()
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.stale_all = True
+
+    def rebuild(self, marks):
+        role_groups = dict(Role.objects.values_list('id', 'name'))
+        group_permissions = permission_names(Permission.objects.filter(group__isnull=False).values_list(
+            'group__name', 'content_type__app_label', 'codename'))
+        user_permissions = permission_names(Permission.objects.filter(user__isnull=False).values_list(
+            'user__id', 'content_type__app_label', 'codename'))
+        with self.lock:
+            self.role_groups = role_groups
+            self.group_permissions = group_permissions
+            self.user_permissions = user_permissions
+            self.refreshed_marks = marks
+            self.built = True
+
+    def update(self, marks, roles, groups, users):
+        role_groups = dict(Role.objects.values_list('id', 'name')) if roles else None
+        group_permissions = user_permissions = {}
+        if groups:
+            permissions = permission_names(Permission.objects.filter(group__name__in=groups).values_list(
+                'group__name', 'content_type__app_label', 'codename'))
+            group_permissions = {name: permissions.get(name, frozenset()) for name in groups}
+        if users:
+            permissions = permission_names(Permission.objects.filter(user__id__in=users).values_list(
+                'user__id', 'content_type__app_label', 'codename'))
+            user_permissions = {user_id: permissions.get(user_id, frozenset()) for user_id in users}
+        with self.lock:
+            if role_groups is not None:
+                self.role_groups = role_groups
+            self.group_permissions = {**self.group_permissions, **group_permissions}
+            self.user_permissions = {**self.user_permissions, **user_permissions}
+            self.refreshed_marks = marks
+
+    def role_permissions(self, role_id):
+        index = self.refresh()
+        return index.group_permissions.get(index.role_groups.get(role_id), frozenset())
+
+    def direct_permissions(self, user_id):
+        index = self.refresh()
+        return index.user_permissions.get(user_id, frozenset())
+
+    def has_perm(self, user, perm):
+        index = self.refresh()
+        return (perm in index.group_permissions.get(index.role_groups.get(user.role_id), ())
+                or perm in index.user_permissions.get(user.id, ()))
+
+    def mark_stale(self, roles=False, groups=(), users=(), everything=False):
+        with self.lock:
+            self.marks += 1
+            self.stale_all = self.stale_all or everything
+            self.stale_roles = self.stale_roles or roles
+            self.stale_groups.update(groups)
+            self.stale_users.update(users)
+
+    def publish(self):
+        """
+        Move the shared version stamp so the other processes rebuild their index
+        """
+        version = uuid.uuid4().hex
+        shared_cache().set(VERSION_KEY, version, timeout=None)
+        with self.lock:
+            self.version = version
+
+
+class TransactionPermissionIndex(PermissionIndex):
+    """
+    Index of the permissions as the current transaction sees them, with its uncommitted changes. `callbacks` are
+    its on-commit callbacks: the first one drops the index with the transaction, the others publish its changes.
+    """
+
+    def __init__(self):
+        super().__init__(version_check_interval=None)
+        self.callbacks = [self.end]
+
+    def refresh(self):
+        self.refresh_stale()
+        return self
+
+    def check_version(self):
+        # Rebuilt by every transaction, so other processes' changes are already read
+        pass
+
+    def end(self):
+        pass
+
+
+def transaction_index(create=False):
+    """
+    Index of the current transaction, created when `create` is true. It is dropped once its first callback is no
+    longer registered, when the transaction ended or the savepoint it was created in was rolled back, and rebuilt
+    when a rolled back savepoint took changes of the transaction with it.
+    """
+    index = getattr(connection, 'permission_index', None)
+    if index is not None:
+        registered = [entry[1] for entry in connection.run_on_commit if entry[1] in index.callbacks]
+        if index.end not in registered:
+            index = None
+        elif len(registered) < len(index.callbacks):
+            index.callbacks = registered
+            index.mark_stale(everything=True)
+    if index is None and create:
+        index = TransactionPermissionIndex()
+        transaction.on_commit(index.end)
+    connection.permission_index = index
+    return index
+
+
+_permission_index = None
+_permission_index_lock = threading.Lock()
+
+
+def get_permission_index():
+    global _permission_index
+    with _permission_index_lock:
+        if _permission_index is None:
+            warn_if_local("The permission version stamp")
+            _permission_index = PermissionIndex(permission_index_settings()['VERSION_CHECK_INTERVAL'])
+        return _permission_index
+
+
+def invalidate_permissions(roles=False, groups=(), users=(), everything=False):
+    """
+    Refresh the given parts of the index of this process once the current transaction commits, when the change is
+    also published to the other processes. Until then, the checks of the transaction are answered by its own
+    index. Bulk writes that bypass the model signals should call it with everything=True.
+    """
+    index = get_permission_index()
+
+    def on_commit():
+        index.mark_stale(roles, groups, users, everything)
+        index.publish()
+
+    if connection.in_atomic_block:
+        own_index = transaction_index(create=True)
+        own_index.mark_stale(roles, groups, users, everything)
+        transaction.on_commit(on_commit)
+        own_index.callbacks.append(on_commit)
+    else:
+        on_commit()
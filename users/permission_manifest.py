@@ -0,0 +1,20 @@
+"""
+Permissions of every role, applied by `python manage.py sync_permissions`.
+
+Every role gets the group of the same name holding exactly the listed permission codenames,
+or every permission for ALL_PERMISSIONS.
+"""
+ALL_PERMISSIONS = '__all__'
+
+ROLE_PERMISSIONS = {
+    'admin': ALL_PERMISSIONS,
+    'restaurant_owner': [
+        'view_restaurant', 'list_restaurant', 'add_restaurant', 'change_restaurant', 'delete_restaurant',
+        'view_fooditem', 'add_fooditem', 'change_fooditem', 'delete_fooditem', 'list_fooditem',
+        'list_menu', 'view_menu', 'add_menu', 'change_menu',
+    ],
+    'employee': [
+        'view_fooditem', 'list_fooditem', 'list_menu', 'view_menu',
+        'add_uservote', 'list_uservote', 'list_dailyresult',
+    ],
+}
@@ -0,0 +1,94 @@
+"""
+Compare the database-backed JWT authentication against the stateless one on the vote and menu endpoints.
+
+Runs against a throwaway test database:
+    python manage.py runscript benchmark_stateless_auth --script-args 500
+"""
+import contextlib
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, CaptureQueriesContext, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from restaurant.models import Restaurant, Menu
+from restaurant.views import MenuListView, MenuListCreateView
+from roles.models import Role
+from users.authentication import ClaimsTokenObtainPairSerializer
+from users.models import User
+from users.shared_state import is_shared, shared_cache
+from vote.models import UserVote, VoteTally
+from vote.views import VoteCreateView
+
+VIEWS = [VoteCreateView, MenuListView, MenuListCreateView]
+
+
+def create_employees(count):
+    role = Role.objects.create(name="employee")
+    group = Group.objects.get(name=role.name)
+    group.permissions.add(*Permission.objects.filter(codename__in=['add_uservote', 'list_menu']))
+    password = make_password("benchmark")
+    users = User.objects.bulk_create(
+        User(username=f"employee{i}", email=f"employee{i}@example.com", password=password, role=role)
+        for i in range(count))
+    User.groups.through.objects.bulk_create(User.groups.through(user_id=user.id, group_id=group.id) for user in users)
+    return users
+
+
+def measure(client, tokens, request):
+    latencies = []
+    user_queries = 0
+    for token in tokens:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request()
+            latencies.append(time.perf_counter() - start)
+        assert response.status_code in (200, 201), response.content
+        user_queries += sum('FROM "AuthUsers"' in query['sql'] for query in queries.captured_queries)
+    return latencies, user_queries
+
+
+def report(label, latencies, user_queries):
+    print(f"{label:<45} mean {statistics.mean(latencies) * 1000:.2f} ms  "
+          f"user queries/request {user_queries / len(latencies):.2f}")
+
+
+def run(*args):
+    count = int(args[0]) if args else 500
+    if not is_shared(shared_cache()):
+        print("The shared state cache is local to the process, so the stateless mode checks every token against the "
+              "database: set SHARED_CACHE_BACKEND/SHARED_CACHE_LOCATION to measure it")
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        users = create_employees(count)
+        menu = Menu.objects.create(restaurant=Restaurant.objects.create(name="Benchmark", owner=users[0]),
+                                   day="Monday")
+        tokens = [str(ClaimsTokenObtainPairSerializer.get_token(user).access_token) for user in users]
+        client = APIClient()
+        requests = [
+            ("POST vote/current-day/", lambda: client.post(reverse('Add_Vote'), {"menu": menu.id})),
+            ("GET restaurant/menu/current-day/", lambda: client.get(reverse('list_today_menu'))),
+            ("GET restaurant/menu/", lambda: client.get(reverse('list_add_menu'))),
+        ]
+        for mode in ("database", "stateless"):
+            with contextlib.ExitStack() as stack:
+                stack.enter_context(override_settings(VOTING_CUTOFF='23:59:59.999999'))
+                if mode == "database":
+                    for view in VIEWS:
+                        stack.enter_context(mock.patch.object(view, 'authentication_classes', [JWTAuthentication]))
+                UserVote.objects.all().delete()
+                VoteTally.objects.all().delete()
+                for label, request in requests:
+                    report(f"{mode:<10} {label}", *measure(client, tokens, request))
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
@@ -1,3 +1,4 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 
 from users.models import User
@@ -36,3 +37,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'role', 'email', 'username', 'first_name', 'last_name']
+
+
+class EmployeeBulkEntrySerializer(serializers.Serializer):
+    """
+    Serializer for one employee of a bulk registration, validated without touching the database
+    """
+    email = serializers.EmailField(max_length=254)
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    password = serializers.CharField(write_only=True)
+    first_name = serializers.CharField(max_length=50)
+    last_name = serializers.CharField(max_length=50)
+    role = serializers.CharField()
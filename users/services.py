@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models import Q
+
+from internal_menu_selection.response_cache import invalidate_responses
+from roles.models import Role
+from users.models import User
+from users.permission_index import invalidate_permissions
+from users.permission_manifest import ALL_PERMISSIONS
+
+PARALLEL_HASH_MIN = 8
+
+
+def read_employee_rows(content, file_format):
+    """
+    Read the employees of a CSV file with a header row, or of a JSON list (or {"employees": [...]})
+    """
+    if file_format == 'json':
+        data = json.loads(content)
+        return data if isinstance(data, list) else data.get('employees')
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+_hashing_pool = None
+_hashing_pool_lock = threading.Lock()
+
+
+def hash_workers():
+    return settings.EMPLOYEE_ONBOARDING['HASH_WORKERS'] or os.cpu_count()
+
+
+def get_hashing_pool():
+    """
+    Threads hashing the passwords of the registrations, shared by the requests of the process
+    """
+    global _hashing_pool
+    with _hashing_pool_lock:
+        if _hashing_pool is None:
+            _hashing_pool = ThreadPoolExecutor(max_workers=hash_workers(), thread_name_prefix='onboarding-hash')
+        return _hashing_pool
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash passwords on threads (PBKDF2 releases the GIL while hashing): the shared pool, or `workers` threads of
+    their own when given. A handful of passwords are hashed inline.
+    """
+    if (workers or hash_workers()) <= 1 or len(passwords) < PARALLEL_HASH_MIN:
+        return [make_password(password) for password in passwords]
+    if workers is None:
+        return list(get_hashing_pool().map(make_password, passwords))
+    with ThreadPoolExecutor(max_workers=min(workers, len(passwords)), thread_name_prefix='onboarding-hash') as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def onboard_employees(entries, workers=None):
+    """
+    Register a batch of validated employees (email, username, password, first_name, last_name, role id or name)
+    with a fixed number of queries. Returns one result per entry, in order, with the created `user` or the
+    `errors` of the entry.
+    """
+    results = [{'index': index} for index in range(len(entries))]
+    roles = {}
+    for role_id, name in Role.objects.values_list('id', 'name'):
+        roles[str(role_id)] = roles[name] = (role_id, name)
+    groups = dict(Group.objects.filter(name__in={name for _, name in roles.values()}).values_list('name', 'id'))
+    taken = User.objects.filter(Q(email__in={entry['email'] for entry in entries})
+                                | Q(username__in={entry['username'] for entry in entries})).values_list(
+        'email', 'username')
+    taken_emails = {email for email, _ in taken}
+    taken_usernames = {username for _, username in taken}
+
+    accepted = []
+    for entry, result in zip(entries, results):
+        errors = {}
+        role = roles.get(str(entry['role']))
+        if role is None:
+            errors['role'] = [f"Invalid role \"{entry['role']}\" - object does not exist."]
+        elif role[1] not in groups:
+            errors['role'] = [f"Role \"{role[1]}\" has no permission group"]
+        if entry['email'] in taken_emails:
+            errors['email'] = ["user with this email already exists."]
+        if entry['username'] in taken_usernames:
+            errors['username'] = ["A user with that username already exists."]
+        if errors:
+            result['errors'] = errors
+            continue
+        taken_emails.add(entry['email'])
+        taken_usernames.add(entry['username'])
+        accepted.append((entry, result, role))
+
+    passwords = hash_passwords([entry['password'] for entry, _, _ in accepted], workers)
+    users = [User(email=entry['email'], username=entry['username'], password=password,
+                  first_name=entry['first_name'], last_name=entry['last_name'], role_id=role[0])
+             for (entry, _, role), password in zip(accepted, passwords)]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user.id, group_id=groups[role[1]])
+            for user, (_, _, role) in zip(users, accepted))
+        invalidate_responses(User)
+    for user, (_, result, _) in zip(users, accepted):
+        result['user'] = user
+    return results
+
+
+def sync_role_permissions(manifest, dry_run=False):
+    """
+    Make the roles, their groups and the group permissions match a role -> permission codenames manifest,
+    inserting and deleting the differing group permissions in bulk within one transaction.
+    Returns the created roles and the codenames added to and removed from every role.
+    """
+    permissions = {}
+    for permission_id, codename in Permission.objects.values_list('id', 'codename'):
+        permissions.setdefault(codename, []).append(permission_id)
+    unknown = sorted({codename for codenames in manifest.values() if codenames != ALL_PERMISSIONS
+                      for codename in codenames} - set(permissions))
+    if unknown:
+        raise ValueError(f"Unknown permissions in the manifest: {', '.join(unknown)}")
+    codenames = {permission_id: codename for codename, ids in permissions.items() for permission_id in ids}
+
+    with transaction.atomic():
+        missing_roles = sorted(set(manifest) - set(Role.objects.filter(name__in=manifest).values_list(
+            'name', flat=True)))
+        groups = dict(Group.objects.filter(name__in=manifest).values_list('name', 'id'))
+        if not dry_run and (missing_roles or len(groups) < len(manifest)):
+            Role.objects.bulk_create(Role(name=name) for name in missing_roles)
+            Group.objects.bulk_create(Group(name=name) for name in manifest if name not in groups)
+            groups = dict(Group.objects.filter(name__in=manifest).values_list('name', 'id'))
+
+        current = {}
+        through = Group.permissions.through
+        for row_id, group_id, permission_id in through.objects.filter(group_id__in=groups.values()).values_list(
+                'id', 'group_id', 'permission_id'):
+            current.setdefault(group_id, {})[permission_id] = row_id
+
+        changes = {}
+        to_add, to_remove = [], []
+        for name, wanted_codenames in manifest.items():
+            wanted = set(codenames) if wanted_codenames == ALL_PERMISSIONS else {
+                permission_id for codename in wanted_codenames for permission_id in permissions[codename]}
+            existing = current.get(groups.get(name), {})
+            added, removed = wanted - set(existing), set(existing) - wanted
+            if added or removed:
+                changes[name] = {'added': sorted(codenames[permission_id] for permission_id in added),
+                                 'removed': sorted(codenames[permission_id] for permission_id in removed)}
+            if name in groups:
+                to_add.extend(through(group_id=groups[name], permission_id=permission_id) for permission_id in added)
+                to_remove.extend(existing[permission_id] for permission_id in removed)
+
+        if not dry_run and (missing_roles or to_add or to_remove):
+            through.objects.bulk_create(to_add)
+            through.objects.filter(id__in=to_remove).delete()
+            invalidate_responses(Role)
+            invalidate_permissions(everything=True)
+    return {'created_roles': missing_roles, 'changes': changes}
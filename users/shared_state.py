@@ -0,0 +1,46 @@
+"""
+State every process serving the API must agree on, the permission version stamp and the token revocations, kept in
+the cache named by SHARED_STATE['CACHE']. That cache has to be shared by the processes and must not evict entries
+before they expire, e.g. redis with `maxmemory-policy noeviction`. A cache local to the process, like LocMemCache,
+only reaches the process itself: the permission index still works within it and tokens are checked against the
+database.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARED_STATE = {
+    'CACHE': 'shared',
+}
+
+# Backends whose entries never leave the process that wrote them
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def shared_state_settings():
+    return {**DEFAULT_SHARED_STATE, **getattr(settings, 'SHARED_STATE', {})}
+
+
+def shared_cache():
+    return caches[shared_state_settings()['CACHE']]
+
+
+def is_shared(cache):
+    return not isinstance(cache, LOCAL_BACKENDS)
+
+
+def warn_if_local(what, alias=None, setting="SHARED_STATE['CACHE']"):
+    """
+    Log that `what` does not reach the other processes when the cache `alias`, named by `setting`, is local to this
+    one. Defaults to the shared state cache.
+    """
+    alias = alias or shared_state_settings()['CACHE']
+    cache = caches[alias]
+    if not is_shared(cache):
+        logger.warning("%s stays in this process: the cache %r is a %s, configure a cache shared by every process "
+                       "in %s", what, alias, type(cache).__name__, setting)
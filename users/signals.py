@@ -1,8 +1,13 @@
 from django.contrib.auth.models import Group
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
+from internal_menu_selection.response_cache import invalidate_responses
+from users.authentication import revoke_tokens
 from users.models import User
+from users.permission_index import invalidate_permissions
+
+M2M_CHANGES = ('post_add', 'post_remove', 'post_clear')
 
 
 @receiver(post_save, sender=User)
@@ -11,3 +16,51 @@ def add_user_in_group(sender, instance, created, **kwargs):
         instance.groups.clear()
     group = Group.objects.get(name=instance.role.name)
     instance.groups.add(group)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_users(sender, **kwargs):
+    invalidate_responses(User)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_role(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'role' in update_fields):
+        invalidate_permissions(users=[instance.pk])
+
+
+@receiver(post_save, sender=User)
+def revoke_inactive_user_tokens(sender, instance, created, **kwargs):
+    if not created and not instance.is_active:
+        revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action, reverse, **kwargs):
+    if action in M2M_CHANGES:
+        if reverse:
+            invalidate_permissions(everything=True)
+        else:
+            invalidate_permissions(users=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, instance, action, reverse, **kwargs):
+    if action in M2M_CHANGES:
+        if reverse:
+            invalidate_permissions(everything=True)
+        else:
+            invalidate_permissions(groups=[instance.name])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    invalidate_permissions(roles=True, groups=[instance.name])
+
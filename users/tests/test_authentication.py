@@ -0,0 +1,135 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from roles.models import Role
+from users.authentication import ClaimsTokenObtainPairSerializer, revoke_tokens
+from users.checks import check_stateless_authentication_cache
+from users.models import User
+from users.permission_index import VERSION_KEY
+from users.shared_state import shared_cache
+
+
+SHARED_CACHES = {
+    **settings.CACHES,
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(),
+        'TIMEOUT': None,
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TestStatelessAuthentication(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        cache.clear()
+        shared_cache().clear()
+        self.role = Role.objects.create(name="employee")
+        Group.objects.get(name="employee").permissions.add(Permission.objects.get(codename='list_menu'))
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.menu_list_url = reverse('list_today_menu')
+
+    def user_queries(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(self.menu_list_url)
+        return r, [query for query in queries.captured_queries if 'FROM "AuthUsers"' in query['sql']]
+
+    def test_login_embeds_claims(self):
+        r = self.client.post(reverse('token_obtain_pair'), {"username": self.username, "password": self.password})
+        self.assertEqual(r.status_code, 200)
+        token = AccessToken(r.data['access'])
+        self.assertEqual(token['username'], self.username)
+        self.assertEqual(token['role'], self.role.id)
+        self.assertEqual(token['perm_version'], shared_cache().get(VERSION_KEY))
+
+    def test_claims_skip_user_query(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        r, queries = self.user_queries(token)
+        self.assertEqual(r.status_code, 200)
+        self.assertFalse(queries)
+
+    def test_token_without_claims_loads_user(self):
+        r, queries = self.user_queries(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(queries)
+
+    def test_stale_permission_version_loads_user_once(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        shared_cache().set(VERSION_KEY, "moved")
+        r, queries = self.user_queries(token)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(queries)
+        _, queries = self.user_queries(token)
+        self.assertFalse(queries)
+
+    def test_role_change_is_not_trusted_from_claims(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        Role.objects.create(name="restaurant_owner")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = Role.objects.get(name="restaurant_owner")
+            self.user.save()
+        r, queries = self.user_queries(token)
+        self.assertEqual(r.status_code, 403)
+        self.assertTrue(queries)
+
+    def test_revoked_tokens_load_user(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        revoke_tokens(self.user.id)
+        _, queries = self.user_queries(token)
+        self.assertTrue(queries)
+
+    def test_inactive_user_rejected(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.user.is_active = False
+        self.user.save()
+        r, _ = self.user_queries(token)
+        self.assertEqual(r.status_code, 401)
+
+    def test_revocation_survives_a_full_default_cache(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.user.is_active = False
+        self.user.save()
+        cache.set_many({f"filler:{i}": i for i in range(2 * settings.CACHES['default']['OPTIONS']['MAX_ENTRIES'])})
+        r, _ = self.user_queries(token)
+        self.assertEqual(r.status_code, 401)
+
+    def test_deleted_user_rejected(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.user.delete()
+        r, _ = self.user_queries(token)
+        self.assertEqual(r.status_code, 401)
+
+    @override_settings(CACHES=settings.CACHES)
+    def test_claims_not_trusted_without_a_shared_cache(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        r, queries = self.user_queries(token)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(queries)
+
+    def test_shared_cache_passes_the_startup_check(self):
+        self.assertEqual(check_stateless_authentication_cache(None), [])
+
+    @override_settings(CACHES=settings.CACHES)
+    def test_cache_local_to_the_process_fails_the_startup_check(self):
+        with self.settings(DEBUG=False):
+            self.assertEqual([error.id for error in check_stateless_authentication_cache(None)], ['users.E001'])
+        with self.settings(DEBUG=True):
+            self.assertEqual([error.id for error in check_stateless_authentication_cache(None)], ['users.W001'])
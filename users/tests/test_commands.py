@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from roles.models import Role
+from users import services
+from users.models import User
+from users.permission_manifest import ROLE_PERMISSIONS
+from users.services import hash_passwords
+
+
+class TestImportEmployees(TestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        User.objects.create_user(email="test@gmail.com", password="test@123", username="test", role=self.role)
+
+    def write(self, suffix, content):
+        employees_file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        employees_file.write(content)
+        employees_file.close()
+        self.addCleanup(os.remove, employees_file.name)
+        return employees_file.name
+
+    def test_import_csv_reports_rejected_rows(self):
+        path = self.write('.csv', "email,username,password,first_name,last_name,role\n"
+                                  "new@gmail.com,new,test@123,New,Hire,employee\n"
+                                  "test@gmail.com,other,test@123,Other,Hire,employee\n")
+        out, err = StringIO(), StringIO()
+        call_command('import_employees', path, stdout=out, stderr=err)
+        self.assertIn("Imported 1 employees, rejected 1 rows", out.getvalue())
+        self.assertIn("Row 2: email", err.getvalue())
+        self.assertEqual(list(User.objects.get(username="new").groups.values_list('name', flat=True)), ["employee"])
+
+    def test_import_json(self):
+        path = self.write('.json', json.dumps([{"email": "new@gmail.com", "username": "new", "password": "test@123",
+                                                "first_name": "New", "last_name": "Hire", "role": self.role.id}]))
+        call_command('import_employees', path, stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(User.objects.filter(username="new").exists())
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_hash_passwords_in_worker_threads(self):
+        passwords = [f"password{number}" for number in range(10)]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), 10)
+        self.assertTrue(all(hashed.startswith('md5$') for hashed in hashes))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                       EMPLOYEE_ONBOARDING={'MAX_BATCH_SIZE': 500, 'HASH_WORKERS': 2})
+    def test_requests_share_one_hashing_pool(self):
+        passwords = [f"password{number}" for number in range(10)]
+        with mock.patch.object(services, '_hashing_pool', None), \
+                mock.patch.object(services, 'ThreadPoolExecutor', wraps=ThreadPoolExecutor) as executor:
+            first, second = hash_passwords(passwords), hash_passwords(passwords)
+            pool = services._hashing_pool
+        executor.assert_called_once_with(max_workers=2, thread_name_prefix='onboarding-hash')
+        pool.shutdown()
+        self.assertTrue(check_password("password3", first[3]))
+        self.assertEqual(len(second), 10)
+
+
+class TestSyncPermissions(TestCase):
+
+    def sync(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('sync_permissions', *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_roles_and_permissions(self):
+        output = self.sync()
+        self.assertIn("Created role restaurant_owner", output)
+        self.assertEqual(set(Role.objects.values_list('name', flat=True)), set(ROLE_PERMISSIONS))
+        self.assertEqual(set(Group.objects.get(name="employee").permissions.values_list('codename', flat=True)),
+                         set(ROLE_PERMISSIONS['employee']))
+        self.assertEqual(Group.objects.get(name="admin").permissions.count(), Permission.objects.count())
+
+    def test_second_run_changes_nothing(self):
+        self.sync()
+        with self.assertNumQueries(6):
+            self.assertIn("Permissions already in sync", self.sync())
+
+    def test_dry_run_writes_nothing(self):
+        output = self.sync('--dry-run')
+        self.assertIn("Would create role employee", output)
+        self.assertIn("Would add to employee: add_uservote", output)
+        self.assertFalse(Role.objects.exists())
+
+    def test_removes_permissions_not_in_the_manifest(self):
+        self.sync()
+        Group.objects.get(name="employee").permissions.add(Permission.objects.get(codename='delete_menu'))
+        self.assertIn("Removed from employee: delete_menu", self.sync())
+        self.assertNotIn('delete_menu', Group.objects.get(name="employee").permissions.values_list(
+            'codename', flat=True))
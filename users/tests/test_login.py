@@ -0,0 +1,107 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from roles.models import Role
+from users.login import HashingPool, LastLoginBuffer
+from users.permission_index import current_version
+from users.models import User
+
+
+class TestAsyncLogin(TestCase):
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.user = User.objects.create_user(email="test@gmail.com", password=self.password, username=self.username,
+                                             role=self.role)
+        self.login_url = reverse('async_login')
+        self.last_logins = LastLoginBuffer(flush_interval=60)
+        patcher = mock.patch('users.views.get_last_login_buffer', return_value=self.last_logins)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def login(self, username, password):
+        return await self.async_client.post(self.login_url, json.dumps({"username": username, "password": password}),
+                                            content_type='application/json')
+
+    async def test_login_success(self):
+        r = await self.login(self.username, self.password)
+        self.assertEqual(r.status_code, 200)
+        token = AccessToken(r.json()['access'])
+        self.assertEqual(token['username'], self.username)
+        self.assertIn('refresh', r.json())
+
+    async def test_login_reads_the_database_cache_off_the_event_loop(self):
+        shared_caches = {**settings.CACHES, 'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_shared_state'}}
+        with override_settings(CACHES=shared_caches):
+            await sync_to_async(call_command)('createcachetable', 'test_shared_state')
+            r = await self.login(self.username, self.password)
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(AccessToken(r.json()['access'])['perm_version'], await sync_to_async(current_version)())
+
+    async def test_login_wrong_password(self):
+        r = await self.login(self.username, "wrong")
+        self.assertEqual(r.status_code, 401)
+        self.assertEqual(r.json()["detail"], "No active account found with the given credentials")
+
+    async def test_login_no_user(self):
+        r = await self.login("nobody", self.password)
+        self.assertEqual(r.status_code, 401)
+
+    async def test_login_missing_password(self):
+        r = await self.async_client.post(self.login_url, json.dumps({"username": self.username}),
+                                         content_type='application/json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["password"], ["This field is required."])
+
+    async def test_login_shed_when_pool_is_full(self):
+        pool = HashingPool(workers=1, max_queue=0)
+        pool.pending = pool.capacity
+        with mock.patch('users.views.get_hashing_pool', return_value=pool):
+            r = await self.login(self.username, self.password)
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r['Retry-After'], "1")
+
+    async def test_last_login_written_in_batches(self):
+        await self.login(self.username, self.password)
+        await self.login(self.username, self.password)
+        user = await User.objects.aget(id=self.user.id)
+        self.assertIsNone(user.last_login)
+        self.assertEqual(await sync_to_async(self.last_logins.flush)(), 1)
+        user = await User.objects.aget(id=self.user.id)
+        self.assertIsNotNone(user.last_login)
+
+
+class TestHashingPool(TestCase):
+
+    def test_pool_refuses_beyond_capacity(self):
+        async def scenario():
+            pool = HashingPool(workers=1, max_queue=1)
+            release = asyncio.Event()
+            loop = asyncio.get_running_loop()
+
+            def wait():
+                asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+
+            running = asyncio.ensure_future(pool.run(wait))
+            queued = asyncio.ensure_future(pool.run(lambda: True))
+            await asyncio.sleep(0)
+            with self.assertRaises(Exception) as refused:
+                await pool.run(lambda: True)
+            release.set()
+            await running
+            self.assertTrue(await queued)
+            self.assertEqual(pool.pending, 0)
+            return refused.exception
+
+        self.assertEqual(type(asyncio.run(scenario())).__name__, 'PoolSaturated')
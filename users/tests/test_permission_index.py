@@ -0,0 +1,142 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from roles.models import Role
+from users.models import User
+from users.permission_index import PermissionIndex, VERSION_KEY, get_permission_index
+from users.shared_state import shared_cache, warn_if_local
+
+
+class TestPermissionIndex(TestCase):
+
+    def setUp(self):
+        shared_cache().clear()
+        self.role = Role.objects.create(name="employee")
+        self.group = Group.objects.get(name="employee")
+        self.list_permission = Permission.objects.get(codename='list_menu')
+        self.view_permission = Permission.objects.get(codename='view_menu')
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+
+    def test_role_permissions_answered_without_queries(self):
+        self.group.permissions.add(self.list_permission)
+        self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+            self.assertFalse(self.user.has_perm('restaurant.view_menu'))
+
+    def test_group_permission_changes_refresh_the_role(self):
+        self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+        self.group.permissions.add(self.list_permission)
+        self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+        self.group.permissions.remove(self.list_permission)
+        self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+
+    def test_user_permissions(self):
+        self.user.user_permissions.add(self.view_permission)
+        self.assertTrue(self.user.has_perm('restaurant.view_menu'))
+        self.assertEqual(self.user.get_all_permissions(), {'restaurant.view_menu'})
+        self.user.user_permissions.clear()
+        self.assertFalse(self.user.has_perm('restaurant.view_menu'))
+
+    def test_role_rename_keeps_permissions(self):
+        self.group.permissions.add(self.list_permission)
+        self.role.name = "staff"
+        self.role.save()
+        self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+
+    def test_user_role_change(self):
+        Role.objects.create(name="restaurant_owner")
+        Group.objects.get(name="restaurant_owner").permissions.add(self.view_permission)
+        self.user.role = Role.objects.get(name="restaurant_owner")
+        self.user.save()
+        self.assertTrue(self.user.has_perm('restaurant.view_menu'))
+
+    def test_inactive_user_has_no_permissions(self):
+        self.group.permissions.add(self.list_permission)
+        self.user.is_active = False
+        self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+
+    def test_commit_publishes_a_new_version(self):
+        version = shared_cache().get(VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.list_permission)
+        self.assertNotEqual(shared_cache().get(VERSION_KEY), version)
+        self.assertEqual(get_permission_index().version, shared_cache().get(VERSION_KEY))
+
+    def test_local_shared_cache_is_reported(self):
+        with self.assertLogs('users.shared_state', 'WARNING'):
+            warn_if_local("The permission version stamp")
+
+
+class TestPermissionIndexTransactions(TransactionTestCase):
+
+    def setUp(self):
+        shared_cache().clear()
+        self.role = Role.objects.create(name="employee")
+        self.group = Group.objects.get(name="employee")
+        self.list_permission = Permission.objects.get(codename='list_menu')
+        self.view_permission = Permission.objects.get(codename='view_menu')
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+
+    def test_version_change_from_another_process_rebuilds_the_index(self):
+        index = PermissionIndex(version_check_interval=0)
+        self.assertEqual(index.role_permissions(self.role.id), frozenset())
+        Group.permissions.through.objects.create(group=self.group, permission=self.list_permission)
+        self.assertEqual(index.role_permissions(self.role.id), frozenset())
+        shared_cache().set(VERSION_KEY, "other-process")
+        self.assertEqual(index.role_permissions(self.role.id), {'restaurant.list_menu'})
+
+    def test_checks_answered_from_previous_maps_during_a_rebuild_for_another_process(self):
+        self.group.permissions.add(self.list_permission)
+        index = PermissionIndex(version_check_interval=0)
+        self.assertEqual(index.role_permissions(self.role.id), {'restaurant.list_menu'})
+        rebuilding, release = threading.Event(), threading.Event()
+
+        def rebuild(marks):
+            rebuilding.set()
+            release.wait(5)
+
+        shared_cache().set(VERSION_KEY, "other-process")
+        with mock.patch.object(index, 'rebuild', side_effect=rebuild):
+            refresh = threading.Thread(target=index.refresh)
+            refresh.start()
+            self.assertTrue(rebuilding.wait(5))
+            self.assertEqual(index.role_permissions(self.role.id), {'restaurant.list_menu'})
+            release.set()
+            refresh.join()
+
+    def test_rolled_back_grant_is_not_kept(self):
+        self.assertFalse(self.user.has_perm('restaurant.view_menu'))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.user.user_permissions.add(self.view_permission)
+            self.assertTrue(self.user.has_perm('restaurant.view_menu'))
+            raise RuntimeError
+        self.assertFalse(self.user.has_perm('restaurant.view_menu'))
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('restaurant.view_menu'))
+
+    def test_grant_rolled_back_with_a_savepoint_is_forgotten_by_the_transaction(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.group.permissions.add(self.list_permission)
+                self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+                raise RuntimeError
+            self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+            self.user.user_permissions.add(self.view_permission)
+            self.assertTrue(self.user.has_perm('restaurant.view_menu'))
+            self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+        self.assertTrue(self.user.has_perm('restaurant.view_menu'))
+        self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+
+    def test_commit_refreshes_the_index(self):
+        self.assertFalse(self.user.has_perm('restaurant.list_menu'))
+        with transaction.atomic():
+            self.group.permissions.add(self.list_permission)
+        self.assertTrue(self.user.has_perm('restaurant.list_menu'))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.has_perm('restaurant.list_menu'))
@@ -0,0 +1,105 @@
+import json
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from internal_menu_selection.query_budgets import query_budget
+from roles.models import Role
+from users.models import User
+
+
+class TestUserQueryBudgets(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('sync_permissions', stdout=StringIO())
+        self.employee_role = Role.objects.get(name="employee")
+        self.admin = User.objects.create_user(email="admin@gmail.com", password="test@123", username="admin",
+                                              role=Role.objects.get(name="admin"))
+        self.client.force_authenticate(user=self.admin)
+
+    def employee(self, number):
+        return {"email": f"employee{number}@gmail.com", "username": f"employee{number}", "password": "test@123",
+                "first_name": "Employee", "last_name": f"{number}", "role": "employee"}
+
+    def test_register_employee(self):
+        with query_budget('register_employee', 'POST', rows=1):
+            r = self.client.post(reverse('register_employee'), {**self.employee(1), "confirm_password": "test@123",
+                                                                "role": self.employee_role.id})
+        self.assertEqual(r.status_code, 201)
+
+    def test_bulk_register_employees(self):
+        for start, count in ((0, 1), (1, 5)):
+            with query_budget('bulk_register_employee', 'POST', rows=count):
+                r = self.client.post(reverse('bulk_register_employee'),
+                                     [self.employee(number) for number in range(start, start + count)], format='json')
+            self.assertEqual(r.status_code, 201)
+
+    def test_list_employees(self):
+        for count in (1, 5):
+            User.objects.bulk_create(
+                User(email=f"employee{number}@gmail.com", username=f"employee{number}", role=self.employee_role)
+                for number in range(User.objects.count(), count))
+            cache.clear()
+            with query_budget('list_employee', 'GET', rows=count):
+                self.assertEqual(self.client.get(reverse('list_employee')).status_code, 200)
+
+    def test_employee_detail(self):
+        employee = User.objects.create_user(email="employee@gmail.com", password="test@123", username="employee",
+                                            role=self.employee_role)
+        url = reverse('retrieve_update_delete_employee', kwargs={'id': employee.id})
+        with query_budget('retrieve_update_delete_employee', 'GET', rows=1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget('retrieve_update_delete_employee', 'PUT', rows=1):
+            r = self.client.put(url, {"email": "employee@gmail.com", "username": "employee", "first_name": "New",
+                                      "last_name": "Name", "role": self.employee_role.id})
+            self.assertEqual(r.status_code, 200)
+        with query_budget('retrieve_update_delete_employee', 'PATCH', rows=1):
+            self.assertEqual(self.client.patch(url, {"first_name": "Other"}).status_code, 200)
+        with query_budget('retrieve_update_delete_employee', 'DELETE', rows=1):
+            self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_login(self):
+        with query_budget('token_obtain_pair', 'POST', rows=1):
+            r = self.client.post(reverse('token_obtain_pair'), {"username": "admin", "password": "test@123"})
+        self.assertEqual(r.status_code, 200)
+
+    def test_token_refresh(self):
+        refresh = str(RefreshToken.for_user(self.admin))
+        with query_budget('token_refresh', 'POST', rows=1):
+            r = self.client.post(reverse('token_refresh'), {"refresh": refresh})
+        self.assertEqual(r.status_code, 200)
+
+    def test_response_cache_stats(self):
+        self.admin.is_staff = True
+        with query_budget('response_cache_stats', 'GET'):
+            self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, 200)
+
+    def test_metrics(self):
+        with query_budget('metrics', 'GET'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class TestAsyncLoginQueryBudget(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                 role=Role.objects.create(name="employee"))
+
+    async def login(self):
+        return await self.async_client.post(reverse('async_login'),
+                                            json.dumps({"username": "test", "password": "test@123"}),
+                                            content_type='application/json')
+
+    def test_async_login(self):
+        # Measured from a sync test: the view's queries run on this thread's connection through sync_to_async
+        with query_budget('async_login', 'POST', rows=1):
+            r = async_to_sync(self.login)()
+        self.assertEqual(r.status_code, 200)
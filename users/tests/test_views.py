@@ -1,4 +1,6 @@
 from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
@@ -66,7 +68,7 @@ class TestUser(APITestCase):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.user_list_url)
         self.assertEqual(r.status_code, 200)
-        self.assertEqual(r.data[0]['username'], "test")
+        self.assertEqual(r.data['results'][0]['username'], "test")
 
     def test_get_user_permission_denied(self):
         self.client.force_authenticate(user=self.user)
@@ -137,3 +139,76 @@ class TestLogin(APITestCase):
         data = {"username": "test", "password": "test@123"}
         r = self.client.post(self.user_login_create_url, data)
         self.assertEqual(r.status_code, 200)
+
+
+class TestEmployeeBulk(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        self.role = Role.objects.create(name="admin")
+        self.employee_role = Role.objects.create(name="employee")
+        self.add_permission = Permission.objects.get(name='Can add user')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.user_bulk_create_url = reverse('bulk_register_employee')
+
+    def employee(self, number, role=None):
+        return {"email": f"employee{number}@gmail.com", "username": f"employee{number}", "password": "test@123",
+                "first_name": "Employee", "last_name": str(number), "role": role or self.employee_role.id}
+
+    def test_bulk_add_user_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.user_bulk_create_url, [self.employee(1)], format='json')
+        self.assertEqual(r.status_code, 403)
+
+    def test_bulk_add_user_with_permission(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.post(self.user_bulk_create_url, [self.employee(1), self.employee(2, role="employee")],
+                             format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual([result['user']['username'] for result in r.data], ["employee1", "employee2"])
+        employee = User.objects.get(username="employee2")
+        self.assertTrue(employee.check_password("test@123"))
+        self.assertEqual(list(employee.groups.values_list('name', flat=True)), ["employee"])
+
+    def test_bulk_add_user_reports_invalid_rows(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        duplicate = {**self.employee(2), "email": "employee1@gmail.com"}
+        data = [self.employee(1), duplicate, {**self.employee(3), "username": self.username},
+                {**self.employee(4), "role": "cook"}, {**self.employee(5), "email": "not-an-email"}]
+        r = self.client.post(self.user_bulk_create_url, data, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data[0]['user']['username'], "employee1")
+        self.assertIn('email', r.data[1]['errors'])
+        self.assertIn('username', r.data[2]['errors'])
+        self.assertIn('role', r.data[3]['errors'])
+        self.assertIn('email', r.data[4]['errors'])
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_bulk_add_user_from_csv(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        rows = "\n".join(f"employee{number}@gmail.com,employee{number},test@123,Employee,{number},employee"
+                         for number in range(1, 4))
+        r = self.client.post(self.user_bulk_create_url, f"email,username,password,first_name,last_name,role\n{rows}",
+                             content_type='text/csv')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(User.objects.filter(username__startswith="employee").count(), 3)
+
+    def test_bulk_add_user_queries_do_not_grow_with_batch(self):
+        self.user.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(self.user_bulk_create_url, [], format='json')
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.user_bulk_create_url, [self.employee(1)], format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.user_bulk_create_url, [self.employee(number) for number in range(2, 12)],
+                             format='json')
+        self.assertEqual(len(small), len(large))
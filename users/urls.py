@@ -1,9 +1,10 @@
 from django.urls import path
 
-from users.views import EmployeeCreateView, EmployeeListView, EmployeeRetrieveUpdateDeleteView
+from users.views import EmployeeCreateView, EmployeeListView, EmployeeRetrieveUpdateDeleteView, EmployeeBulkCreateView
 
 urlpatterns = [
     path('register/', EmployeeCreateView.as_view(), name="register_employee"),
+    path('register/bulk/', EmployeeBulkCreateView.as_view(), name="bulk_register_employee"),
     path('', EmployeeListView.as_view(), name="list_employee"),
     path('<int:id>/', EmployeeRetrieveUpdateDeleteView.as_view(),
          name="retrieve_update_delete_employee"),
@@ -1,11 +1,26 @@
+import csv
+import json
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import IntegrityError
 from django.db.models import ProtectedError
+from django.http import JsonResponse
 from rest_framework import generics, filters, status
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
 
 from internal_menu_selection.common_permissions import IsAuthorizedForListModel, IsAuthorizedForModel
+from internal_menu_selection.fast_serializers import FastListMixin
+from internal_menu_selection.pagination import CustomCursorPagination
+from internal_menu_selection.response_cache import CachedResponseMixin
 from users.models import User
-from users.serializers import EmployeeRegistrationSerializer, EmployeeSerializer
+from users.authentication import ClaimsTokenObtainPairSerializer
+from users.login import PoolSaturated, get_hashing_pool, get_last_login_buffer, login_settings
+from users.parsers import CSVParser
+from users.serializers import EmployeeRegistrationSerializer, EmployeeSerializer, EmployeeBulkEntrySerializer
+from users.services import read_employee_rows, onboard_employees
 
 
 class EmployeeCreateView(generics.CreateAPIView):
@@ -17,16 +32,73 @@ class EmployeeCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
 
 
-class EmployeeListView(generics.ListAPIView):
+class EmployeeBulkCreateView(generics.CreateAPIView):
+    """
+    View for registering many employees from a JSON list or a CSV document (body or `file` upload)
+    """
+    serializer_class = EmployeeBulkEntrySerializer
+    queryset = User.objects.all()
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    parser_classes = [JSONParser, CSVParser, MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        entries = request.data
+        if 'file' in request.FILES:
+            upload = request.FILES['file']
+            file_format = 'json' if upload.name.endswith('.json') else 'csv'
+            try:
+                entries = read_employee_rows(upload.read().decode(), file_format)
+            except (UnicodeDecodeError, ValueError, csv.Error):
+                return Response({"message": "Could not read the employees file"}, status=status.HTTP_400_BAD_REQUEST)
+        elif not isinstance(entries, list):
+            entries = entries.get('employees')
+        if not isinstance(entries, list) or not entries:
+            return Response({"message": "Expected a list of employees"}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = settings.EMPLOYEE_ONBOARDING['MAX_BATCH_SIZE']
+        if len(entries) > max_size:
+            return Response({"message": f"Cannot register more than {max_size} employees at once"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(entries)
+        valid_indexes, valid_entries = [], []
+        for index, entry in enumerate(entries):
+            serializer = self.get_serializer(data=entry)
+            if serializer.is_valid():
+                valid_indexes.append(index)
+                valid_entries.append(serializer.validated_data)
+            else:
+                results[index] = {'index': index, 'errors': serializer.errors}
+
+        try:
+            onboarded = onboard_employees(valid_entries)
+        except IntegrityError:
+            return Response({"message": "Employees were registered concurrently, please retry"},
+                            status=status.HTTP_409_CONFLICT)
+        created = 0
+        for index, result in zip(valid_indexes, onboarded):
+            result['index'] = index
+            if 'user' in result:
+                result['user'] = EmployeeSerializer(result['user']).data
+                created += 1
+            results[index] = result
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+
+class EmployeeListView(CachedResponseMixin, FastListMixin, generics.ListAPIView):
     """
     View for list of all employees
     """
     queryset = User.objects.all()
     serializer_class = EmployeeSerializer
+    cache_models = [User]
+    pagination_class = CustomCursorPagination
     permission_classes = [IsAuthenticated, IsAuthorizedForListModel]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['first_name', 'last_name', 'email']
     ordering_fields = ['id', 'first_name', 'last_name', 'email', '-id', '-first_name', '-last_name', '-email']
+    ordering = ['-id']
 
 
 class EmployeeRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
@@ -45,3 +117,45 @@ class EmployeeRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         except ProtectedError as err:
             return Response(str(err), status=status.HTTP_400_BAD_REQUEST)
         return Response({}, status=status.HTTP_204_NO_CONTENT)
+
+
+async def async_login(request):
+    """
+    Async view for login, issuing the same tokens as auth/login/ with the password verified on the bounded
+    hashing pool. Logins beyond the pool's queue are refused with 503 and Retry-After.
+    """
+    if request.method != 'POST':
+        return JsonResponse({"detail": f"Method \"{request.method}\" not allowed."}, status=405)
+    if request.content_type == 'application/json':
+        try:
+            credentials = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error"}, status=400)
+    else:
+        credentials = request.POST
+    errors = {field: ["This field is required."] for field in ('username', 'password') if not credentials.get(field)}
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    user = await User.objects.filter(username=credentials['username']).only(
+        'id', 'username', 'password', 'role_id', 'is_active', 'is_superuser').afirst()
+    try:
+        if user is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            await get_hashing_pool().run(make_password, credentials['password'])
+            valid = False
+        else:
+            valid = await get_hashing_pool().run(check_password, credentials['password'], user.password)
+    except PoolSaturated:
+        response = JsonResponse({"detail": "Too many logins at the moment, please retry"}, status=503)
+        response['Retry-After'] = str(login_settings()['RETRY_AFTER'])
+        return response
+    if not valid or not user.is_active:
+        return JsonResponse({"detail": "No active account found with the given credentials"}, status=401)
+
+    refresh = await ClaimsTokenObtainPairSerializer.aget_token(user)
+    get_last_login_buffer().record(user.id)
+    return JsonResponse({"refresh": str(refresh), "access": str(refresh.access_token)})
+
+
+async_login.csrf_exempt = True
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from vote.models import UserVote
+from vote.models import UserVote, VoteTally
 
 admin.site.register(UserVote)
+admin.site.register(VoteTally)
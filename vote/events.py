@@ -0,0 +1,227 @@
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel where every vote statement notifies its tally change, delivered once its transaction commits
+TALLY_CHANNEL = 'vote_tally'
+# SQL expression of the notification, for statements returning the new `votes` of the tally
+NOTIFY_TALLY_SQL = (f"pg_notify('{TALLY_CHANNEL}', json_build_object('service_date', %(service_date)s::date, "
+                    f"'menu', %(menu)s::bigint, 'delta', %(delta)s::integer, 'votes', votes)::text)")
+LISTEN_RETRY_DELAY = 1
+
+DEFAULT_VOTE_STREAM = {
+    'HEARTBEAT_INTERVAL': 15,
+    'HISTORY_SIZE': 1000,
+    'SUBSCRIBER_QUEUE_SIZE': 1000,
+}
+
+
+def stream_settings():
+    return {**DEFAULT_VOTE_STREAM, **getattr(settings, 'VOTE_STREAM', {})}
+
+
+class Subscriber:
+    """
+    Event queue of one connected stream client
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def resync(self):
+        # Wakes the client up to send a fresh snapshot
+        self.overflowed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class TallyListener:
+    """
+    Thread LISTENing on TALLY_CHANNEL on a connection of its own and publishing the tally changes of the votes of
+    every process to the hub. After a lost connection it reconnects and has the hub resync its subscribers, as the
+    changes in between are gone.
+    """
+
+    def __init__(self, hub, alias='default'):
+        self.hub = hub
+        self.alias = alias
+        self.stopping = threading.Event()
+        self.listening = threading.Event()
+        # Wakes the thread up from select() to close its connection as soon as it is stopped
+        self.wakeup, self.waker = os.pipe()
+        self.thread = threading.Thread(target=self.run, name='vote-tally-listener', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        os.write(self.waker, b'\0')
+
+    def connect(self):
+        database = connections[self.alias]
+        listen_connection = database.get_new_connection(database.get_connection_params())
+        listen_connection.autocommit = True
+        with listen_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {TALLY_CHANNEL}")
+        return listen_connection
+
+    def run(self):
+        try:
+            self.listen()
+        finally:
+            os.close(self.wakeup)
+            os.close(self.waker)
+
+    def listen(self):
+        while not self.stopping.is_set():
+            listen_connection = None
+            try:
+                listen_connection = self.connect()
+                if self.listening.is_set():
+                    self.hub.resync()
+                self.listening.set()
+                while not self.stopping.is_set():
+                    if listen_connection not in select.select([listen_connection, self.wakeup], [], [])[0]:
+                        continue
+                    listen_connection.poll()
+                    while listen_connection.notifies and not self.stopping.is_set():
+                        self.hub.publish(json.loads(listen_connection.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Lost the vote tally notifications, reconnecting")
+                self.stopping.wait(LISTEN_RETRY_DELAY)
+            finally:
+                if listen_connection is not None:
+                    listen_connection.close()
+
+
+class VoteEventHub:
+    """
+    Fan-out of tally deltas to every stream client of this process.
+
+    With a `listener_class`, the hub is fed by one listener per process, started with the first client and stopped
+    with the last one, which receives the changes of the votes of every process. Events get increasing ids
+    prefixed by a token of the listener's run, and the latest ones are kept so a client reconnecting with a
+    Last-Event-ID header only receives what it missed.
+    """
+
+    def __init__(self, history_size, queue_size, listener_class=None):
+        self.history = collections.deque(maxlen=history_size)
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.listener_class = listener_class
+        self.listener = None
+        self.start_epoch()
+
+    def start_epoch(self):
+        # Ids of earlier events no longer match, so their clients get a snapshot
+        self.token = uuid.uuid4().hex[:8]
+        self.counter = itertools.count(1)
+        self.history.clear()
+
+    @property
+    def last_event_id(self):
+        with self.lock:
+            return self.history[-1][0] if self.history else f"{self.token}-0"
+
+    def publish(self, data):
+        with self.lock:
+            event = (f"{self.token}-{next(self.counter)}", data)
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a client of the running event loop. Returns the subscriber and the events missed since
+        `last_event_id`, or None when they are no longer available and the client needs a fresh snapshot.
+        """
+        subscriber = Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            if self.listener_class is not None and self.listener is None:
+                self.start_epoch()
+                self.listener = self.listener_class(self)
+                self.listener.start()
+            self.subscribers.add(subscriber)
+            missed = self.events_since(last_event_id)
+        return subscriber, missed
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers and self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def wait_listening(self, timeout):
+        """
+        Wait until the listener receives the changes, so a snapshot read afterwards misses none of them
+        """
+        listener = self.listener
+        return listener is None or listener.listening.wait(timeout)
+
+    def resync(self):
+        """
+        Have every client start over from a snapshot, after changes were lost
+        """
+        with self.lock:
+            self.start_epoch()
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.resync)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+
+    def events_since(self, last_event_id):
+        if not last_event_id:
+            return None
+        token, _, number = last_event_id.rpartition('-')
+        if token != self.token or not number.isdigit():
+            return None
+        number = int(number)
+        if number == 0 and not self.history:
+            return []
+        ids = [int(event_id.rpartition('-')[2]) for event_id, _ in self.history]
+        if not ids or number < ids[0] - 1:
+            return None
+        return [event for event, event_number in zip(self.history, ids) if event_number > number]
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_vote_event_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            config = stream_settings()
+            _hub = VoteEventHub(config['HISTORY_SIZE'], config['SUBSCRIBER_QUEUE_SIZE'], TallyListener)
+        return _hub
@@ -0,0 +1,243 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from vote.models import DailyResult, UserVote
+from vote.services import insert_votes
+
+logger = logging.getLogger(__name__)
+
+STOP = object()
+
+DEFAULT_VOTE_INGESTION = {
+    'MODE': 'sync',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0.5,
+    'RETRIES': 3,
+    'RETRY_BACKOFF': 0.5,
+    'SPILL_PATH': None,
+}
+
+
+def ingestion_settings():
+    return {**DEFAULT_VOTE_INGESTION, **getattr(settings, 'VOTE_INGESTION', {})}
+
+
+def is_buffered():
+    return ingestion_settings()['MODE'] == 'buffered'
+
+
+class VoteBuffer:
+    """
+    Write-behind buffer for votes.
+
+    Accepted votes are queued in memory and a background flusher writes them with one multi-row insert
+    per batch, as soon as `batch_size` votes are waiting or `flush_interval` seconds after the first one.
+    Duplicates are answered from an in-memory set of the users that already voted on the service day;
+    the unique constraint on the votes stays the final arbiter across processes.
+
+    A batch the database refuses is retried `retries` times, waiting `retry_backoff` seconds and twice as long
+    after every attempt, then appended to the `spill_path` file, from which `replay_spilled_votes` writes it later.
+    """
+
+    def __init__(self, batch_size, flush_interval, retries=0, retry_backoff=0, spill_path=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path
+        self.pending = queue.Queue()
+        self.voters = set()
+        self.voters_date = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.flusher = None
+
+    def submit(self, user_id, menu_id, service_date):
+        """
+        Queue a vote. Returns False when the user has already voted on that service day.
+        """
+        while True:
+            with self.lock:
+                if self.voters_date == service_date:
+                    if user_id in self.voters:
+                        return False
+                    self.voters.add(user_id)
+                    self.pending.put((user_id, menu_id, service_date, timezone.now()))
+                    self.start()
+                    return True
+            # Loaded outside of the lock, so the other votes are not held up by the query
+            voters = set(UserVote.objects.filter(service_date=service_date).values_list('user_id', flat=True))
+            with self.lock:
+                if self.voters_date != service_date:
+                    self.voters = voters
+                    self.voters_date = service_date
+
+    def start(self):
+        if self.flusher is None or not self.flusher.is_alive():
+            self.stopping.clear()
+            self.flusher = threading.Thread(target=self.run, name='vote-buffer-flusher', daemon=True)
+            self.flusher.start()
+
+    def run(self):
+        try:
+            while not self.stopping.is_set():
+                batch = self.next_batch()
+                if batch:
+                    self.write(batch)
+        finally:
+            connection.close()
+
+    def next_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                vote = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if vote is STOP:
+                break
+            batch.append(vote)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def write(self, batch, retries=None):
+        """
+        Write a batch, retrying it while the database fails and spilling it once the retries are exhausted.
+        Returns False when it was spilled.
+        """
+        retries = self.retries if retries is None else retries
+        delay = self.retry_backoff
+        for attempt in range(retries + 1):
+            with self.write_lock:
+                close_old_connections()
+                try:
+                    inserted = insert_votes(batch)
+                except Exception:
+                    logger.exception("Could not write %s buffered votes (attempt %s of %s)", len(batch), attempt + 1,
+                                     retries + 1)
+                else:
+                    self.report_dropped(batch, inserted)
+                    return True
+            if attempt < retries:
+                time.sleep(delay)
+                delay *= 2
+        self.spill(batch)
+        return False
+
+    @staticmethod
+    def report_dropped(batch, inserted):
+        if len(inserted) == len(batch):
+            return
+        recorded = {(user_vote_obj.user_id, user_vote_obj.service_date) for user_vote_obj in inserted}
+        dropped = [vote for vote in batch if (vote[0], vote[2]) not in recorded]
+        closed = set(DailyResult.objects.filter(service_date__in={vote[2] for vote in dropped}).values_list(
+            'service_date', flat=True))
+        late = [vote for vote in dropped if vote[2] in closed]
+        if late:
+            logger.error("%s accepted votes were not recorded, the voting of their day was finalized first: %s",
+                         len(late), late)
+        if len(late) < len(dropped):
+            logger.warning("%s buffered votes were duplicates of votes recorded by another process",
+                           len(dropped) - len(late))
+
+    def spill(self, batch):
+        if self.spill_path is None:
+            logger.error("Could not write %s buffered votes and no spill file is set, they are lost: %s", len(batch),
+                         batch)
+            return
+        try:
+            with self.write_lock, open(self.spill_path, 'a') as spill_file:
+                for user_id, menu_id, service_date, date_time in batch:
+                    spill_file.write(json.dumps([user_id, menu_id, service_date.isoformat(),
+                                                 date_time.isoformat()]) + '\n')
+                spill_file.flush()
+                os.fsync(spill_file.fileno())
+        except OSError:
+            logger.exception("Could not spill %s buffered votes to %s, they are lost: %s", len(batch),
+                             self.spill_path, batch)
+            return
+        logger.error("Could not write %s buffered votes, spilled them to %s for replay_spilled_votes", len(batch),
+                     self.spill_path)
+
+    def drain(self):
+        """
+        Synchronously write every queued vote. Once a batch is spilled, the next ones are spilled without retries.
+        """
+        batch = []
+        retries = None
+        while True:
+            try:
+                vote = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if vote is STOP:
+                continue
+            batch.append(vote)
+            if len(batch) == self.batch_size:
+                if not self.write(batch, retries):
+                    retries = 0
+                batch = []
+        if batch:
+            self.write(batch, retries)
+
+    def stop(self):
+        self.stopping.set()
+        self.pending.put(STOP)
+        if self.flusher is not None:
+            self.flusher.join()
+        self.drain()
+
+
+_vote_buffer = None
+_vote_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    global _vote_buffer
+    with _vote_buffer_lock:
+        if _vote_buffer is None:
+            config = ingestion_settings()
+            _vote_buffer = VoteBuffer(config['BATCH_SIZE'], config['FLUSH_INTERVAL'], config['RETRIES'],
+                                      config['RETRY_BACKOFF'], config['SPILL_PATH'])
+            atexit.register(_vote_buffer.stop)
+        return _vote_buffer
+
+
+def replay_spilled_votes(path, batch_size):
+    """
+    Insert the votes spilled to `path`, then remove it. Returns the numbers of spilled and of recorded votes, the
+    others being duplicates or votes for finalized days.
+    """
+    replaying = f"{path}.replaying"
+    spilled = recorded = 0
+    while True:
+        # A file left by a failed replay is replayed first, votes already recorded are skipped as duplicates
+        if not os.path.exists(replaying):
+            try:
+                os.replace(path, replaying)
+            except FileNotFoundError:
+                return spilled, recorded
+        with open(replaying) as spill_file:
+            votes = [(user_id, menu_id, datetime.date.fromisoformat(service_date),
+                      datetime.datetime.fromisoformat(date_time))
+                     for user_id, menu_id, service_date, date_time in map(json.loads, filter(str.strip, spill_file))]
+        for start in range(0, len(votes), batch_size):
+            recorded += len(insert_votes(votes[start:start + batch_size]))
+        spilled += len(votes)
+        os.remove(replaying)
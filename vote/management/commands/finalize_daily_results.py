@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vote.results import days_to_finalize, finalize_day, is_voting_open
+
+
+class Command(BaseCommand):
+    help = "Freeze the vote result of every service day whose voting is closed (run it after the voting cutoff)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Only finalize this service day (YYYY-MM-DD), even if already finalized")
+        parser.add_argument('--force', action='store_true', help="Finalize --date even if its voting is still open")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                service_dates = [datetime.date.fromisoformat(options['date'])]
+            except ValueError:
+                raise CommandError(f"Invalid date '{options['date']}', expected YYYY-MM-DD")
+            if is_voting_open(service_dates[0]) and not options['force']:
+                raise CommandError(f"Voting of {service_dates[0]} is still open, use --force to close it now")
+        else:
+            service_dates = days_to_finalize()
+
+        for service_date in service_dates:
+            result = finalize_day(service_date)
+            self.stdout.write(f"Finalized {service_date}: winner menu {result.winner_menu_id} "
+                              f"with {result.winner_votes} of {result.total_votes} votes")
+        if not service_dates:
+            self.stdout.write("No service day to finalize")
@@ -0,0 +1,37 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from vote.tally import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = "Rebuild or repair the per-day vote tallies from the raw user votes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start_date', help="First service day to rebuild (YYYY-MM-DD), "
+                                                               "defaults to today")
+        parser.add_argument('--to', dest='end_date', help="Last service day to rebuild (YYYY-MM-DD), "
+                                                           "defaults to the first service day")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the tallies that are out of sync")
+
+    def handle(self, *args, **options):
+        start_date = self.parse_date(options['start_date']) or timezone.localdate()
+        end_date = self.parse_date(options['end_date']) or start_date
+        if start_date > end_date:
+            raise CommandError("--from must not be after --to")
+
+        created, updated, deleted = rebuild_tallies(start_date, end_date, dry_run=options['dry_run'])
+        prefix = "Would repair" if options['dry_run'] else "Repaired"
+        self.stdout.write(f"{prefix} tallies from {start_date} to {end_date}: "
+                          f"{created} created, {updated} updated, {deleted} deleted")
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
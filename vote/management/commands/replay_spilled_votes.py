@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vote.ingestion import ingestion_settings, replay_spilled_votes
+
+
+class Command(BaseCommand):
+    help = "Write the buffered votes spilled to VOTE_INGESTION['SPILL_PATH'] while the database refused them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Spill file to replay, defaults to VOTE_INGESTION['SPILL_PATH']")
+
+    def handle(self, *args, **options):
+        config = ingestion_settings()
+        path = options['path'] or config['SPILL_PATH']
+        if not path:
+            raise CommandError("No spill file, pass --path or set VOTE_INGESTION['SPILL_PATH']")
+        spilled, recorded = replay_spilled_votes(path, config['BATCH_SIZE'])
+        self.stdout.write(f"Replayed {spilled} spilled votes: {recorded} recorded, "
+                          f"{spilled - recorded} duplicates or for finalized days")
@@ -0,0 +1,72 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:05
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def populate_tallies(apps, schema_editor):
+    UserVote = apps.get_model("vote", "UserVote")
+    VoteTally = apps.get_model("vote", "VoteTally")
+    rows = (
+        UserVote.objects.annotate(service_date=TruncDate("date_time"))
+        .values("service_date", "menu")
+        .annotate(Count("id"))
+        .order_by()
+    )
+    VoteTally.objects.bulk_create(
+        VoteTally(
+            service_date=row["service_date"],
+            menu_id=row["menu"],
+            votes=row["id__count"],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0004_menu_date_time"),
+        ("vote", "0002_uservote_date_time"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoteTally",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("service_date", models.DateField()),
+                ("votes", models.PositiveIntegerField(default=0)),
+                (
+                    "menu",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="restaurant.menu",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="votetally",
+            index=models.Index(
+                fields=["service_date", "-votes"], name="vote_voteta_service_3c313f_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="votetally",
+            constraint=models.UniqueConstraint(
+                fields=("service_date", "menu"), name="unique_vote_tally_per_day_menu"
+            ),
+        ),
+        migrations.RunPython(populate_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:06
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.utils.timezone
+
+
+def backfill_service_date(apps, schema_editor):
+    UserVote = apps.get_model("vote", "UserVote")
+    UserVote.objects.update(service_date=TruncDate("date_time"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vote", "0003_votetally"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uservote",
+            name="service_date",
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(backfill_service_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="uservote",
+            index=models.Index(
+                fields=["user", "service_date"], name="vote_uservo_user_id_e6b505_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="uservote",
+            index=models.Index(
+                fields=["service_date", "menu"], name="vote_uservo_service_a35645_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:07
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    """
+    Keep only the first vote of a user per service day so the unique constraint can be added
+    """
+    UserVote = apps.get_model("vote", "UserVote")
+    VoteTally = apps.get_model("vote", "VoteTally")
+    duplicated = (
+        UserVote.objects.values("user", "service_date")
+        .annotate(Count("id"), first_id=Min("id"))
+        .filter(id__count__gt=1)
+        .order_by()
+    )
+    for row in duplicated:
+        extra_votes = UserVote.objects.filter(
+            user_id=row["user"],
+            service_date=row["service_date"],
+            id__gt=row["first_id"],
+        )
+        for vote in extra_votes:
+            VoteTally.objects.filter(
+                service_date=vote.service_date, menu_id=vote.menu_id, votes__gt=0
+            ).update(votes=F("votes") - 1)
+        extra_votes.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vote", "0004_uservote_service_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_votes, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="uservote",
+            name="vote_uservo_user_id_e6b505_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="uservote",
+            constraint=models.UniqueConstraint(
+                fields=("user", "service_date"), name="unique_user_vote_per_day"
+            ),
+        ),
+    ]
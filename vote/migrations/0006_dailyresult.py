@@ -0,0 +1,54 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0005_menu_service_date"),
+        ("vote", "0005_uservote_unique_per_day"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("service_date", models.DateField(unique=True)),
+                ("winner_votes", models.PositiveIntegerField(default=0)),
+                ("total_votes", models.PositiveIntegerField(default=0)),
+                ("menu_votes", models.JSONField(default=list)),
+                ("tied_menus", models.JSONField(default=list)),
+                ("finalized_at", models.DateTimeField(auto_now=True)),
+                (
+                    "restaurant",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="restaurant.restaurant",
+                    ),
+                ),
+                (
+                    "winner_menu",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="restaurant.menu",
+                    ),
+                ),
+            ],
+            options={
+                "permissions": [("list_dailyresult", "Can list daily result")],
+            },
+        ),
+    ]
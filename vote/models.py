@@ -1,6 +1,7 @@
 from django.db import models
+from django.utils import timezone
 
-from restaurant.models import Menu
+from restaurant.models import Menu, Restaurant
 from users.models import User
 
 
@@ -11,11 +12,60 @@ class UserVote(models.Model):
     user = models.ForeignKey(User, on_delete=models.PROTECT)
     menu = models.ForeignKey(Menu, on_delete=models.PROTECT)
     date_time = models.DateTimeField(auto_now_add=True)
+    service_date = models.DateField(default=timezone.localdate)
 
     class Meta:
         permissions = [
             ("list_uservote", "Can list user vote")
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'service_date'], name='unique_user_vote_per_day')
+        ]
+        indexes = [
+            models.Index(fields=['service_date', 'menu'])
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.menu.restaurant.name} - {self.service_date}"
+
+
+class VoteTally(models.Model):
+    """
+    Model for the running vote count of a menu on a service day
+    """
+    service_date = models.DateField()
+    menu = models.ForeignKey(Menu, on_delete=models.PROTECT)
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['service_date', 'menu'], name='unique_vote_tally_per_day_menu')
+        ]
+        indexes = [
+            models.Index(fields=['service_date', '-votes'])
+        ]
+
+    def __str__(self):
+        return f"{self.service_date} - {self.menu_id} - {self.votes}"
+
+
+class DailyResult(models.Model):
+    """
+    Model for the frozen vote result of a service day, written once voting is closed
+    """
+    service_date = models.DateField(unique=True)
+    winner_menu = models.ForeignKey(Menu, null=True, on_delete=models.PROTECT)
+    restaurant = models.ForeignKey(Restaurant, null=True, on_delete=models.PROTECT)
+    winner_votes = models.PositiveIntegerField(default=0)
+    total_votes = models.PositiveIntegerField(default=0)
+    menu_votes = models.JSONField(default=list)
+    tied_menus = models.JSONField(default=list)
+    finalized_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        permissions = [
+            ("list_dailyresult", "Can list daily result")
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.menu.restaurant.name} - {self.menu.date_time}"
+        return f"{self.service_date} - {self.winner_menu_id}"
@@ -0,0 +1,56 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from restaurant.models import Menu
+from vote.models import DailyResult, VoteTally
+from vote.tally import lock_service_days
+
+
+def voting_cutoff(service_date):
+    """
+    Moment the voting of a service day closes
+    """
+    cutoff = datetime.time.fromisoformat(settings.VOTING_CUTOFF)
+    return timezone.make_aware(datetime.datetime.combine(service_date, cutoff))
+
+
+def is_voting_open(service_date, now=None):
+    return (now or timezone.now()) < voting_cutoff(service_date)
+
+
+def finalize_day(service_date):
+    """
+    Freeze the vote result of a service day from its tallies, once the votes being inserted for it are committed
+    """
+    with transaction.atomic():
+        lock_service_days([service_date], exclusive=True)
+        tallies = list(VoteTally.objects.select_related('menu__restaurant').filter(
+            service_date=service_date, votes__gt=0).order_by('-votes', 'menu'))
+        winner = tallies[0] if tallies else None
+        result, _ = DailyResult.objects.update_or_create(service_date=service_date, defaults={
+            'winner_menu': winner.menu if winner else None,
+            'restaurant': winner.menu.restaurant if winner else None,
+            'winner_votes': winner.votes if winner else 0,
+            'total_votes': sum(tally.votes for tally in tallies),
+            'menu_votes': [{'menu': tally.menu_id, 'restaurant': tally.menu.restaurant.name, 'votes': tally.votes}
+                           for tally in tallies],
+            'tied_menus': [tally.menu_id for tally in tallies[1:] if tally.votes == winner.votes],
+        })
+    return result
+
+
+def days_to_finalize(now=None):
+    """
+    Service days with menus or votes whose voting is closed but which have no result yet
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    finalized = DailyResult.objects.values('service_date')
+    service_dates = set(Menu.objects.filter(service_date__lte=today).exclude(
+        service_date__in=finalized).values_list('service_date', flat=True).distinct())
+    service_dates.update(VoteTally.objects.filter(service_date__lte=today).exclude(
+        service_date__in=finalized).values_list('service_date', flat=True).distinct())
+    return sorted(service_date for service_date in service_dates if not is_voting_open(service_date, now))
@@ -0,0 +1,86 @@
+"""
+Compare the per-request vote insert against the buffered vote ingestion.
+
+Runs against a throwaway test database:
+    python manage.py runscript benchmark_vote_ingestion --script-args 1000
+"""
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.ingestion import VoteBuffer
+from vote.models import UserVote, VoteTally
+
+
+def create_voters(count):
+    role = Role.objects.create(name="employee")
+    group = Group.objects.get(name=role.name)
+    group.permissions.add(Permission.objects.get(codename='add_uservote'))
+    password = make_password("benchmark")
+    users = User.objects.bulk_create(
+        User(username=f"voter{i}", email=f"voter{i}@example.com", password=password, role=role)
+        for i in range(count))
+    User.groups.through.objects.bulk_create(User.groups.through(user_id=user.id, group_id=group.id) for user in users)
+    return users
+
+
+def post_votes(users, menu):
+    client = APIClient()
+    url = reverse('Add_Vote')
+    latencies = []
+    for user in users:
+        client.force_authenticate(user=user)
+        start = time.perf_counter()
+        response = client.post(url, {"menu": menu.id})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code in (201, 202), response.content
+    return latencies
+
+
+def report(label, latencies, total):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} {len(latencies) / total:>10.1f} votes/s  "
+          f"mean {statistics.mean(latencies) * 1000:.2f} ms  p95 {p95 * 1000:.2f} ms  total {total:.2f} s")
+
+
+def run(*args):
+    count = int(args[0]) if args else 500
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        users = create_voters(count)
+        owner = users[0]
+        menu = Menu.objects.create(restaurant=Restaurant.objects.create(name="Benchmark", owner=owner),
+                                   day="Monday")
+
+        start = time.perf_counter()
+        latencies = post_votes(users, menu)
+        report("sync", latencies, time.perf_counter() - start)
+
+        UserVote.objects.all().delete()
+        VoteTally.objects.all().delete()
+
+        vote_buffer = VoteBuffer(batch_size=200, flush_interval=0.5)
+        # Buffered votes are only taken before the cutoff
+        with override_settings(VOTE_INGESTION={'MODE': 'buffered'}, VOTING_CUTOFF='23:59:59.999999'), \
+                mock.patch('vote.views.get_vote_buffer', return_value=vote_buffer):
+            start = time.perf_counter()
+            latencies = post_votes(users, menu)
+            vote_buffer.stop()
+            total = time.perf_counter() - start
+        report("buffered", latencies, total)
+        assert UserVote.objects.count() == count == VoteTally.objects.get(menu=menu).votes
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
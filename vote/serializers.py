@@ -1,21 +1,20 @@
 from rest_framework import serializers
 
+from internal_menu_selection.batch_loader import BatchedRelatedField, BatchListSerializer
 from restaurant.models import Menu
-from vote.models import UserVote
+from vote.models import UserVote, DailyResult
 
 
 class VoteListCreateSerializer(serializers.ModelSerializer):
     """
         Serializer to View List of vote and add vote
     """
-    user = serializers.SerializerMethodField('get_user')
-
-    def get_user(self, user_vote_obj):
-        return user_vote_obj.user.username
+    user = BatchedRelatedField('user', 'username')
 
     class Meta:
         model = UserVote
         fields = ['id', 'user', 'menu', 'date_time']
+        list_serializer_class = BatchListSerializer
 
 
 class VoteResultListSerializer(serializers.ModelSerializer):
@@ -23,15 +22,29 @@ class VoteResultListSerializer(serializers.ModelSerializer):
         Serializer to View result of votes
     """
 
-    restaurant = serializers.SerializerMethodField('get_restaurant')
+    restaurant = BatchedRelatedField('restaurant', 'name')
     votes = serializers.SerializerMethodField('get_votes')
 
     def get_votes(self, obj):
         return self.context.get('menu__count')
 
-    def get_restaurant(self, obj):
-        return obj.restaurant.name
-
     class Meta:
         model = Menu
         fields = ['restaurant', 'votes']
+        list_serializer_class = BatchListSerializer
+
+
+class DailyResultSerializer(serializers.ModelSerializer):
+    """
+        Serializer to View frozen results of past days
+    """
+
+    restaurant = serializers.SerializerMethodField('get_restaurant')
+
+    def get_restaurant(self, obj):
+        return obj.restaurant.name if obj.restaurant else None
+
+    class Meta:
+        model = DailyResult
+        fields = ['service_date', 'winner_menu', 'restaurant', 'winner_votes', 'total_votes', 'menu_votes',
+                  'tied_menus', 'finalized_at']
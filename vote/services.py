@@ -0,0 +1,57 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from vote.models import DailyResult, UserVote
+from vote.tally import increment_tally, lock_service_days
+
+INSERT_VOTES_SQL = """
+    INSERT INTO {table} (user_id, menu_id, service_date, date_time)
+    SELECT vote.user_id, vote.menu_id, vote.service_date, vote.date_time
+    FROM (VALUES {values}) AS vote (user_id, menu_id, service_date, date_time)
+    WHERE NOT EXISTS (SELECT 1 FROM {result_table} result WHERE result.service_date = vote.service_date)
+    ON CONFLICT (user_id, service_date) DO NOTHING
+    RETURNING id, user_id, menu_id, service_date, date_time
+"""
+
+VOTE_ROW_SQL = "(%s::bigint, %s::bigint, %s::date, %s::timestamptz)"
+
+
+def insert_votes(votes):
+    """
+    Insert (user_id, menu_id, service_date, date_time) rows in one statement, skipping users that have
+    already voted on that service day and days whose result is final, and add the inserted votes to the tallies.
+    The service days are locked first, so a day is not finalized between the check of its result and the commit.
+    Returns the inserted votes.
+    """
+    if not votes:
+        return []
+    sql = INSERT_VOTES_SQL.format(table=connection.ops.quote_name(UserVote._meta.db_table),
+                                  result_table=connection.ops.quote_name(DailyResult._meta.db_table),
+                                  values=", ".join([VOTE_ROW_SQL] * len(votes)))
+    params = [value for vote in votes for value in vote]
+    with transaction.atomic():
+        lock_service_days({vote[2] for vote in votes})
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            inserted = [UserVote(id=vote_id, user_id=user_id, menu_id=menu_id, service_date=service_date,
+                                 date_time=date_time)
+                        for vote_id, user_id, menu_id, service_date, date_time in cursor.fetchall()]
+        tallies = Counter((user_vote_obj.service_date, user_vote_obj.menu_id) for user_vote_obj in inserted)
+        for (service_date, menu_id), count in sorted(tallies.items()):
+            increment_tally(service_date, menu_id, by=count)
+    return inserted
+
+
+def cast_vote(user, menu, service_date):
+    """
+    Record the vote of a user for a menu with a single conflict-aware insert.
+    Returns the saved vote, or None when the user has already voted on that service day or its result is final.
+    """
+    inserted = insert_votes([(user.id, menu.id, service_date, timezone.now())])
+    if not inserted:
+        return None
+    user_vote_obj = inserted[0]
+    user_vote_obj.user, user_vote_obj.menu = user, menu
+    return user_vote_obj
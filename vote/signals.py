@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from vote.models import UserVote
+from vote.tally import increment_tally, decrement_tally
+
+
+@receiver(post_save, sender=UserVote)
+def add_vote_to_tally(sender, instance, created, **kwargs):
+    if created:
+        increment_tally(instance.service_date, instance.menu_id)
+
+
+@receiver(post_delete, sender=UserVote)
+def remove_vote_from_tally(sender, instance, **kwargs):
+    decrement_tally(instance.service_date, instance.menu_id)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from users.authentication import StatelessJWTAuthentication
+from vote.events import get_vote_event_hub, stream_settings
+from vote.models import VoteTally
+
+RECONNECT_DELAY_MS = 3000
+LISTEN_TIMEOUT = 5
+
+
+def format_event(data, event_id=None, event='tally'):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def with_connection_cleanup(func):
+    """
+    Run a database function from the stream like Django runs a sync view: on the shared sync thread,
+    releasing unusable or expired connections around it (unless a transaction is open, as in tests)
+    """
+    def cleanup():
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+    def wrapper(*args, **kwargs):
+        cleanup()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cleanup()
+
+    return sync_to_async(wrapper, thread_sensitive=True)
+
+
+@with_connection_cleanup
+def authorize(raw_token):
+    """
+    Return the user of a JWT access token when it may list the votes, otherwise None
+    """
+    authentication = StatelessJWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    if not user.has_perm('vote.list_uservote'):
+        return None
+    return user
+
+
+@with_connection_cleanup
+def tally_snapshot():
+    today = timezone.localdate()
+    tallies = VoteTally.objects.filter(service_date=today, votes__gt=0).order_by('-votes', 'menu').values(
+        'menu', 'votes')
+    return {'service_date': today.isoformat(), 'tallies': list(tallies)}
+
+
+async def send_response(send, status, body):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def vote_stream(scope, receive, send):
+    """
+    ASGI app streaming the tally changes of the votes as Server-Sent Events.
+
+    The access token is read from the Authorization header or, for EventSource clients, from the `token`
+    query parameter. A client reconnecting with Last-Event-ID (header or `last_event_id` query parameter)
+    receives the changes it missed, or a fresh snapshot when they are no longer available.
+    """
+    if scope['type'] != 'http':
+        return
+    headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope['headers']}
+    query = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+    if scope['method'] != 'GET':
+        await send_response(send, 405, {'detail': f"Method \"{scope['method']}\" not allowed."})
+        return
+    raw_token = query.get('token')
+    authorization = headers.get('authorization', '').split()
+    if len(authorization) == 2 and authorization[0] == 'Bearer':
+        raw_token = authorization[1]
+    if not raw_token:
+        await send_response(send, 401, {'detail': "Authentication credentials were not provided."})
+        return
+    if await authorize(raw_token) is None:
+        await send_response(send, 403, {'detail': "You do not have permission to perform this action."})
+        return
+
+    hub = get_vote_event_hub()
+    heartbeat_interval = stream_settings()['HEARTBEAT_INTERVAL']
+    subscriber, missed = hub.subscribe(headers.get('last-event-id') or query.get('last_event_id'))
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    next_event = None
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, hub.wait_listening, LISTEN_TIMEOUT)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': f"retry: {RECONNECT_DELAY_MS}\n\n".encode(),
+                    'more_body': True})
+        if missed is None:
+            await send({'type': 'http.response.body', 'more_body': True,
+                        'body': format_event(await tally_snapshot(), hub.last_event_id, 'snapshot')})
+        else:
+            for event_id, data in missed:
+                await send({'type': 'http.response.body', 'body': format_event(data, event_id), 'more_body': True})
+
+        while True:
+            next_event = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({next_event, disconnect}, timeout=heartbeat_interval,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                break
+            if next_event not in done:
+                next_event.cancel()
+                await send({'type': 'http.response.body', 'body': b": heartbeat\n\n", 'more_body': True})
+                continue
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                body = format_event(await tally_snapshot(), hub.last_event_id, 'snapshot')
+            else:
+                event_id, data = next_event.result()
+                body = format_event(data, event_id)
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        hub.unsubscribe(subscriber)
+        disconnect.cancel()
+        if next_event is not None:
+            next_event.cancel()
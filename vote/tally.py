@@ -0,0 +1,103 @@
+from django.db import connection, transaction
+from django.db.models import Count
+
+from vote.events import NOTIFY_TALLY_SQL
+from vote.models import UserVote, VoteTally
+
+# The tally statements notify their change to the stream listeners of every process
+UPSERT_TALLY_SQL = """
+    WITH tally AS (
+        INSERT INTO {table} (service_date, menu_id, votes)
+        VALUES (%(service_date)s, %(menu)s, %(delta)s)
+        ON CONFLICT (service_date, menu_id) DO UPDATE SET votes = {table}.votes + EXCLUDED.votes
+        RETURNING votes
+    )
+    SELECT votes, {notify} FROM tally
+"""
+
+# Transaction-level advisory locks of service days, in the SERVICE_DAY_LOCK namespace and keyed by the date ordinal
+SERVICE_DAY_LOCK = 7446
+LOCK_SERVICE_DAYS_SQL = """
+    SELECT count({function}(%s, day)) FROM (SELECT unnest(%s::integer[]) AS day ORDER BY day) AS days
+"""
+
+DECREMENT_TALLY_SQL = """
+    WITH tally AS (
+        UPDATE {table} SET votes = votes + %(delta)s
+        WHERE service_date = %(service_date)s AND menu_id = %(menu)s AND votes >= -%(delta)s
+        RETURNING votes
+    )
+    SELECT votes, {notify} FROM tally
+"""
+
+
+def increment_tally(service_date, menu_id, by=1):
+    """
+    Add `by` votes to the tally of a menu with a single upsert, creating the tally row on the first vote
+    of the day. Must run inside the transaction that writes the votes. Returns the new number of votes.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_TALLY_SQL.format(table=connection.ops.quote_name(VoteTally._meta.db_table),
+                                               notify=NOTIFY_TALLY_SQL),
+                       {'service_date': service_date, 'menu': menu_id, 'delta': by})
+        return cursor.fetchone()[0]
+
+
+def lock_service_days(service_dates, exclusive=False):
+    """
+    Lock service days until the end of the transaction: shared by the transactions inserting votes, exclusive for
+    the one finalizing a day, which waits for the votes in flight and holds off the next ones until it committed.
+    Must run in a statement of its own, so the statements after it see what the transactions waited for wrote.
+    """
+    function = 'pg_advisory_xact_lock' if exclusive else 'pg_advisory_xact_lock_shared'
+    with connection.cursor() as cursor:
+        cursor.execute(LOCK_SERVICE_DAYS_SQL.format(function=function),
+                       [SERVICE_DAY_LOCK, sorted({service_date.toordinal() for service_date in service_dates})])
+
+
+def decrement_tally(service_date, menu_id, by=1):
+    """
+    Remove `by` votes from the tally of a menu. Returns the new number of votes.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DECREMENT_TALLY_SQL.format(table=connection.ops.quote_name(VoteTally._meta.db_table),
+                                                  notify=NOTIFY_TALLY_SQL),
+                       {'service_date': service_date, 'menu': menu_id, 'delta': -by})
+        row = cursor.fetchone()
+    return row[0] if row is not None else None
+
+
+def expected_tallies(start_date, end_date):
+    """
+    Count the raw votes of every menu per service day between the given dates (both inclusive)
+    """
+    rows = UserVote.objects.filter(service_date__gte=start_date, service_date__lte=end_date).values(
+        'service_date', 'menu').annotate(Count('id')).order_by()
+    return {(row['service_date'], row['menu']): row['id__count'] for row in rows}
+
+
+def rebuild_tallies(start_date, end_date, dry_run=False):
+    """
+    Repair the tallies between the given dates (both inclusive) so they match the raw votes.
+    Returns the number of created, updated and deleted tally rows.
+    """
+    with transaction.atomic():
+        expected = expected_tallies(start_date, end_date)
+        existing = {(tally.service_date, tally.menu_id): tally for tally in VoteTally.objects.select_for_update().filter(
+            service_date__gte=start_date, service_date__lte=end_date)}
+
+        to_create = [VoteTally(service_date=service_date, menu_id=menu_id, votes=votes)
+                     for (service_date, menu_id), votes in expected.items() if (service_date, menu_id) not in existing]
+        to_update = []
+        for key, tally in existing.items():
+            if key in expected and tally.votes != expected[key]:
+                tally.votes = expected[key]
+                to_update.append(tally)
+        to_delete = [tally.pk for key, tally in existing.items() if key not in expected]
+
+        if not dry_run:
+            VoteTally.objects.bulk_create(to_create)
+            VoteTally.objects.bulk_update(to_update, ['votes'])
+            VoteTally.objects.filter(pk__in=to_delete).delete()
+
+    return len(to_create), len(to_update), len(to_delete)
@@ -0,0 +1,91 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.models import UserVote, VoteTally, DailyResult
+from vote.results import days_to_finalize
+
+
+class TestRebuildVoteTallies(TestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+        self.user2 = User.objects.create_user(email="test2@gmail.com", password="test@123", username="test2",
+                                              role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        UserVote.objects.create(user=self.user, menu=self.menu)
+        UserVote.objects.create(user=self.user2, menu=self.menu)
+        self.today = timezone.localdate()
+
+    def test_rebuild_repairs_drifted_tally(self):
+        VoteTally.objects.filter(menu=self.menu).update(votes=7)
+        out = StringIO()
+        call_command('rebuild_vote_tallies', stdout=out)
+        self.assertEqual(VoteTally.objects.get(service_date=self.today, menu=self.menu).votes, 2)
+        self.assertIn("0 created, 1 updated, 0 deleted", out.getvalue())
+
+    def test_rebuild_recreates_missing_tally(self):
+        VoteTally.objects.all().delete()
+        call_command('rebuild_vote_tallies', '--from', self.today.isoformat(), '--to', self.today.isoformat(),
+                     stdout=StringIO())
+        self.assertEqual(VoteTally.objects.get(service_date=self.today, menu=self.menu).votes, 2)
+
+    def test_rebuild_dry_run_does_not_write(self):
+        VoteTally.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_vote_tallies', '--dry-run', stdout=out)
+        self.assertFalse(VoteTally.objects.exists())
+        self.assertIn("Would repair", out.getvalue())
+
+
+class TestFinalizeDailyResults(TestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+        self.user2 = User.objects.create_user(email="test2@gmail.com", password="test@123", username="test2",
+                                              role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Monday", service_date=self.yesterday)
+        self.restaurant2 = Restaurant.objects.create(name="TGM", owner=self.user)
+        self.menu2 = Menu.objects.create(restaurant=self.restaurant2, day="Monday", service_date=self.yesterday)
+        UserVote.objects.create(user=self.user, menu=self.menu, service_date=self.yesterday)
+        UserVote.objects.create(user=self.user2, menu=self.menu2, service_date=self.yesterday)
+
+    def test_finalize_closed_days(self):
+        call_command('finalize_daily_results', stdout=StringIO())
+        result = DailyResult.objects.get(service_date=self.yesterday)
+        self.assertEqual(result.winner_menu, self.menu)
+        self.assertEqual(result.restaurant, self.restaurant)
+        self.assertEqual(result.total_votes, 2)
+        self.assertEqual(result.tied_menus, [self.menu2.id])
+        self.assertEqual(result.menu_votes, [{'menu': self.menu.id, 'restaurant': "TGT", 'votes': 1},
+                                             {'menu': self.menu2.id, 'restaurant': "TGM", 'votes': 1}])
+
+    @override_settings(VOTING_CUTOFF='23:59:59.999999')
+    def test_open_day_needs_force(self):
+        today = timezone.localdate()
+        with self.assertRaises(CommandError):
+            call_command('finalize_daily_results', '--date', today.isoformat(), stdout=StringIO())
+        call_command('finalize_daily_results', '--date', today.isoformat(), '--force', stdout=StringIO())
+        self.assertTrue(DailyResult.objects.filter(service_date=today, winner_menu=None).exists())
+
+    @override_settings(TIME_ZONE='Pacific/Auckland', VOTING_CUTOFF='08:00')
+    def test_days_closed_in_the_local_time_zone(self):
+        # 09:00 on October 19 in Auckland, still October 18 in UTC
+        now = datetime.datetime(2026, 10, 18, 20, 0, tzinfo=datetime.timezone.utc)
+        service_date = datetime.date(2026, 10, 19)
+        Menu.objects.create(restaurant=self.restaurant, day="Monday", service_date=service_date)
+        self.assertIn(service_date, days_to_finalize(now))
+        self.assertNotIn(service_date, days_to_finalize(now - datetime.timedelta(hours=2)))
@@ -0,0 +1,92 @@
+import threading
+
+from django.contrib.auth.models import Permission
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.models import DailyResult, UserVote, VoteTally
+from vote.results import finalize_day
+from vote.services import insert_votes
+
+
+@override_settings(VOTING_CUTOFF='23:59:59.999999')
+class TestConcurrentVotes(TransactionTestCase):
+    parallel_votes = 8
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+        self.user.user_permissions.add(Permission.objects.get(name='Can add user vote'))
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        self.menu2 = Menu.objects.create(restaurant=Restaurant.objects.create(name="TGM", owner=self.user),
+                                         day="Thursday")
+        self.vote_create_url = reverse('Add_Vote')
+
+    def test_parallel_votes_record_exactly_one(self):
+        barrier = threading.Barrier(self.parallel_votes)
+        status_codes = []
+
+        def vote(menu):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                barrier.wait()
+                status_codes.append(client.post(self.vote_create_url, {"menu": menu.id}).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=vote, args=(self.menu if i % 2 else self.menu2,))
+                   for i in range(self.parallel_votes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(status_codes), [201] + [400] * (self.parallel_votes - 1))
+        self.assertEqual(UserVote.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(sum(VoteTally.objects.values_list('votes', flat=True)), 1)
+
+    def test_finalize_waits_for_the_votes_in_flight(self):
+        service_date = self.menu.service_date
+        inserted, release = threading.Event(), threading.Event()
+
+        def vote():
+            try:
+                with transaction.atomic():
+                    insert_votes([(self.user.id, self.menu.id, service_date, timezone.now())])
+                    inserted.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def finalize():
+            try:
+                finalize_day(service_date)
+            finally:
+                connection.close()
+
+        voter = threading.Thread(target=vote)
+        voter.start()
+        self.assertTrue(inserted.wait(5))
+        finalizer = threading.Thread(target=finalize)
+        finalizer.start()
+        finalizer.join(0.5)
+        self.assertTrue(finalizer.is_alive())
+        release.set()
+        voter.join()
+        finalizer.join()
+
+        result = DailyResult.objects.get(service_date=service_date)
+        self.assertEqual(result.total_votes, 1)
+        self.assertEqual(result.winner_menu, self.menu)
+        late_user = User.objects.create_user(email="late@gmail.com", password="test@123", username="late",
+                                             role=self.role)
+        self.assertEqual(insert_votes([(late_user.id, self.menu2.id, service_date, timezone.now())]), [])
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.ingestion import VoteBuffer, get_vote_buffer, replay_spilled_votes
+from vote.models import UserVote, VoteTally
+from vote.results import finalize_day
+
+
+@override_settings(VOTE_INGESTION={'MODE': 'buffered', 'BATCH_SIZE': 2, 'FLUSH_INTERVAL': 0.05},
+                   VOTING_CUTOFF='23:59:59.999999')
+class TestBufferedVotes(TransactionTestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.users = [User.objects.create_user(email=f"test{i}@gmail.com", password="test@123", username=f"test{i}",
+                                               role=self.role) for i in range(5)]
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.users[0])
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        self.today = timezone.localdate()
+        self.vote_create_url = reverse('Add_Vote')
+        self.spill_path = os.path.join(tempfile.mkdtemp(), 'vote-spill.jsonl')
+
+    def post_vote(self):
+        self.users[0].user_permissions.add(Permission.objects.get(name='Can add user vote'))
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        return client.post(self.vote_create_url, {"menu": self.menu.id})
+
+    def test_buffered_vote_is_accepted_and_flushed(self):
+        self.users[0].user_permissions.add(Permission.objects.get(name='Can add user vote'))
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        r = client.post(self.vote_create_url, {"menu": self.menu.id})
+        self.assertEqual(r.status_code, 202)
+        self.assertEqual(r.data["message"], "Vote accepted")
+        r = client.post(self.vote_create_url, {"menu": self.menu.id})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Already voted")
+
+        get_vote_buffer().stop()
+        self.assertEqual(UserVote.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 1)
+
+    def test_drain_writes_every_queued_vote_in_batches(self):
+        vote_buffer = VoteBuffer(batch_size=2, flush_interval=60)
+        for user in self.users:
+            self.assertTrue(vote_buffer.submit(user.id, self.menu.id, self.today))
+        self.assertFalse(vote_buffer.submit(self.users[0].id, self.menu.id, self.today))
+
+        vote_buffer.stop()
+        self.assertEqual(UserVote.objects.filter(menu=self.menu).count(), 5)
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 5)
+
+    def test_voters_already_in_database_are_duplicates(self):
+        UserVote.objects.create(user=self.users[0], menu=self.menu)
+        vote_buffer = VoteBuffer(batch_size=2, flush_interval=60)
+        self.assertFalse(vote_buffer.submit(self.users[0].id, self.menu.id, self.today))
+        self.assertTrue(vote_buffer.submit(self.users[1].id, self.menu.id, self.today))
+        vote_buffer.stop()
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 2)
+
+    def test_finalized_day_is_closed(self):
+        finalize_day(self.today)
+        r = self.post_vote()
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Voting is closed")
+
+    @override_settings(VOTING_CUTOFF='00:00')
+    def test_votes_after_the_cutoff_are_refused(self):
+        r = self.post_vote()
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Voting is closed")
+
+    def test_votes_dropped_for_a_finalized_day_are_reported(self):
+        vote_buffer = VoteBuffer(batch_size=2, flush_interval=60)
+        vote_buffer.submit(self.users[0].id, self.menu.id, self.today)
+        finalize_day(self.today)
+        with self.assertLogs('vote.ingestion', 'ERROR'):
+            vote_buffer.stop()
+        self.assertFalse(UserVote.objects.exists())
+
+    def test_failed_batches_are_retried_then_spilled_and_replayed(self):
+        vote_buffer = VoteBuffer(batch_size=2, flush_interval=60, retries=2, spill_path=self.spill_path)
+        for user in self.users:
+            vote_buffer.submit(user.id, self.menu.id, self.today)
+        with mock.patch('vote.ingestion.insert_votes', side_effect=OperationalError) as insert_votes, \
+                self.assertLogs('vote.ingestion', 'ERROR'):
+            vote_buffer.stop()
+        self.assertGreaterEqual(insert_votes.call_count, 3)
+        self.assertFalse(UserVote.objects.exists())
+        with open(self.spill_path) as spill_file:
+            self.assertEqual(len(spill_file.readlines()), 5)
+
+        out = StringIO()
+        call_command('replay_spilled_votes', '--path', self.spill_path, stdout=out)
+        self.assertIn("Replayed 5 spilled votes: 5 recorded", out.getvalue())
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 5)
+        self.assertFalse(os.path.exists(self.spill_path))
+        self.assertEqual(replay_spilled_votes(self.spill_path, 2), (0, 0))
+
+    def test_voters_are_loaded_outside_of_the_lock(self):
+        vote_buffer = VoteBuffer(batch_size=2, flush_interval=60)
+
+        def load_voters(**kwargs):
+            self.assertFalse(vote_buffer.lock.locked())
+            return UserVote.objects.none()
+
+        with mock.patch.object(UserVote.objects, 'filter', side_effect=load_voters):
+            self.assertTrue(vote_buffer.submit(self.users[0].id, self.menu.id, self.today))
+        vote_buffer.stop()
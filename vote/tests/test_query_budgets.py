@@ -0,0 +1,74 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from internal_menu_selection.query_budgets import query_budget
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.models import UserVote
+from vote.services import cast_vote
+
+
+@override_settings(VOTING_CUTOFF='23:59:59.999999')
+class TestVoteQueryBudgets(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('sync_permissions', stdout=StringIO())
+        self.role = Role.objects.get(name="employee")
+        self.user = self.create_employee("test")
+        self.today = timezone.localdate()
+        self.client.force_authenticate(user=self.user)
+
+    def create_employee(self, username):
+        return User.objects.create_user(email=f"{username}@gmail.com", password="test@123", username=username,
+                                        role=self.role)
+
+    def create_menu(self, service_date):
+        # Every menu has its own restaurant and owner, so per-row lookups are not hidden by shared instances
+        restaurant = Restaurant.objects.create(name=f"Restaurant {Restaurant.objects.count()}",
+                                               owner=self.create_employee(f"owner{Restaurant.objects.count()}"))
+        return Menu.objects.create(restaurant=restaurant, day="Monday", service_date=service_date)
+
+    def vote_for_new_menus(self, count):
+        for _ in range(count):
+            menu = self.create_menu(self.today)
+            cast_vote(self.create_employee(f"voter{menu.id}"), menu, self.today)
+
+    def test_add_vote(self):
+        menu = self.create_menu(self.today)
+        with query_budget('Add_Vote', 'POST', rows=1):
+            r = self.client.post(reverse('Add_Vote'), {"menu": menu.id})
+        self.assertEqual(r.status_code, 201)
+
+    def test_list_votes(self):
+        rows = 0
+        for count in (1, 5):
+            self.vote_for_new_menus(count - rows)
+            rows = count
+            with query_budget('List_Vote', 'GET', rows=rows):
+                self.assertEqual(self.client.get(reverse('List_Vote')).status_code, 200)
+
+    def test_current_day_result(self):
+        self.vote_for_new_menus(5)
+        with query_budget('List_Result_Vote', 'GET', rows=1):
+            self.assertEqual(self.client.get(reverse('List_Result_Vote')).status_code, 200)
+
+    def test_daily_results(self):
+        rows = 0
+        for count in (1, 5):
+            for offset in range(rows + 1, count + 1):
+                service_date = self.today - datetime.timedelta(days=offset)
+                menu = self.create_menu(service_date)
+                UserVote.objects.create(user=self.user, menu=menu, service_date=service_date)
+                call_command('finalize_daily_results', '--date', service_date.isoformat(), stdout=StringIO())
+            rows = count
+            with query_budget('List_Daily_Result', 'GET', rows=rows):
+                self.assertEqual(self.client.get(reverse('List_Daily_Result')).status_code, 200)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from internal_menu_selection.asgi import application
+from restaurant.models import Restaurant, Menu
+from roles.models import Role
+from users.models import User
+from vote.events import VoteEventHub, get_vote_event_hub
+from vote.models import UserVote
+
+
+class TestVoteEventHub(TestCase):
+
+    def test_reconnect_replays_missed_events(self):
+        async def scenario():
+            hub = VoteEventHub(history_size=10, queue_size=10)
+            hub.publish({'menu': 1})
+            last_event_id = hub.last_event_id
+            hub.publish({'menu': 2})
+            _, missed = hub.subscribe(last_event_id)
+            return [data for _, data in missed]
+
+        self.assertEqual(asyncio.run(scenario()), [{'menu': 2}])
+
+    def test_reconnect_after_history_is_gone_needs_snapshot(self):
+        async def scenario():
+            hub = VoteEventHub(history_size=2, queue_size=10)
+            hub.publish({'menu': 1})
+            last_event_id = hub.last_event_id
+            for menu in range(2, 5):
+                hub.publish({'menu': menu})
+            other_process_id = "0000-1"
+            return hub.subscribe(last_event_id)[1], hub.subscribe(other_process_id)[1]
+
+        self.assertEqual(asyncio.run(scenario()), (None, None))
+
+
+class TestVoteStream(TestCase):
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test",
+                                             role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        UserVote.objects.create(user=self.user, menu=self.menu)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def open_stream(self, query_string=b'', headers=()):
+        messages = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/v1/vote/stream/', 'query_string': query_string,
+                 'headers': list(headers)}
+        task = asyncio.ensure_future(application(scope, receive, send))
+        return task, messages, disconnected
+
+    async def wait_for(self, messages, count):
+        for _ in range(200):
+            if len(messages) >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f"Expected {count} messages, got {messages}")
+
+    async def test_stream_without_token(self):
+        task, messages, _ = await self.open_stream()
+        await task
+        self.assertEqual(messages[0]['status'], 401)
+
+    async def test_stream_without_permission(self):
+        task, messages, _ = await self.open_stream(query_string=f"token={self.token}".encode())
+        await task
+        self.assertEqual(messages[0]['status'], 403)
+
+    async def test_stream_sends_snapshot_then_tally_changes(self):
+        permission = await Permission.objects.aget(codename='list_uservote')
+        await sync_to_async(self.user.user_permissions.add)(permission)
+        task, messages, disconnected = await self.open_stream(
+            headers=[(b'authorization', f"Bearer {self.token}".encode())])
+        await self.wait_for(messages, 3)
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(b'event: snapshot', messages[2]['body'])
+        snapshot = json.loads(messages[2]['body'].decode().split('data: ')[1])
+        self.assertEqual(snapshot['tallies'], [{'menu': self.menu.id, 'votes': 1}])
+
+        get_vote_event_hub().publish({'service_date': timezone.localdate().isoformat(), 'menu': self.menu.id,
+                                      'delta': 1, 'votes': 2})
+        await self.wait_for(messages, 4)
+        self.assertIn(b'event: tally', messages[3]['body'])
+        self.assertIn(f'"menu":{self.menu.id},"delta":1,"votes":2'.encode(), messages[3]['body'])
+
+        disconnected.set()
+        await task
+
+
+
+class TestVoteEventListener(TransactionTestCase):
+
+    def test_committed_vote_is_published(self):
+        role = Role.objects.create(name="employee")
+        user = User.objects.create_user(email="test@gmail.com", password="test@123", username="test", role=role)
+        menu = Menu.objects.create(restaurant=Restaurant.objects.create(name="TGT", owner=user), day="Thursday")
+
+        def vote():
+            # Committed on another connection than the listener's, as by another process
+            try:
+                UserVote.objects.create(user=user, menu=menu)
+            finally:
+                connection.close()
+
+        async def scenario():
+            hub = get_vote_event_hub()
+            subscriber, _ = hub.subscribe(None)
+            try:
+                loop = asyncio.get_running_loop()
+                self.assertTrue(await loop.run_in_executor(None, hub.wait_listening, 5))
+                await loop.run_in_executor(None, vote)
+                return (await asyncio.wait_for(subscriber.queue.get(), 5))[1]
+            finally:
+                listener = hub.listener
+                hub.unsubscribe(subscriber)
+                listener.thread.join(5)
+
+        self.assertEqual(asyncio.run(scenario()), {'service_date': timezone.localdate().isoformat(),
+                                                   'menu': menu.id, 'delta': 1, 'votes': 1})
@@ -1,13 +1,20 @@
+import datetime
+from io import StringIO
+
 from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from restaurant.models import Restaurant, FoodItem, Menu
 from roles.models import Role
 from users.models import User
-from vote.models import UserVote
+from vote.models import UserVote, VoteTally, DailyResult
 
 
+@override_settings(VOTING_CUTOFF='23:59:59.999999')
 class TestVote(APITestCase):
     email = 'test@gmail.com'
     username = 'test'
@@ -61,6 +68,34 @@ class TestVote(APITestCase):
         self.assertEqual(r.status_code, 201)
         self.assertEqual(r.data['menu'], self.menu.id)
 
+    @override_settings(VOTING_CUTOFF='00:00')
+    def test_add_vote_after_cutoff_denied(self):
+        self.user2.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user2)
+        r = self.client.post(self.vote_create_url, self.vote2)
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Voting is closed")
+        self.assertFalse(UserVote.objects.filter(user=self.user2).exists())
+
+    def test_add_vote_for_past_menu_denied(self):
+        past_menu = Menu.objects.create(restaurant=self.restaurant, day="Wednesday",
+                                        service_date=timezone.localdate() - datetime.timedelta(days=1))
+        self.user2.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user2)
+        r = self.client.post(self.vote_create_url, {"menu": past_menu.id})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Please select today's menu")
+
+    def test_add_vote_updates_tally(self):
+        self.user2.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user2)
+        self.client.post(self.vote_create_url, self.vote2)
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 2)
+
+    def test_delete_vote_updates_tally(self):
+        self.vote.delete()
+        self.assertEqual(VoteTally.objects.get(menu=self.menu).votes, 0)
+
     def test_list_today_menu_permission_denied(self):
         self.client.force_authenticate(user=self.user)
         r = self.client.get(self.vote_list_url)
@@ -73,6 +108,7 @@ class TestVote(APITestCase):
         r = self.client.get(self.vote_list_url)
         self.assertEqual(r.status_code, 200)
         self.assertEqual(r.data[0]['menu'], self.menu.id)
+        self.assertEqual(r.data[0]['menu__count'], 1)
 
     def test_list_result_today_menu_permission_denied(self):
         self.client.force_authenticate(user=self.user)
@@ -87,3 +123,76 @@ class TestVote(APITestCase):
         self.assertEqual(r.status_code, 200)
         self.assertEqual(r.data['votes'], 1)
         self.assertEqual(r.data['restaurant'], "TGT")
+
+
+class TestDailyResult(APITestCase):
+    email = 'test@gmail.com'
+    username = 'test'
+    password = 'test@123'
+
+    def setUp(self):
+        self.role = Role.objects.create(name="employee")
+        self.add_permission = Permission.objects.get(name='Can add user vote')
+        self.list_vote_permission = Permission.objects.get(name='Can list user vote')
+        self.list_permission = Permission.objects.get(name='Can list daily result')
+        self.user = User.objects.create_user(
+            email=self.email,
+            password=self.password,
+            username=self.username,
+            role=self.role)
+        self.user2 = User.objects.create_user(
+            email="test2@gmail.com",
+            password="test@123",
+            username="test2",
+            role=self.role)
+        self.restaurant = Restaurant.objects.create(name="TGT", owner=self.user)
+        self.today = timezone.localdate()
+        self.days = [self.today - datetime.timedelta(days=offset) for offset in (3, 2, 1)]
+        for service_date in self.days:
+            menu = Menu.objects.create(restaurant=self.restaurant, day="Monday", service_date=service_date)
+            UserVote.objects.create(user=self.user, menu=menu, service_date=service_date)
+            call_command('finalize_daily_results', '--date', service_date.isoformat(), stdout=StringIO())
+        self.menu = Menu.objects.create(restaurant=self.restaurant, day="Thursday")
+        self.vote_create_url = reverse('Add_Vote')
+        self.vote_result_url = reverse('List_Result_Vote')
+        self.daily_result_url = reverse('List_Daily_Result')
+
+    def test_result_of_closed_day_served_from_snapshot(self):
+        DailyResult.objects.filter(service_date=self.days[-1]).update(winner_votes=5)
+        self.user.user_permissions.add(self.list_vote_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.vote_result_url, {"date": self.days[-1].isoformat()})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data, {'restaurant': "TGT", 'votes': 5})
+
+    def test_result_invalid_date(self):
+        self.user.user_permissions.add(self.list_vote_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.vote_result_url, {"date": "yesterday"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_add_vote_after_finalize_denied(self):
+        call_command('finalize_daily_results', '--date', self.today.isoformat(), '--force', stdout=StringIO())
+        self.user2.user_permissions.add(self.add_permission)
+        self.client.force_authenticate(user=self.user2)
+        r = self.client.post(self.vote_create_url, {"menu": self.menu.id})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data["message"], "Voting is closed")
+
+    def test_list_daily_result_permission_denied(self):
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.daily_result_url)
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(r.data["detail"], "You do not have permission to perform this action.")
+
+    def test_list_daily_result_by_date_range_with_cursor(self):
+        self.user.user_permissions.add(self.list_permission)
+        self.client.force_authenticate(user=self.user)
+        r = self.client.get(self.daily_result_url, {"from": self.days[0].isoformat(), "to": self.days[1].isoformat(),
+                                                    "page_size": 1})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([result['service_date'] for result in r.data['results']], [self.days[1].isoformat()])
+        self.assertEqual(r.data['results'][0]['winner_votes'], 1)
+        r = self.client.get(r.data['next'])
+        self.assertEqual([result['service_date'] for result in r.data['results']], [self.days[0].isoformat()])
+        self.assertIsNone(r.data['next'])
@@ -1,9 +1,10 @@
 from django.urls import path
 
-from vote.views import VoteCreateView, VoteListView, VoteResultListView
+from vote.views import VoteCreateView, VoteListView, VoteResultListView, DailyResultListView
 
 urlpatterns = [
     path('current-day/', VoteCreateView.as_view(), name="Add_Vote"),
     path('current-day-votes/', VoteListView.as_view(), name="List_Vote"),
     path('current-day-result/', VoteResultListView.as_view(), name="List_Result_Vote"),
+    path('results/', DailyResultListView.as_view(), name="List_Daily_Result"),
 ]
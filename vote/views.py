@@ -1,15 +1,18 @@
 import datetime
 
-from django.db.models import Count
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import generics, status, filters
 from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
 from rest_framework.response import Response
 
 from internal_menu_selection.common_permissions import IsAuthorizedForListModel
-from internal_menu_selection.pagination import CustomPagination
-from restaurant.models import Menu
-from vote.models import UserVote
-from vote.serializers import VoteListCreateSerializer, VoteResultListSerializer
+from internal_menu_selection.pagination import CustomPagination, DailyResultPagination
+from vote.ingestion import get_vote_buffer, is_buffered
+from vote.models import UserVote, VoteTally, DailyResult
+from vote.results import is_voting_open
+from vote.serializers import VoteListCreateSerializer, VoteResultListSerializer, DailyResultSerializer
+from vote.services import cast_vote
 
 
 class VoteCreateView(generics.CreateAPIView):
@@ -24,17 +27,30 @@ class VoteCreateView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        today = datetime.datetime.now(datetime.timezone.utc).date()
-        menu_obj = Menu.objects.get(id=request.data['menu'])
-        if menu_obj.date_time.day != today.day:
+        today = timezone.localdate()
+        menu_obj = serializer.validated_data['menu']
+        if menu_obj.service_date != today:
             return Response({"message": "Please select today's menu"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            UserVote.objects.get(date_time__day=today.day, user=request.user)
+
+        if not is_voting_open(today):
+            return Response({"message": "Voting is closed"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_buffered():
+            # Queued votes are written up to a flush interval later, so they are refused as soon as the day is final
+            if DailyResult.objects.filter(service_date=today).exists():
+                return Response({"message": "Voting is closed"}, status=status.HTTP_400_BAD_REQUEST)
+            if not get_vote_buffer().submit(request.user.id, menu_obj.id, today):
+                return Response({"message": "Already voted"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"message": "Vote accepted", "user": request.user.username, "menu": menu_obj.id},
+                            status=status.HTTP_202_ACCEPTED)
+
+        user_vote_obj = cast_vote(request.user, menu_obj, today)
+        if user_vote_obj is None:
+            if DailyResult.objects.filter(service_date=today).exists():
+                return Response({"message": "Voting is closed"}, status=status.HTTP_400_BAD_REQUEST)
             return Response({"message": "Already voted"}, status=status.HTTP_400_BAD_REQUEST)
-        except UserVote.DoesNotExist:
-            pass
 
-        serializer.save(user=request.user)
+        serializer = self.get_serializer(user_vote_obj)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -50,28 +66,76 @@ class VoteListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsAuthorizedForListModel]
 
     def get(self, request, *args, **kwargs):
-        today = datetime.datetime.now(datetime.timezone.utc).date()
-        votes = UserVote.objects.filter(date_time__day=today.day).values('menu').order_by('-menu__count').annotate(
-            Count('menu'))
+        today = timezone.localdate()
+        votes = VoteTally.objects.filter(service_date=today, votes__gt=0).order_by('-votes', 'menu').values(
+            'menu', menu__count=F('votes'))
         return Response(votes, status=status.HTTP_200_OK)
 
 
 class VoteResultListView(generics.ListAPIView):
     """
-    View to list current day vote result
+    View to list the vote result of the current day, or of the day given by the `date` query parameter
     """
     queryset = UserVote.objects.all()
     serializer_class = VoteResultListSerializer
     permission_classes = [IsAuthenticated, IsAuthorizedForListModel]
 
     def get(self, request, *args, **kwargs):
-        today = datetime.datetime.now(datetime.timezone.utc).date()
-        user_vote_obj = UserVote.objects.filter(date_time__day=today.day).values('menu').order_by(
-            '-menu__count').annotate(Count('menu')).first()
+        try:
+            service_date = parse_date_param(request.query_params.get('date')) or timezone.localdate()
+        except ValueError as err:
+            return Response({"message": str(err)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not user_vote_obj:
+        if not is_voting_open(service_date):
+            daily_result_obj = DailyResult.objects.select_related('restaurant').filter(
+                service_date=service_date).first()
+            if daily_result_obj:
+                if not daily_result_obj.winner_menu_id:
+                    return Response({"message": "No votes"}, status=status.HTTP_404_NOT_FOUND)
+                return Response({'restaurant': daily_result_obj.restaurant.name,
+                                 'votes': daily_result_obj.winner_votes}, status=status.HTTP_200_OK)
+
+        tally_obj = VoteTally.objects.select_related('menu__restaurant').filter(
+            service_date=service_date, votes__gt=0).order_by('-votes', 'menu').first()
+
+        if not tally_obj:
             return Response({"message": "No votes"}, status=status.HTTP_404_NOT_FOUND)
 
-        menu_obj = Menu.objects.prefetch_related("restaurant").get(id=user_vote_obj.get('menu'))
-        serializer = self.get_serializer(menu_obj, context=user_vote_obj)
+        serializer = self.get_serializer(tally_obj.menu, context={'menu__count': tally_obj.votes})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class DailyResultListView(generics.ListAPIView):
+    """
+    View to list the frozen vote results of past days, newest first, optionally between the `from` and `to`
+    query parameters
+    """
+    queryset = DailyResult.objects.select_related('restaurant').all()
+    serializer_class = DailyResultSerializer
+    pagination_class = DailyResultPagination
+    permission_classes = [IsAuthenticated, IsAuthorizedForListModel]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date = parse_date_param(request.query_params.get('from'))
+            end_date = parse_date_param(request.query_params.get('to'))
+        except ValueError as err:
+            return Response({"message": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        if start_date:
+            queryset = queryset.filter(service_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(service_date__lte=end_date)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+def parse_date_param(value):
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")